@@ -1,12 +1,12 @@
 import os
 import logging
 import json
+from contextlib import contextmanager
 
 from peewee import *
-from peewee_migrate import Router
 
-from apps.webui.internal.wrappers import register_connection
-from config import SRC_LOG_LEVELS, DATA_DIR, DATABASE_URL, BACKEND_DIR
+from apps.webui.internal.wrappers import register_connection, db_state, new_db_state
+from config import SRC_LOG_LEVELS, DATA_DIR, DATABASE_URL
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["DB"])
@@ -41,14 +41,27 @@ except Exception as e:
     log.error(f"Failed to initialize the database connection: {e}")
     raise
 
-router = Router(
-    DB,
-    migrate_dir=BACKEND_DIR / "apps" / "webui" / "internal" / "migrations",
-    logger=log,
-)
-router.run()
-try:
-    DB.connect(reuse_if_open=True)
-except OperationalError as e:
-    log.info(f"Failed to connect to database again due to: {e}")
-    pass
+# Migrations and table creation run from the startup pipeline in
+# `apps.webui.internal.startup`, once per schema fingerprint.
+
+@contextmanager
+def connection_scope():
+    """
+    Run the enclosed block with its own connection state. A connection is
+    checked out of the pool by the first query and returned on exit. Nested
+    scopes reuse the enclosing one.
+    """
+    if db_state.get() is not None:
+        yield
+        return
+
+    token = db_state.set(new_db_state())
+    try:
+        yield
+    finally:
+        try:
+            if not DB.is_closed():
+                DB.close()
+        except Exception as e:
+            log.warning(f"Failed to return database connection to the pool: {e}")
+        db_state.reset(token)
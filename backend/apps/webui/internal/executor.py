@@ -0,0 +1,66 @@
+import contextvars
+import functools
+import logging
+
+import anyio.to_thread
+
+from apps.webui.internal.db import connection_scope
+from config import SRC_LOG_LEVELS, DATABASE_EXECUTOR_WORKERS, DATABASE_ASYNC_OFFLOAD
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+# Peewee is synchronous, so calls made from `async def` routes run on worker
+# threads instead of on the event loop. They share anyio's thread pool with the
+# sync routes, which FastAPI runs there, so the two together can never ask for
+# more connections than the pool holds.
+
+
+def configure_db_threads():
+    """Bound the worker threads by the pool size. Call from the running loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = DATABASE_EXECUTOR_WORKERS
+
+
+def _call_in_scope(func, args, kwargs):
+    with connection_scope():
+        return func(*args, **kwargs)
+
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """
+    Run a blocking database call on a worker thread and await its result.
+
+    The caller's context is copied into the worker thread, so inside a request
+    the call shares the request's pooled connection. Calls for the same request
+    must be awaited one after another, not gathered, since they share it.
+    """
+    if not DATABASE_ASYNC_OFFLOAD:
+        return func(*args, **kwargs)
+
+    ctx = contextvars.copy_context()
+    return await anyio.to_thread.run_sync(
+        functools.partial(ctx.run, _call_in_scope, func, args, kwargs)
+    )
+
+
+class AsyncTable:
+    """
+    Awaitable view over a `*Table` singleton: every method call is run on a
+    worker thread, e.g. `await AsyncPosts.get_post_by_id(post_id)`.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._table, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await run_in_db_executor(attr, *args, **kwargs)
+
+        setattr(self, name, method)
+        return method
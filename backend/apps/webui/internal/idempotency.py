@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import time
+
+from peewee import *
+
+from apps.webui.internal.db import DB, JSONField
+from config import SRC_LOG_LEVELS, IDEMPOTENCY_KEY_TTL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Idempotency keys
+#
+# A write that carries a client-chosen key stores its response under that key
+# in the same transaction as the write. A retry with the same key gets the
+# stored response back from one primary-key lookup instead of writing again.
+# Two concurrent requests with the same key cannot both commit: the second
+# insert of the key fails and rolls its write back.
+####################
+
+
+class IdempotencyKey(Model):
+    key = CharField(max_length=512, primary_key=True)  # "<scope>:<client key>"
+    request_hash = CharField(max_length=64)
+    response = JSONField()
+    created_at = BigIntegerField()
+
+    class Meta:
+        database = DB
+        table_name = "idempotency_key"
+        indexes = ((("created_at",), False),)
+
+
+class IdempotencyConflict(ValueError):
+    """The key was already used for a different request."""
+
+
+def hash_request(request: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def get_response(key: str, request_hash: str):
+    """The stored response for `key`, or None if there is none (or it expired)."""
+    stored = IdempotencyKey.get_or_none(
+        (IdempotencyKey.key == key)
+        & (IdempotencyKey.created_at >= int(time.time()) - IDEMPOTENCY_KEY_TTL)
+    )
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash:
+        raise IdempotencyConflict("Idempotency key was already used for a different request")
+    return stored.response
+
+
+def run_once(scope: str, key: str, request: dict, func):
+    """
+    Return `func()`, unless a request to `scope` with the same `key` already
+    ran, in which case its stored response is returned instead. Without a
+    key, `func` simply runs.
+    """
+    if not key:
+        return func()
+
+    key = f"{scope}:{key}"
+    request_hash = hash_request(request)
+    response = get_response(key, request_hash)
+    if response is not None:
+        return response
+
+    try:
+        with DB.atomic():
+            response = func()
+            # An expired row under this key is replaced, a live one is not
+            IdempotencyKey.delete().where(
+                (IdempotencyKey.key == key)
+                & (IdempotencyKey.created_at < int(time.time()) - IDEMPOTENCY_KEY_TTL)
+            ).execute()
+            IdempotencyKey.insert(
+                key=key,
+                request_hash=request_hash,
+                response=response,
+                created_at=int(time.time()),
+            ).execute()
+        return response
+    except IntegrityError:
+        # A concurrent request with the same key committed first
+        response = get_response(key, request_hash)
+        if response is None:
+            raise
+        return response
+
+
+def purge_expired() -> int:
+    """Delete keys older than IDEMPOTENCY_KEY_TTL. Returns how many were deleted."""
+    return (
+        IdempotencyKey.delete()
+        .where(IdempotencyKey.created_at < int(time.time()) - IDEMPOTENCY_KEY_TTL)
+        .execute()
+    )
@@ -0,0 +1,21 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Index leaderboard buckets by amount, so ranks can be resolved at read time."""
+
+    migrator.add_index(
+        'leaderboardentry',
+        'leaderboard_type', 'period', 'period_date', 'total_amount'
+    )
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the amount index."""
+    migrator.drop_index(
+        'leaderboardentry',
+        'leaderboard_type', 'period', 'period_date', 'total_amount'
+    )
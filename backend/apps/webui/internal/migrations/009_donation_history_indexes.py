@@ -0,0 +1,19 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Index donation history by owner and recency, for cursor pagination."""
+
+    migrator.add_index('donation', 'user', 'created_at', 'id')
+    migrator.add_index('donation', 'child', 'created_at', 'id')
+    migrator.add_index('donation', 'region', 'created_at', 'id')
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the donation history indexes."""
+    migrator.drop_index('donation', 'user', 'created_at', 'id')
+    migrator.drop_index('donation', 'child', 'created_at', 'id')
+    migrator.drop_index('donation', 'region', 'created_at', 'id')
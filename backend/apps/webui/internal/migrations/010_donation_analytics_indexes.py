@@ -0,0 +1,19 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Covering indexes for the analytics queries over completed donations."""
+
+    migrator.add_index('donation', 'status', 'user', 'amount')
+    migrator.add_index('donation', 'region', 'status', 'user', 'amount')
+    migrator.add_index('donation', 'status', 'created_at', 'user', 'region', 'child', 'amount')
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the analytics indexes."""
+    migrator.drop_index('donation', 'status', 'user', 'amount')
+    migrator.drop_index('donation', 'region', 'status', 'user', 'amount')
+    migrator.drop_index('donation', 'status', 'created_at', 'user', 'region', 'child', 'amount')
@@ -0,0 +1,49 @@
+from contextlib import suppress
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Per-child donation aggregates, read by the child donor endpoints."""
+
+    @migrator.create_model
+    class ChildDonationTotal(pw.Model):
+        child = pw.ForeignKeyField(column_name='child_id', field='id', model=migrator.orm['child'], on_delete='CASCADE', primary_key=True)
+        total_amount = pw.DecimalField(auto_round=False, decimal_places=2, default=Decimal('0'), max_digits=15, rounding=ROUND_HALF_EVEN)
+        donation_count = pw.IntegerField(default=0)
+        max_amount = pw.DecimalField(auto_round=False, decimal_places=2, default=Decimal('0'), max_digits=15, rounding=ROUND_HALF_EVEN)
+        last_donation_at = pw.DateTimeField(null=True)
+        updated_at = pw.DateTimeField()
+
+        class Meta:
+            table_name = "child_donation_total"
+
+    @migrator.create_model
+    class ChildDonorTotal(pw.Model):
+        id = pw.CharField(max_length=255, primary_key=True)
+        child = pw.ForeignKeyField(column_name='child_id', field='id', model=migrator.orm['child'], on_delete='CASCADE')
+        user = pw.ForeignKeyField(column_name='user_id', field='id', model=migrator.orm['user'], on_delete='CASCADE')
+        total_amount = pw.DecimalField(auto_round=False, decimal_places=2, default=Decimal('0'), max_digits=15, rounding=ROUND_HALF_EVEN)
+        donation_count = pw.IntegerField(default=0)
+        max_amount = pw.DecimalField(auto_round=False, decimal_places=2, default=Decimal('0'), max_digits=15, rounding=ROUND_HALF_EVEN)
+        last_amount = pw.DecimalField(auto_round=False, decimal_places=2, default=Decimal('0'), max_digits=15, rounding=ROUND_HALF_EVEN)
+        last_donated_at = pw.DateTimeField()
+        updated_at = pw.DateTimeField()
+
+        class Meta:
+            table_name = "child_donor_total"
+            indexes = [
+                (('child', 'user'), True),
+                (('child', 'total_amount'), False),
+                (('child', 'max_amount'), False),
+                (('child', 'last_donated_at'), False),
+            ]
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the per-child donation aggregates."""
+    migrator.remove_model('child_donor_total')
+    migrator.remove_model('child_donation_total')
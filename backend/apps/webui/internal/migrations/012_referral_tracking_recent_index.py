@@ -0,0 +1,15 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Index a referrer's referrals by date, for their most recent ones."""
+
+    migrator.add_index('referraltracking', 'referrer', 'created_at')
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the recent referrals index."""
+    migrator.drop_index('referraltracking', 'referrer', 'created_at')
@@ -0,0 +1,17 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Index users by signup date, for the admin user list and its role filter."""
+
+    migrator.add_index('user', 'created_at', 'id')
+    migrator.add_index('user', 'role', 'created_at', 'id')
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the user list indexes."""
+    migrator.drop_index('user', 'role', 'created_at', 'id')
+    migrator.drop_index('user', 'created_at', 'id')
@@ -0,0 +1,53 @@
+from contextlib import suppress
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+
+def _normalize_id(value) -> str:
+    # Same normalization as apps.webui.models.followers.normalize_id
+    value = str(value or "")
+    for char in ("\r", "\n", "\u00a0", "\u200b"):
+        value = value.replace(char, "")
+    return value.strip().lower()
+
+
+def _normalize_follower_ids(database: pw.Database):
+    """
+    Rewrite follower user and child ids to their normalized form. Rows that
+    become duplicates of another follow of the same child are deleted.
+    """
+    param = database.param
+    rows = database.execute_sql("SELECT id, user_id, child_id FROM follower").fetchall()
+
+    kept, updates, duplicates = set(), [], []
+    for id, user_id, child_id in rows:
+        key = (_normalize_id(user_id), _normalize_id(child_id))
+        if key in kept:
+            duplicates.append(id)
+            continue
+        kept.add(key)
+        if key != (user_id, child_id):
+            updates.append((*key, id))
+
+    with database.atomic():
+        for id in duplicates:
+            database.execute_sql(f"DELETE FROM follower WHERE id = {param}", (id,))
+        for user_id, child_id, id in updates:
+            database.execute_sql(
+                f"UPDATE follower SET user_id = {param}, child_id = {param} WHERE id = {param}",
+                (user_id, child_id, id),
+            )
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Normalize follower ids once, so follow lookups can use the (user, child) index."""
+
+    if not fake:
+        _normalize_follower_ids(database)
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Normalized ids cannot be restored; nothing to do."""
+    pass
@@ -0,0 +1,41 @@
+from contextlib import suppress
+import random
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+with suppress(ImportError):
+    import playhouse.postgres_ext as pw_pext
+
+SHUFFLE_PRIME = 2147483647
+
+
+def _assign_shuffle_keys(database: pw.Database):
+    """Give every existing child its own random tie-breaking key."""
+    param = database.param
+    ids = [id for (id,) in database.execute_sql("SELECT id FROM child").fetchall()]
+    with database.atomic():
+        for id in ids:
+            database.execute_sql(
+                f"UPDATE child SET shuffle_key = {param} WHERE id = {param}",
+                (random.randrange(1, SHUFFLE_PRIME), id),
+            )
+
+
+def migrate(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Rank children by follower count with an index and random tie-breaking."""
+
+    migrator.add_fields(
+        'child',
+        shuffle_key=pw.BigIntegerField(default=lambda: random.randrange(1, SHUFFLE_PRIME)),
+    )
+    migrator.add_index('child', 'is_active', 'follower_count')
+
+    if not fake:
+        # Queued after add_fields, so the column exists before it is filled
+        migrator.run(_assign_shuffle_keys, database)
+
+def rollback(migrator: Migrator, database: pw.Database, *, fake=False):
+    """Remove the follower ranking index and tie-breaking keys."""
+    migrator.drop_index('child', 'is_active', 'follower_count')
+    migrator.remove_fields('child', 'shuffle_key')
@@ -0,0 +1,156 @@
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+
+from peewee import *
+
+from apps.webui.internal.db import DB, JSONField
+from config import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Transactional outbox
+#
+# Side effects that do not have to be visible the moment a write commits are
+# recorded as events in the same transaction as the write (`enqueue`), and
+# run later by `drain`, from the background scheduler. An event is only
+# removed once its handler committed, so a crash between the write and its
+# side effects cannot lose them.
+####################
+
+
+class OutboxEvent(Model):
+    id = BigAutoField()
+    topic = CharField(max_length=100)
+    payload = JSONField()
+    created_at = BigIntegerField()
+    available_at = BigIntegerField()  # not retried before this time
+    attempts = IntegerField(default=0)
+    last_error = TextField(null=True)
+    locked_by = CharField(max_length=255, null=True)
+    locked_until = BigIntegerField(null=True)
+
+    class Meta:
+        database = DB
+        table_name = "outbox_event"
+        indexes = ((("available_at", "id"), False),)
+
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# Seconds a claimed event stays locked, in case its worker dies mid-run
+LOCK_TIMEOUT = 300
+# Events that keep failing are retried with backoff, then left for inspection
+MAX_ATTEMPTS = 10
+
+HANDLERS = {}
+
+
+def register_handler(topic: str, handler):
+    """Run `handler(payload)` for every event of `topic`."""
+    HANDLERS[topic] = handler
+
+
+def enqueue(topic: str, payload: dict) -> int:
+    """Record an event. Call inside the transaction of the write it belongs to."""
+    now = int(time.time())
+    return OutboxEvent.insert(
+        topic=topic, payload=payload, created_at=now, available_at=now
+    ).execute()
+
+
+def enqueue_many(topic: str, payloads: list) -> int:
+    """`enqueue` for a batch of events, with multi-row INSERTs."""
+    from apps.webui.internal.seeding import bulk_insert
+
+    now = int(time.time())
+    return bulk_insert(
+        OutboxEvent,
+        (
+            {
+                "topic": topic,
+                "payload": payload,
+                "created_at": now,
+                "available_at": now,
+                "attempts": 0,
+            }
+            for payload in payloads
+        ),
+    )
+
+
+def _claim(event_id: int, now: int) -> bool:
+    return (
+        OutboxEvent.update(locked_by=WORKER_ID, locked_until=now + LOCK_TIMEOUT)
+        .where(
+            (OutboxEvent.id == event_id)
+            & (OutboxEvent.locked_until.is_null() | (OutboxEvent.locked_until < now))
+        )
+        .execute()
+        == 1
+    )
+
+
+def _process(event: OutboxEvent) -> bool:
+    handler = HANDLERS.get(event.topic)
+    if handler is None:
+        log.warning(f"No outbox handler for topic '{event.topic}', event {event.id}")
+        return False
+
+    try:
+        # The handler's writes and the event's removal commit together
+        with DB.atomic():
+            handler(event.payload)
+            OutboxEvent.delete().where(OutboxEvent.id == event.id).execute()
+        return True
+    except Exception as e:
+        attempts = event.attempts + 1
+        log.warning(f"Outbox event {event.id} ({event.topic}) failed: {e}")
+        OutboxEvent.update(
+            attempts=attempts,
+            last_error=f"{e}\n{traceback.format_exc()}",
+            available_at=int(time.time()) + 2**attempts
+            if attempts < MAX_ATTEMPTS
+            else 2**62,
+            locked_by=None,
+            locked_until=None,
+        ).where(OutboxEvent.id == event.id).execute()
+        return False
+
+
+def drain(batch_size: int = 500, max_batches: int = 20) -> int:
+    """Run the handlers of pending events, oldest first. Returns how many succeeded."""
+    processed = 0
+    for _ in range(max_batches):
+        now = int(time.time())
+        events = list(
+            OutboxEvent.select()
+            .where(
+                (OutboxEvent.available_at <= now)
+                & (OutboxEvent.locked_until.is_null() | (OutboxEvent.locked_until < now))
+            )
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(batch_size)
+        )
+        if not events:
+            break
+
+        for event in events:
+            if _claim(event.id, now) and _process(event):
+                processed += 1
+
+        if len(events) < batch_size:
+            break
+    return processed
+
+
+def get_backlog() -> dict:
+    """Number of pending and failing events, for monitoring."""
+    return {
+        "pending": OutboxEvent.select().count(),
+        "failing": OutboxEvent.select().where(OutboxEvent.attempts > 0).count(),
+    }
@@ -0,0 +1,234 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+
+from fastapi.encoders import jsonable_encoder
+
+from apps.webui.internal.cache import TTLCache
+from apps.webui.internal.db import DB
+from config import (
+    SRC_LOG_LEVELS,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_MAXSIZE,
+    RESPONSE_CACHE_REDIS_URL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Response cache
+#
+# Public read endpoints cache their responses, tagged with the entities they
+# were built from ('child', 'region', 'donation', 'post', ...). Every tag has
+# a version that is part of the keys of the entries tagged with it. The model
+# write methods invalidate a tag by bumping its version, which makes all of
+# its entries unreachable at once; they then expire on their own. Inside a
+# transaction the bump waits for the commit, or a read in between would cache
+# the old rows under the new version.
+#
+# Entries and versions live in a backend: in-process by default, or a Redis
+# server shared by all workers, so an invalidation in one worker is seen by
+# the others.
+####################
+
+
+class LocalBackend:
+    """Entries in an in-process LRU cache with TTL, versions in a dict"""
+
+    name = "local"
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.entries = TTLCache(ttl, maxsize)
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get_versions(self, tags) -> list:
+        with self.lock:
+            return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl: float):
+        self.entries.set(key, value)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SharedBackend:
+    """
+    Entries and versions in a Redis server, through any client with Redis'
+    `get`, `set(ex=)`, `mget` and `incr`.
+    """
+
+    name = "shared"
+
+    def __init__(self, client, prefix: str = "response-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get_versions(self, tags) -> list:
+        if not tags:
+            return []
+        values = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        for tag in tags:
+            self.client.incr(f"{self.prefix}tag:{tag}")
+
+    def get(self, key):
+        raw = self.client.get(f"{self.prefix}{key}")
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl: float):
+        self.client.set(f"{self.prefix}{key}", json.dumps(value), ex=max(int(ttl), 1))
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.endpoints = {}
+            self.invalidations = 0
+            self.errors = 0
+
+    def _record(self, name: str, outcome: str):
+        with self.lock:
+            stats = self.endpoints.setdefault(name, {"hits": 0, "misses": 0})
+            stats[outcome] += 1
+
+    def _error(self, action: str, e: Exception):
+        # A cache that is down must not fail the request
+        with self.lock:
+            self.errors += 1
+        log.warning(f"Response cache {action} failed: {e}")
+
+    def lookup(self, name: str, tags: tuple, params) -> tuple:
+        """(key, cached value or None) of a request to `name` with `params`"""
+        try:
+            versions = self.backend.get_versions(tags)
+        except Exception as e:
+            self._error("lookup", e)
+            return None, None
+
+        digest = hashlib.sha256(
+            json.dumps(jsonable_encoder(params), sort_keys=True, default=str).encode()
+        ).hexdigest()
+        key = f"{name}:{digest}:{'.'.join(map(str, versions))}"
+
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._error("lookup", e)
+            value = None
+        self._record(name, "misses" if value is None else "hits")
+        return key, value
+
+    def store(self, key: str, value):
+        """Cache `value` under a key from `lookup`. Returns the value as cached."""
+        value = jsonable_encoder(value)
+        if key is not None and value is not None:
+            try:
+                self.backend.set(key, value, self.ttl)
+            except Exception as e:
+                self._error("store", e)
+        return value
+
+    def get_or_set(self, name: str, tags: tuple, params, func):
+        if self.ttl <= 0:
+            return func()
+        key, value = self.lookup(name, tags, params)
+        if value is not None:
+            return value
+        return self.store(key, func())
+
+    def cached(self, name: str, tags: tuple):
+        """
+        Cache the responses of a route, keyed by its arguments. Works for
+        `def` and `async def` routes; FastAPI still sees the route's signature.
+        """
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    if self.ttl <= 0:
+                        return await func(*args, **kwargs)
+                    key, value = self.lookup(name, tags, (args, kwargs))
+                    if value is not None:
+                        return value
+                    return self.store(key, await func(*args, **kwargs))
+
+            else:
+
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    return self.get_or_set(
+                        name, tags, (args, kwargs), lambda: func(*args, **kwargs)
+                    )
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str):
+        """Drop every cached response built from any of `tags`."""
+        try:
+            self.backend.bump(tags)
+        except Exception as e:
+            self._error("invalidation", e)
+            return
+        with self.lock:
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            endpoints = {name: dict(stats) for name, stats in self.endpoints.items()}
+            invalidations, errors = self.invalidations, self.errors
+        hits = sum(stats["hits"] for stats in endpoints.values())
+        misses = sum(stats["misses"] for stats in endpoints.values())
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "invalidations": invalidations,
+            "errors": errors,
+            "endpoints": endpoints,
+        }
+
+
+def create_backend():
+    if RESPONSE_CACHE_REDIS_URL:
+        import redis
+
+        return SharedBackend(redis.Redis.from_url(RESPONSE_CACHE_REDIS_URL))
+    return LocalBackend(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAXSIZE)
+
+
+response_cache = ResponseCache(create_backend(), RESPONSE_CACHE_TTL)
+cached = response_cache.cached
+
+
+def invalidate(*tags: str):
+    """Invalidate `tags` once the current transaction, if any, commits"""
+    DB.after_commit(functools.partial(response_cache.invalidate, *tags))
@@ -0,0 +1,231 @@
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from peewee import *
+
+from apps.webui.internal.db import DB, connection_scope
+from config import (
+    SRC_LOG_LEVELS,
+    ENABLE_BACKGROUND_JOBS,
+    LEADERBOARD_REFRESH_INTERVAL,
+    DONATION_SUMMARY_REFRESH_INTERVAL,
+    CHILD_AGGREGATE_REFRESH_INTERVAL,
+    FOLLOWER_COUNT_SYNC_INTERVAL,
+    OUTBOX_DRAIN_INTERVAL,
+    IDEMPOTENCY_PURGE_INTERVAL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+####################
+# Background jobs
+#
+# Every worker runs a scheduler, but a job only runs in one of them per
+# interval: a run first claims the job's row in `scheduled_job`, which only
+# succeeds once the job is due and no other worker holds it. The same row
+# records the outcome of the last run. Its times are in milliseconds, and
+# every worker's runs are offset by a random fraction of a second, so workers
+# started together do not all go for the row at the same instant.
+####################
+
+
+class ScheduledJob(Model):
+    name = CharField(max_length=255, primary_key=True)
+    interval = IntegerField()
+    next_run_at = BigIntegerField(default=0)
+    locked_by = CharField(max_length=255, null=True)
+    locked_until = BigIntegerField(null=True)
+    last_started_at = BigIntegerField(null=True)
+    last_finished_at = BigIntegerField(null=True)
+    last_duration_ms = IntegerField(null=True)
+    last_status = CharField(max_length=20, null=True)  # 'success', 'failed'
+    last_error = TextField(null=True)
+    last_result = TextField(null=True)
+    run_count = IntegerField(default=0)
+
+    class Meta:
+        database = DB
+        table_name = "scheduled_job"
+
+
+# Identifies this worker as the holder of a job's lock
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# A crashed worker's lock expires after this many intervals
+LOCK_TIMEOUT_INTERVALS = 3
+# Upper bound of the random offset of every run, in seconds
+RUN_JITTER = 1.0
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def refresh_leaderboards():
+    from apps.webui.models.leaderboard import Leaderboard
+
+    return Leaderboard.rebuild_leaderboards()
+
+
+def refresh_donation_summaries():
+    from apps.webui.models.donations import Donations
+
+    return Donations.rebuild_donation_summaries()
+
+
+def refresh_child_aggregates():
+    from apps.webui.models.donations import Donations
+
+    return Donations.rebuild_child_aggregates()
+
+
+def sync_follower_counts():
+    from apps.webui.models.children import Children
+
+    return Children.sync_all_follower_counts()
+
+
+def drain_outbox():
+    from apps.webui.internal.outbox import drain
+
+    # Importing the models registers their outbox handlers
+    import apps.webui.models.donations  # noqa: F401
+
+    return drain()
+
+
+def purge_idempotency_keys():
+    from apps.webui.internal.idempotency import purge_expired
+
+    return purge_expired()
+
+
+JOBS = {
+    "leaderboards": (refresh_leaderboards, LEADERBOARD_REFRESH_INTERVAL),
+    "donation_summaries": (refresh_donation_summaries, DONATION_SUMMARY_REFRESH_INTERVAL),
+    "child_aggregates": (refresh_child_aggregates, CHILD_AGGREGATE_REFRESH_INTERVAL),
+    "follower_counts": (sync_follower_counts, FOLLOWER_COUNT_SYNC_INTERVAL),
+    "outbox": (drain_outbox, OUTBOX_DRAIN_INTERVAL),
+    "idempotency_keys": (purge_idempotency_keys, IDEMPOTENCY_PURGE_INTERVAL),
+}
+
+
+def claim_job(name: str, interval: int) -> bool:
+    """Take the job's lock if it is due and no other worker is running it."""
+    now = now_ms()
+    ScheduledJob.insert(name=name, interval=interval).on_conflict_ignore().execute()
+    claimed = ScheduledJob.update(
+        interval=interval,
+        next_run_at=now + interval * 1000,
+        locked_by=WORKER_ID,
+        locked_until=now + interval * 1000 * LOCK_TIMEOUT_INTERVALS,
+        last_started_at=now,
+    ).where(
+        (ScheduledJob.name == name)
+        & (ScheduledJob.next_run_at <= now)
+        & (ScheduledJob.locked_until.is_null() | (ScheduledJob.locked_until < now))
+    ).execute()
+    return claimed == 1
+
+
+def release_job(name: str, duration_ms: int, error: str = None, result=None):
+    ScheduledJob.update(
+        locked_by=None,
+        locked_until=None,
+        last_finished_at=now_ms(),
+        last_duration_ms=duration_ms,
+        last_status="failed" if error else "success",
+        last_error=error,
+        last_result=None if result is None else str(result),
+        run_count=ScheduledJob.run_count + 1,
+    ).where(
+        (ScheduledJob.name == name) & (ScheduledJob.locked_by == WORKER_ID)
+    ).execute()
+
+
+def run_job(name: str) -> bool:
+    """Run a job if this worker can claim it. Returns True if it ran."""
+    func, interval = JOBS[name]
+    with connection_scope():
+        if not claim_job(name, interval):
+            return False
+
+        start = time.perf_counter()
+        error = result = None
+        try:
+            result = func()
+        except Exception as e:
+            error = f"{e}\n{traceback.format_exc()}"
+            log.exception(f"Background job '{name}' failed: {e}")
+
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        release_job(name, duration_ms, error, result)
+        log.info(f"Background job '{name}' took {duration_ms}ms")
+    return True
+
+
+def get_jobs_status() -> list:
+    """Last run of every background job, for the admin endpoint."""
+    rows = {job.name: job for job in ScheduledJob.select()}
+    status = []
+    for name, (_, interval) in JOBS.items():
+        job = rows.get(name)
+        status.append(
+            {
+                "name": name,
+                "interval": interval,
+                "running": bool(job and job.locked_by),
+                "locked_by": job.locked_by if job else None,
+                "next_run_at": job.next_run_at if job else None,
+                "last_started_at": job.last_started_at if job else None,
+                "last_finished_at": job.last_finished_at if job else None,
+                "last_duration_ms": job.last_duration_ms if job else None,
+                "last_status": job.last_status if job else None,
+                "last_error": job.last_error if job else None,
+                "last_result": job.last_result if job else None,
+                "run_count": job.run_count if job else 0,
+            }
+        )
+    return status
+
+
+scheduler = None
+
+
+def start_scheduler():
+    global scheduler
+    if not ENABLE_BACKGROUND_JOBS or scheduler is not None:
+        return
+
+    scheduler = BackgroundScheduler(daemon=True)
+    for name, (_, interval) in JOBS.items():
+        if interval <= 0:
+            continue
+        scheduler.add_job(
+            run_job,
+            IntervalTrigger(seconds=interval, jitter=RUN_JITTER),
+            args=[name],
+            id=name,
+            # First run right after startup, so the precomputed rows exist
+            next_run_time=datetime.now() + timedelta(seconds=random.uniform(0, RUN_JITTER)),
+            max_instances=1,
+            coalesce=True,
+        )
+    scheduler.start()
+    log.info(f"Started background jobs as {WORKER_ID}")
+
+
+def stop_scheduler():
+    global scheduler
+    if scheduler is None:
+        return
+    scheduler.shutdown(wait=True)
+    scheduler = None
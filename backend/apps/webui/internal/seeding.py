@@ -0,0 +1,439 @@
+import hashlib
+import logging
+import math
+import random
+import sqlite3
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from peewee import *
+
+from config import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+# Rows per transaction when bulk loading. Keeps the journal bounded on very
+# large loads while still avoiding a commit per row.
+COMMIT_EVERY = 50_000
+MAX_BATCH_ROWS = 2_000
+
+
+def get_batch_size(model) -> int:
+    """Rows per INSERT so that one statement stays under the bind parameter limit."""
+    database = model._meta.database
+    if isinstance(database, SqliteDatabase):
+        max_params = 32_766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+    else:
+        max_params = 65_535
+    columns = max(1, len(model._meta.sorted_fields))
+    return max(1, min(MAX_BATCH_ROWS, max_params // columns))
+
+
+def bulk_insert(model, rows, batch_size: int = None, commit_every: int = COMMIT_EVERY) -> int:
+    """
+    Insert an iterable of row dicts with multi-row INSERTs. Rows are consumed
+    lazily, so generators of millions of rows do not have to fit in memory.
+    Returns the number of rows inserted.
+    """
+    database = model._meta.database
+    batch_size = batch_size or get_batch_size(model)
+    rows = iter(rows)
+    total = 0
+
+    while True:
+        chunk = list(islice(rows, commit_every))
+        if not chunk:
+            break
+        with database.atomic():
+            for batch in chunked(chunk, batch_size):
+                model.insert_many(batch).execute()
+        total += len(chunk)
+        log.debug(f"Inserted {total} rows into {model._meta.table_name}")
+
+    return total
+
+
+def normalize_rows(model, rows: list) -> list:
+    """
+    Give every row the same keys. A multi-row INSERT takes its columns from the
+    first row, so keys that only appear in later rows would be dropped.
+    """
+    keys = set().union(*(row.keys() for row in rows))
+    defaults = {}
+    for key in keys:
+        field = model._meta.fields.get(key)
+        default = field.default if field is not None else None
+        defaults[key] = default
+
+    normalized = []
+    for row in rows:
+        row = dict(row)
+        for key in keys - row.keys():
+            default = defaults[key]
+            row[key] = default() if callable(default) else default
+        normalized.append(row)
+    return normalized
+
+
+def insert_missing(model, rows, key: str = "id") -> int:
+    """
+    Insert only the rows whose `key` is not in the table yet, with one lookup
+    per batch of keys instead of one per row. Used by the demo seeders so they
+    stay idempotent.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+
+    field = getattr(model, key)
+    existing = set()
+    for batch in chunked([row[key] for row in rows], 500):
+        existing.update(value for (value,) in model.select(field).where(field.in_(batch)).tuples())
+
+    missing = [row for row in rows if row[key] not in existing]
+    if not missing:
+        return 0
+    return bulk_insert(model, normalize_rows(model, missing))
+
+
+####################
+# Dataset generator
+#
+# Builds large demo / load-test datasets from the hand-written demo seeders:
+# names, schools, bios, post texts, amounts, payment methods and referral
+# sources are sampled from them. Generated rows get ids starting with
+# `<prefix>-` so a dataset can be dropped again with `delete_dataset`.
+####################
+
+# Share of referral trackings that never registered, registered only, or donated
+REFERRAL_FUNNEL = {"pending": 5, "registered": 2, "donated": 3}
+# Share of donations made through a referral link. The demo donations are
+# mostly referred, which would overstate referral traffic at scale.
+REFERRED_DONATION_RATE = 0.15
+
+
+def _weights_of(values) -> tuple:
+    counts = Counter(values)
+    keys = sorted(counts, key=str)
+    return keys, [counts[key] for key in keys]
+
+
+def _zipf_cum_weights(n: int, s: float = 1.0) -> list:
+    """Cumulative popularity weights where a few items receive most activity."""
+    return list(accumulate(1 / (rank**s) for rank in range(1, n + 1)))
+
+
+def _split_name(name: str) -> tuple:
+    parts = name.split()
+    return parts[0], parts[-1]
+
+
+def generate_dataset(
+    users: int = 1_000,
+    children: int = 100,
+    donations: int = 10_000,
+    followers: int = 5_000,
+    posts: int = 500,
+    referrals: int = 500,
+    seed: int = 42,
+    prefix: str = "load",
+) -> dict:
+    """
+    Generate and bulk load a dataset. Returns the number of rows inserted per
+    table and the elapsed seconds.
+    """
+    from apps.webui.models.children import Child, Children
+    from apps.webui.models.donations import Donation, Donations, random_donation_time
+    from apps.webui.models.followers import Follower
+    from apps.webui.models.posts import Post, Posts
+    from apps.webui.models.referrals import ReferralTracking, Referrals
+    from apps.webui.models.regions import Region, Regions
+    from apps.webui.models.users import User, Users
+
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    now = datetime.now()
+    result = {}
+
+    Regions.seed_default_regions()
+    region_ids = [region_id for (region_id,) in Region.select(Region.id).tuples()]
+
+    user_templates = Users.get_default_users()
+    child_templates = Children.get_default_children()
+    donation_templates = Donations.get_default_donations()
+    post_templates = Posts.get_default_posts()
+    tracking_templates = Referrals.get_default_referral_trackings()
+
+    user_ids = [f"{prefix}-user-{i:07d}" for i in range(users)]
+    child_ids = [f"{prefix}-child-{i:07d}" for i in range(children)]
+
+    # Users
+    first_names = sorted({_split_name(u["name"])[0] for u in user_templates})
+    last_names = sorted({_split_name(u["name"])[1] for u in user_templates})
+    referral_codes = {}
+    # Letters of the name, then a suffix unique to the user: the dataset's
+    # digest and the user's number. The separator keeps them apart, and the
+    # codes clear of the ones generate_referral_code makes.
+    code_suffix = hashlib.sha1(prefix.encode()).hexdigest()[:6].upper()
+
+    def user_rows():
+        for i, user_id in enumerate(user_ids):
+            first, last = rng.choice(first_names), rng.choice(last_names)
+            created_at = int((now - timedelta(days=rng.randint(1, 730))).timestamp())
+            letters = "".join(filter(str.isalpha, first))[:5].upper()
+            referral_codes[user_id] = f"{letters}-{code_suffix}{i:07d}"
+            yield {
+                "id": user_id,
+                "name": f"{first} {last}",
+                "email": f"{first}.{last}.{i}@example.com".lower(),
+                "role": "user",
+                "profile_image_url": f"https://picsum.photos/seed/{user_id}/200/200",
+                "referral_code": referral_codes[user_id],
+                "referral_count": 0,
+                "referral_donations_total": 0,
+                "last_active_at": rng.randint(created_at, int(now.timestamp())),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "api_key": None,
+                "oauth_sub": None,
+            }
+
+    result["users"] = bulk_insert(User, user_rows())
+
+    # Children
+    child_first_names = sorted({_split_name(c["name"])[0] for c in child_templates})
+    child_last_names = sorted({_split_name(c["name"])[1] for c in child_templates})
+    child_regions = {}
+    child_first_name = {}
+
+    def child_rows():
+        for i, child_id in enumerate(child_ids):
+            template = child_templates[i % len(child_templates)]
+            first = rng.choice(child_first_names)
+            child_regions[child_id] = rng.choice(region_ids)
+            child_first_name[child_id] = first
+            yield {
+                "id": child_id,
+                "region": child_regions[child_id],
+                "name": f"{first} {rng.choice(child_last_names)}",
+                "age": template["age"],
+                "school": template["school"],
+                "grade": template["grade"],
+                "description": template["description"],
+                "bio": template["bio"],
+                "video_link": template["video_link"],
+                "picture_link": template["picture_link"],
+                "follower_count": 0,
+                "total_received": 0,
+                "is_active": True,
+                "created_at": now - timedelta(days=rng.randint(30, 730)),
+                "updated_at": now,
+            }
+
+    result["children"] = bulk_insert(Child, child_rows())
+
+    # Popularity: a few children and donors account for most of the activity
+    popular_children = rng.sample(child_ids, len(child_ids))
+    child_cum_weights = _zipf_cum_weights(len(popular_children))
+    heavy_donors = rng.sample(user_ids, len(user_ids))
+    donor_cum_weights = _zipf_cum_weights(len(heavy_donors), s=0.8)
+
+    def pick_child():
+        return rng.choices(popular_children, cum_weights=child_cum_weights)[0]
+
+    def pick_donor():
+        return rng.choices(heavy_donors, cum_weights=donor_cum_weights)[0]
+
+    # Referral trackings, loaded once the donations attributed to them are known
+    sources, source_weights = _weights_of(t["referral_source"] for t in tracking_templates)
+    statuses, status_weights = zip(*REFERRAL_FUNNEL.items())
+    trackings = []
+    seen_pairs = set()
+    while len(trackings) < min(referrals, users * (users - 1)):
+        referrer, referred = rng.sample(user_ids, 2)
+        if (referrer, referred) in seen_pairs:
+            continue
+        seen_pairs.add((referrer, referred))
+        i = len(trackings)
+        status = rng.choices(statuses, weights=status_weights)[0]
+        clicked_at = now - timedelta(days=rng.randint(1, 365), minutes=rng.randint(0, 1439))
+        trackings.append({
+            "id": f"{prefix}-ref-track-{i:07d}",
+            "referrer": referrer,
+            "referred_user": referred if status != "pending" else None,
+            "referral_code": None,
+            "status": status,
+            "click_count": rng.randint(1, 5),
+            "first_clicked_at": clicked_at,
+            "registered_at": clicked_at + timedelta(days=rng.randint(0, 3)) if status != "pending" else None,
+            "first_donation_at": None,
+            "total_donations": Decimal("0.00"),
+            "donation_count": 0,
+            "referral_source": rng.choices(sources, weights=source_weights)[0],
+            "created_at": clicked_at,
+            "updated_at": clicked_at,
+        })
+    converted = [t for t in trackings if t["status"] == "donated"]
+
+    # Donations
+    log_amounts = [math.log(d["amount"]) for d in donation_templates]
+    amount_mu = statistics.mean(log_amounts)
+    amount_sigma = statistics.pstdev(log_amounts)
+    donation_types, type_weights = _weights_of(d["donation_type"] for d in donation_templates)
+    payment_methods, method_weights = _weights_of(d["payment_method"] for d in donation_templates)
+
+    def donation_rows():
+        for i in range(donations):
+            donation_id = f"{prefix}-donation-{i:08d}"
+            donation_type = rng.choices(donation_types, weights=type_weights)[0]
+            created_at = random_donation_time(rng)
+            amount = Decimal(max(10, round(rng.lognormvariate(amount_mu, amount_sigma), -1)))
+
+            tracking = None
+            if converted and rng.random() < REFERRED_DONATION_RATE:
+                tracking = rng.choice(converted)
+                tracking["donation_count"] += 1
+                tracking["total_donations"] += amount
+                if not tracking["first_donation_at"] or created_at < tracking["first_donation_at"]:
+                    tracking["first_donation_at"] = created_at
+                tracking["updated_at"] = max(tracking["updated_at"], created_at)
+
+            user_id = child_id = None
+            if donation_type == "Standard" and user_ids:
+                user_id = tracking["referred_user"] if tracking else pick_donor()
+            elif donation_type == "Standard":
+                donation_type = "Guest"
+            if donation_type != "Quick" and child_ids:
+                child_id = pick_child()
+
+            yield {
+                "id": donation_id,
+                "user": user_id,
+                "child": child_id,
+                "region": child_regions.get(child_id),
+                "amount": amount,
+                "currency": "HKD",
+                "donation_type": donation_type,
+                "is_anonymous": donation_type in ("Quick", "Guest"),
+                "referral_code": referral_codes[tracking["referrer"]] if tracking else None,
+                "transaction_id": f"TXN-{donation_id}",
+                "payment_method": rng.choices(payment_methods, weights=method_weights)[0],
+                "status": "completed",
+                "created_at": created_at,
+            }
+
+    result["donations"] = bulk_insert(Donation, donation_rows())
+
+    for tracking in trackings:
+        tracking["referral_code"] = referral_codes[tracking["referrer"]]
+        if tracking["status"] == "donated" and not tracking["donation_count"]:
+            # Converted referrals whose donations were not sampled
+            tracking["status"] = "registered"
+    result["referral_trackings"] = bulk_insert(ReferralTracking, trackings)
+
+    # Followers
+    def follower_rows():
+        pairs = set()
+        target = min(followers, users * children)
+        while len(pairs) < target:
+            pair = (rng.choice(user_ids), pick_child())
+            if pair in pairs:
+                continue
+            pairs.add(pair)
+            yield {
+                "id": f"{prefix}-follower-{len(pairs):08d}",
+                "user": pair[0],
+                "child": pair[1],
+                "followed_at": now - timedelta(days=rng.randint(0, 365)),
+                "notifications_enabled": rng.random() < 0.8,
+            }
+
+    result["followers"] = bulk_insert(Follower, follower_rows())
+
+    # Posts
+    template_first_name = {c["id"]: _split_name(c["name"])[0] for c in child_templates}
+
+    def post_rows():
+        for i in range(posts if child_ids else 0):
+            template = post_templates[i % len(post_templates)]
+            child_id = pick_child()
+            name = template_first_name.get(template["child_id"], "")
+            rename = (lambda text: text.replace(name, child_first_name[child_id]) if text and name else text)
+            created_at = now - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 1439))
+            yield {
+                "id": f"{prefix}-post-{i:07d}",
+                "child": child_id,
+                "author": None,
+                "title": rename(template["title"]),
+                "caption": rename(template["caption"]),
+                "comments": rename(template["comments"]),
+                "post_type": template["post_type"],
+                "media_urls": template["media_urls"],
+                "video_link": template["video_link"],
+                "youtube_url": None,
+                "likes": int(template["likes"] * rng.uniform(0.2, 2.0)),
+                "comments_count": int(template["comments_count"] * rng.uniform(0.2, 2.0)),
+                "is_published": True,
+                "is_featured": rng.random() < 0.1,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    result["posts"] = bulk_insert(Post, post_rows())
+
+    # Denormalized counters, recomputed set-based for the generated rows only
+    with Child._meta.database.atomic():
+        Child.update(
+            total_received=Donation.select(fn.COALESCE(fn.SUM(Donation.amount), 0)).where(
+                (Donation.child == Child.id) & (Donation.status == "completed")
+            ),
+            follower_count=Follower.select(fn.COUNT(Follower.id)).where(
+                Follower.child == Child.id
+            ),
+        ).where(Child.id.startswith(f"{prefix}-")).execute()
+        User.update(
+            referral_count=ReferralTracking.select(fn.COUNT(ReferralTracking.id)).where(
+                (ReferralTracking.referrer == User.id)
+                & (ReferralTracking.status != "pending")
+            ),
+            referral_donations_total=ReferralTracking.select(
+                fn.COALESCE(fn.SUM(ReferralTracking.total_donations), 0)
+            ).where(ReferralTracking.referrer == User.id),
+        ).where(User.id.startswith(f"{prefix}-")).execute()
+    # Precomputed per-child totals and donors, which the generated donations
+    # bypassed
+    result["child_aggregates"] = Donations.rebuild_child_aggregates()
+
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    log.info(f"Generated dataset '{prefix}': {result}")
+    return result
+
+
+def delete_dataset(prefix: str = "load") -> dict:
+    """Delete every row created by `generate_dataset` with this prefix."""
+    from apps.webui.models.children import Child
+    from apps.webui.models.donations import Donation, Donations
+    from apps.webui.models.followers import Follower
+    from apps.webui.models.posts import Post
+    from apps.webui.models.referrals import ReferralTracking
+    from apps.webui.models.users import User
+
+    result = {}
+    with Child._meta.database.atomic():
+        for name, model in (
+            ("referral_trackings", ReferralTracking),
+            ("followers", Follower),
+            ("posts", Post),
+            ("donations", Donation),
+            ("children", Child),
+            ("users", User),
+        ):
+            result[name] = model.delete().where(model.id.startswith(f"{prefix}-")).execute()
+    if result["donations"]:
+        Donations.rebuild_child_aggregates()
+    return result
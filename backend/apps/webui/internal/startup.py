@@ -0,0 +1,206 @@
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from peewee import *
+from peewee_migrate import Router
+
+from apps.webui.internal.db import DB
+from config import SRC_LOG_LEVELS, DATA_DIR, BACKEND_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["DB"])
+
+MIGRATIONS_DIR = BACKEND_DIR / "apps" / "webui" / "internal" / "migrations"
+MODELS_DIR = BACKEND_DIR / "apps" / "webui" / "models"
+
+####################
+# Startup pipeline
+#
+# Migrations, table creation and demo seeding used to run whenever a model
+# module was imported. They now run here, once per schema/seed fingerprint: a
+# warm start only compares the stored fingerprint and moves on.
+####################
+
+
+class StartupState(Model):
+    key = CharField(max_length=255, primary_key=True)
+    fingerprint = CharField(max_length=64)
+    duration_ms = IntegerField(default=0)
+    completed_at = BigIntegerField()
+
+    class Meta:
+        database = DB
+        table_name = "startup_state"
+
+
+STARTUP_KEY = "webui"
+
+
+def get_fingerprint() -> str:
+    """Hash of everything that shapes the schema and the seed data."""
+    digest = hashlib.sha256()
+    files = sorted(MIGRATIONS_DIR.glob("*.py")) + sorted(MODELS_DIR.glob("*.py"))
+    for path in files + [Path(__file__)]:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def get_models() -> list:
+    from apps.webui.models.auths import Auth
+    from apps.webui.models.children import Child
+    from apps.webui.models.donations import (
+        Donation,
+        DonationSummary,
+        ChildDonationTotal,
+        ChildDonorTotal,
+    )
+    from apps.webui.models.files import File
+    from apps.webui.models.followers import Follower
+    from apps.webui.models.leaderboard import LeaderboardEntry
+    from apps.webui.models.milestones import Milestone
+    from apps.webui.models.posts import Post, PostLike, PostComment
+    from apps.webui.models.referrals import ReferralTracking, ReferralReward
+    from apps.webui.models.regions import Region
+    from apps.webui.models.users import User
+    from apps.webui.models.videos import Video, VideoView
+
+    return [
+        Region,
+        User,
+        Auth,
+        Child,
+        Donation,
+        DonationSummary,
+        ChildDonationTotal,
+        ChildDonorTotal,
+        Follower,
+        LeaderboardEntry,
+        Milestone,
+        Post,
+        PostLike,
+        PostComment,
+        ReferralTracking,
+        ReferralReward,
+        File,
+        Video,
+        VideoView,
+    ]
+
+
+def run_migrations():
+    router = Router(DB, migrate_dir=MIGRATIONS_DIR, logger=log)
+    router.run()
+
+
+def create_tables():
+    from apps.webui.internal.idempotency import IdempotencyKey
+    from apps.webui.internal.outbox import OutboxEvent
+    from apps.webui.internal.scheduler import ScheduledJob
+
+    DB.create_tables(
+        get_models() + [StartupState, ScheduledJob, OutboxEvent, IdempotencyKey], safe=True
+    )
+
+
+def seed_defaults():
+    """Seed the demo dataset. Every seeder skips rows that already exist."""
+    from apps.webui.models.auths import Auths
+    from apps.webui.models.children import Children
+    from apps.webui.models.donations import Donations
+    from apps.webui.models.milestones import Milestones
+    from apps.webui.models.posts import Posts
+    from apps.webui.models.referrals import Referrals
+    from apps.webui.models.regions import Regions
+    from apps.webui.models.users import Users
+
+    # Users without a referral code predate referral tracking
+    Users.ensure_referral_codes()
+    Users.seed_default_users()
+    Auths.ensure_admin_user()
+    Regions.seed_default_regions()
+    Children.seed_default_children()
+    Posts.seed_default_posts()
+    Donations.seed_default_donations()
+    Referrals.seed_default_referral_tracking()
+    Milestones.seed_default_milestones()
+
+    # Seeded donations are inserted directly, so their aggregates are rebuilt
+    Donations.rebuild_child_aggregates()
+
+
+STEPS = [
+    ("migrations", run_migrations),
+    ("tables", create_tables),
+    ("seed", seed_defaults),
+]
+
+
+@contextmanager
+def startup_lock():
+    """Serialize the pipeline across workers started at the same time."""
+    if fcntl is None:
+        yield
+        return
+
+    with open(Path(DATA_DIR) / ".startup.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_stored_fingerprint():
+    DB.create_tables([StartupState], safe=True)
+    state = StartupState.get_or_none(StartupState.key == STARTUP_KEY)
+    return state.fingerprint if state else None
+
+
+def run_startup(force: bool = False) -> bool:
+    """
+    Bring the database up to date. Returns True if the pipeline ran and False
+    if the stored fingerprint matched and it was skipped.
+    """
+    fingerprint = get_fingerprint()
+    if not force and get_stored_fingerprint() == fingerprint:
+        log.info("Database is up to date, skipping migrations and seeding")
+        return False
+
+    with startup_lock():
+        # Another worker may have finished while we waited for the lock
+        if not force and get_stored_fingerprint() == fingerprint:
+            return False
+
+        start = time.perf_counter()
+        for name, step in STEPS:
+            step_start = time.perf_counter()
+            step()
+            log.info(
+                f"Startup step '{name}' took {(time.perf_counter() - step_start) * 1000:.0f}ms"
+            )
+        duration_ms = int((time.perf_counter() - start) * 1000)
+
+        StartupState.insert(
+            key=STARTUP_KEY,
+            fingerprint=fingerprint,
+            duration_ms=duration_ms,
+            completed_at=int(time.time()),
+        ).on_conflict(
+            conflict_target=[StartupState.key],
+            preserve=[
+                StartupState.fingerprint,
+                StartupState.duration_ms,
+                StartupState.completed_at,
+            ],
+        ).execute()
+        log.info(f"Startup pipeline completed in {duration_ms}ms")
+    return True
@@ -1,30 +1,85 @@
+import heapq
+import threading
+import time
 from contextvars import ContextVar
 from peewee import *
 from peewee import PostgresqlDatabase, InterfaceError as PeeWeeInterfaceError
+from peewee import _ConnectionState
 
 import logging
 from playhouse.db_url import connect, parse
+from playhouse.pool import (
+    MaxConnectionsExceeded,
+    PooledPostgresqlDatabase,
+    PooledSqliteDatabase,
+)
 from playhouse.shortcuts import ReconnectMixin
 
-from config import SRC_LOG_LEVELS
+from config import (
+    SRC_LOG_LEVELS,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_POOL_IDLE_TIMEOUT,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["DB"])
 
-db_state_default = {"closed": None, "conn": None, "ctx": None, "transactions": None}
-db_state = ContextVar("db_state", default=db_state_default.copy())
+db_state_default = {
+    "closed": None,
+    "conn": None,
+    "ctx": None,
+    "transactions": None,
+    "after_commit": None,
+}
+db_state = ContextVar("db_state", default=None)
 
 
-class PeeweeConnectionState(object):
+def new_db_state() -> dict:
+    """A fresh, closed connection state with its own transaction stacks."""
+    return {
+        **db_state_default,
+        "closed": True,
+        "ctx": [],
+        "transactions": [],
+        "after_commit": [],
+    }
+
+
+class PeeweeConnectionState(_ConnectionState):
+    """
+    Connection state scoped to the current request context.
+
+    Outside of a request (startup, background jobs, socket handlers) there is
+    no request scope, so the state falls back to being per-thread, which is
+    what peewee does by default.
+    """
+
     def __init__(self, **kwargs):
         super().__setattr__("_state", db_state)
+        super().__setattr__("_local", threading.local())
         super().__init__(**kwargs)
 
+    def _current(self) -> dict:
+        state = self._state.get()
+        if state is None:
+            state = getattr(self._local, "state", None)
+            if state is None:
+                state = new_db_state()
+                self._local.state = state
+        return state
+
+    def reset(self):
+        super().reset()
+        self.after_commit = []
+
     def __setattr__(self, name, value):
-        self._state.get()[name] = value
+        self._current()[name] = value
 
     def __getattr__(self, name):
-        value = self._state.get()[name]
+        value = self._current()[name]
         return value
 
 
@@ -38,35 +93,189 @@ class CustomReconnectMixin(ReconnectMixin):
     )
 
 
+class AfterCommitMixin:
+    """
+    Runs callbacks once the outermost transaction commits, so other requests
+    never act on a change they cannot see yet. A rollback discards them.
+    """
+
+    def after_commit(self, callback):
+        if not self.in_transaction():
+            callback()
+            return
+        self._state.after_commit.append(callback)
+
+    def commit(self):
+        result = super().commit()
+        callbacks, self._state.after_commit = self._state.after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.error(f"After-commit callback failed: {e}")
+        return result
+
+    def rollback(self):
+        self._state.after_commit = []
+        return super().rollback()
+
+
+class PoolStatsMixin:
+    """
+    Adds a minimum pool size, idle recycling and utilization counters on top
+    of peewee's connection pool.
+    """
+
+    def __init__(self, *args, min_connections=0, idle_timeout=None, **kwargs):
+        self._min_connections = min_connections or 0
+        self._idle_timeout = idle_timeout or None
+        self._last_checkin = {}
+        self._stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "created": 0,
+            "recycled": 0,
+            "timeouts": 0,
+            "peak_in_use": 0,
+        }
+        super().__init__(*args, **kwargs)
+
+    def connect(self, reuse_if_open=False):
+        try:
+            return super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            self._stats["timeouts"] += 1
+            raise
+
+    def _connect(self):
+        with self._pool_lock:
+            conn = super()._connect()
+            if self._last_checkin.pop(self.conn_key(conn), None) is None:
+                # Connections taken off the idle heap were checked in before.
+                self._stats["created"] += 1
+            self._stats["checkouts"] += 1
+            self._stats["peak_in_use"] = max(
+                self._stats["peak_in_use"], len(self._in_use)
+            )
+        return conn
+
+    def _close(self, conn, close_conn=False):
+        super()._close(conn, close_conn)
+        if close_conn:
+            return
+        with self._pool_lock:
+            self._stats["checkins"] += 1
+            if any(idle is conn for _, _, idle in self._connections):
+                self._last_checkin[self.conn_key(conn)] = time.time()
+            if self._idle_timeout:
+                self._recycle_idle()
+
+    def _recycle_idle(self):
+        cutoff = time.time() - self._idle_timeout
+        keep = []
+        for item in sorted(self._connections):
+            conn = item[2]
+            key = self.conn_key(conn)
+            if (
+                len(keep) >= self._min_connections
+                and self._last_checkin.get(key, 0) < cutoff
+            ):
+                super()._close(conn, True)
+                self._last_checkin.pop(key, None)
+                self._stats["recycled"] += 1
+            else:
+                keep.append(item)
+        if len(keep) != len(self._connections):
+            heapq.heapify(keep)
+            self._connections = keep
+
+    def prewarm(self):
+        """Open connections up to the configured minimum pool size."""
+        with self._pool_lock:
+            missing = self._min_connections - (
+                len(self._connections) + len(self._in_use)
+            )
+            conns = [self._connect() for _ in range(max(0, missing))]
+            for conn in conns:
+                self._close(conn)
+        return len(conns)
+
+    def pool_stats(self) -> dict:
+        with self._pool_lock:
+            in_use = len(self._in_use)
+            idle = len(self._connections)
+            return {
+                "backend": self.__class__.__name__,
+                "min_size": self._min_connections,
+                "max_size": self._max_connections,
+                "in_use": in_use,
+                "idle": idle,
+                "size": in_use + idle,
+                "utilization": (
+                    round(in_use / self._max_connections, 4)
+                    if self._max_connections
+                    else None
+                ),
+                **self._stats,
+            }
+
+
 class ReconnectingPostgresqlDatabase(CustomReconnectMixin, PostgresqlDatabase):
     pass
 
 
+class ReconnectingPooledPostgresqlDatabase(
+    CustomReconnectMixin, AfterCommitMixin, PoolStatsMixin, PooledPostgresqlDatabase
+):
+    pass
+
+
+class StatsPooledSqliteDatabase(
+    AfterCommitMixin, PoolStatsMixin, PooledSqliteDatabase
+):
+    pass
+
+
+def _pool_options() -> dict:
+    return {
+        "max_connections": DATABASE_POOL_SIZE,
+        "min_connections": DATABASE_POOL_MIN_SIZE,
+        "timeout": DATABASE_POOL_TIMEOUT,
+        "stale_timeout": DATABASE_POOL_RECYCLE,
+        "idle_timeout": DATABASE_POOL_IDLE_TIMEOUT,
+    }
+
+
 def register_connection(db_url):
     db = connect(db_url)
     if isinstance(db, PostgresqlDatabase):
-        # Enable autoconnect for SQLite databases, managed by Peewee
-        db.autoconnect = True
-        db.reuse_if_open = True
         log.info("Connected to PostgreSQL database")
 
         # Get the connection details
         connection = parse(db_url)
 
-        # Use our custom database class that supports reconnection
-        db = ReconnectingPostgresqlDatabase(
+        # Use our pooled database class that supports reconnection
+        db = ReconnectingPooledPostgresqlDatabase(
             connection["database"],
             user=connection["user"],
             password=connection["password"],
             host=connection["host"],
             port=connection["port"],
+            **_pool_options(),
         )
-        db.connect(reuse_if_open=True)
     elif isinstance(db, SqliteDatabase):
-        # Enable autoconnect for SQLite databases, managed by Peewee
-        db.autoconnect = True
-        db.reuse_if_open = True
         log.info("Connected to SQLite database")
+
+        # Connections are checked out per request and may be used by whichever
+        # worker thread serves it, so they cannot be pinned to one thread.
+        connect_params = {**db.connect_params, "check_same_thread": False}
+        db = StatsPooledSqliteDatabase(
+            db.database, **connect_params, **_pool_options()
+        )
     else:
         raise ValueError("Unsupported database connection")
+
+    db._state = PeeweeConnectionState()
+    db.autoconnect = True
+    db.prewarm()
     return db
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.routing import APIRoute
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
+from apps.webui.internal.db import connection_scope
 from apps.webui.routers import (
     auths,
     users,
@@ -84,6 +85,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def db_connection_scope(request: Request, call_next):
+    # Give every request its own connection state: the first query checks a
+    # connection out of the pool and it is returned once the response is ready.
+    with connection_scope():
+        return await call_next(request)
+
+
 app.include_router(configs.router, prefix="/configs", tags=["configs"])
 app.include_router(auths.router, prefix="/auths", tags=["auths"])
 app.include_router(users.router, prefix="/users", tags=["users"])
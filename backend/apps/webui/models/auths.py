@@ -9,6 +9,7 @@ from apps.webui.models.users import UserModel, Users
 from utils.utils import verify_password, get_password_hash
 
 from apps.webui.internal.db import DB
+from apps.webui.internal.executor import AsyncTable
 
 from config import SRC_LOG_LEVELS
 
@@ -100,7 +101,6 @@ class AddUserForm(SignupForm):
 class AuthsTable:
     def __init__(self, db):
         self.db = db
-        self.db.create_tables([Auth], safe=True)
 
     def insert_new_auth(
         self,
@@ -239,6 +239,4 @@ class AuthsTable:
 
 
 Auths = AuthsTable(DB)
-
-# Automatically ensure admin user exists when module loads
-Auths.ensure_admin_user()
+AsyncAuths = AsyncTable(Auths)
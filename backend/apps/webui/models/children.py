@@ -1,8 +1,30 @@
 from peewee import *
-from datetime import datetime
+from peewee import EnclosedNodeList
+from datetime import date, datetime
+import logging
+import random
 import uuid
 from apps.webui.internal.db import DB
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import insert_missing
 from apps.webui.models.regions import Region
+from config import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+# Children with the same follower count are ordered by
+# (shuffle_key * seed) % SHUFFLE_PRIME, a different permutation per seed
+SHUFFLE_PRIME = 2147483647
+
+
+def random_shuffle_key() -> int:
+    return random.randrange(1, SHUFFLE_PRIME)
+
+
+def daily_seed() -> int:
+    """The default seed: ties come in a random order that is stable for the day"""
+    return date.today().toordinal()
 
 
 class Child(Model):
@@ -17,6 +39,7 @@ class Child(Model):
     video_link = CharField(max_length=500, null=True)
     picture_link = CharField(max_length=500, null=True)
     follower_count = IntegerField(default=0)
+    shuffle_key = BigIntegerField(default=random_shuffle_key)  # Random tie-breaking between equal counts
     total_received = DecimalField(max_digits=15, decimal_places=2, default=0.00)
     is_active = BooleanField(default=True)
     created_at = DateTimeField(default=datetime.now)
@@ -24,12 +47,15 @@ class Child(Model):
 
     class Meta:
         database = DB
+        indexes = (
+            # Most followed active children
+            (('is_active', 'follower_count'), False),
+        )
 
 
 class ChildrenTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Child], safe=True)
 
     def get_all_children(self) -> list:
         return [
@@ -72,6 +98,7 @@ class ChildrenTable:
             video_link=video_link,
             picture_link=picture_link
         )
+        invalidate("child")
         return self._child_to_dict(child)
 
     def update_child(self, child_id: str, **kwargs) -> dict:
@@ -81,76 +108,122 @@ class ChildrenTable:
                 setattr(child, key, value)
         child.updated_at = datetime.now()
         child.save()
+        invalidate("child")
         return self._child_to_dict(child)
 
+    def adjust_follower_count(self, child_id: str, delta: int) -> bool:
+        """
+        Add `delta` to a child's follower count in one UPDATE, never going
+        below 0, so concurrent follows and unfollows are not lost. The caller
+        invalidates 'child' once its transaction commits.
+        """
+        follower_count = Child.follower_count + delta
+        if delta < 0:
+            follower_count = Case(None, [(follower_count < 0, 0)], follower_count)
+        query = Child.update(
+            follower_count=follower_count,
+            updated_at=datetime.now(),
+        ).where(Child.id == child_id)
+        return query.execute() == 1
+
     def increment_follower_count(self, child_id: str) -> dict:
         """Increment follower count - called when a new follower is added"""
-        child = Child.get(Child.id == child_id)
-        child.follower_count += 1
-        child.updated_at = datetime.now()
-        child.save()
-        return self._child_to_dict(child)
+        self.adjust_follower_count(child_id, 1)
+        invalidate("child")
+        return self.get_child_by_id(child_id)
     
     def decrement_follower_count(self, child_id: str) -> dict:
         """Decrement follower count - called when a follower is removed"""
-        child = Child.get(Child.id == child_id)
-        child.follower_count = max(0, child.follower_count - 1)
-        child.updated_at = datetime.now()
-        child.save()
-        return self._child_to_dict(child)
+        self.adjust_follower_count(child_id, -1)
+        invalidate("child")
+        return self.get_child_by_id(child_id)
     
+    def _actual_follower_count(self):
+        """Number of follower rows of the child in the enclosing query"""
+        from apps.webui.models.followers import Follower
+
+        return Follower.select(fn.COUNT(Follower.id)).where(Follower.child == Child.id)
+
     def sync_follower_count(self, child_id: str) -> dict:
         """Sync follower count with actual followers in Follower table"""
-        from apps.webui.models.followers import Follower
-        
-        child = Child.get(Child.id == child_id)
-        actual_count = Follower.select().where(Follower.child == child_id).count()
-        child.follower_count = actual_count
-        child.updated_at = datetime.now()
-        child.save()
-        return self._child_to_dict(child)
+        Child.update(
+            follower_count=self._actual_follower_count(),
+            updated_at=datetime.now(),
+        ).where(Child.id == child_id).execute()
+        invalidate("child")
+        return self.get_child_by_id(child_id)
     
-    def sync_all_follower_counts(self):
-        """Sync all children's follower counts with Follower table"""
-        from apps.webui.models.followers import Follower
-        
-        # Get all follower counts from Follower table
-        follower_counts = (
-            Follower.select(
-                Follower.child,
-                fn.COUNT(Follower.id).alias('count')
-            )
-            .group_by(Follower.child)
-        )
-        
-        # Update each child's follower count
-        for record in follower_counts:
-            child = Child.get(Child.id == record.child_id)
-            child.follower_count = record.count
-            child.updated_at = datetime.now()
-            child.save()
-        
-        # Reset counts for children with no followers
-        Child.update(follower_count=0, updated_at=datetime.now()).where(
-            Child.id.not_in([r.child_id for r in follower_counts])
-        ).execute()
+    def sync_all_follower_counts(self) -> dict:
+        """
+        Reconcile every child's follower count with the Follower table in one
+        UPDATE ... SET follower_count = (SELECT COUNT(*) ...), touching only
+        the children whose count drifted. Returns how far the counts were off.
+        """
+        actual = self._actual_follower_count()
+        drifted = Child.follower_count != actual
+        # peewee does not parenthesize a subquery used as an operand
+        drift = fn.ABS(Child.follower_count - EnclosedNodeList([actual]))
+
+        with self.db.atomic():
+            children, total_drift, max_drift = Child.select(
+                fn.COUNT(Child.id),
+                fn.COALESCE(fn.SUM(drift), 0),
+                fn.COALESCE(fn.MAX(drift), 0),
+            ).where(drifted).tuples().get()
+            updated = Child.update(
+                follower_count=actual,
+                updated_at=datetime.now(),
+            ).where(drifted).execute()
+
+        if updated:
+            log.info(f"Follower counts of {updated} children drifted by {total_drift} in total")
+            invalidate("child")
+        return {
+            'drifted_children': updated,
+            'total_drift': int(total_drift),
+            'max_drift': int(max_drift),
+        }
+
+    def increment_donation_received(self, child_id: str, amount) -> bool:
+        """Add to a child's total in one UPDATE, so concurrent donations are not lost"""
+        query = Child.update(
+            total_received=Child.total_received + amount,
+            updated_at=datetime.now(),
+        ).where(Child.id == child_id)
+        return query.execute() == 1
 
     def update_donation_received(self, child_id: str, amount: float) -> dict:
-        child = Child.get(Child.id == child_id)
-        child.total_received += amount
-        child.updated_at = datetime.now()
-        child.save()
-        return self._child_to_dict(child)
+        self.increment_donation_received(child_id, amount)
+        invalidate("child")
+        return self.get_child_by_id(child_id)
 
-    def get_popular_children(self, limit: int = 10) -> list:
-        """Get most popular children by follower count"""
-        return [
-            self._child_to_dict(child)
-            for child in Child.select()
+    def top_children_query(self, k: int, *fields, seed: int = None):
+        """
+        The k active children with the most followers, LIMIT k in SQL on the
+        (is_active, follower_count) index. Ties are broken by the children's
+        shuffle keys permuted by `seed`, `daily_seed()` by default, so equal
+        counts come in a random order that is stable for the day.
+        """
+        if seed is None:
+            seed = daily_seed()
+        seed = seed % (SHUFFLE_PRIME - 1) + 1
+        return (
+            Child.select(*fields)
             .where(Child.is_active == True)
-            .order_by(Child.follower_count.desc())
-            .limit(limit)
-        ]
+            .order_by(
+                Child.follower_count.desc(),
+                (Child.shuffle_key * seed) % SHUFFLE_PRIME,
+                Child.id,
+            )
+            .limit(k)
+        )
+
+    def get_popular_children(self, limit: int = 10, seed: int = None) -> list:
+        """Get most popular children by follower count"""
+        query = self.top_children_query(limit, Child, Region, seed=seed).join(
+            Region, JOIN.LEFT_OUTER
+        )
+        return [self._child_to_dict(child) for child in query]
     
     def get_child_with_followers(self, child_id: str) -> dict:
         """Get child details with actual follower information"""
@@ -181,11 +254,7 @@ class ChildrenTable:
             }
             for f in recent_followers
         ]
-        
-        # Sync count if mismatch
-        if actual_follower_count != child.follower_count:
-            self.sync_follower_count(child_id)
-        
+        # A mismatch is left to the scheduled follower count reconciliation
         return child_dict
 
     def delete_child_by_id(self, child_id: str) -> bool:
@@ -194,11 +263,12 @@ class ChildrenTable:
         if not child:
             return False
         child.delete_instance()
+        invalidate("child")
         return True
 
-    def seed_default_children(self):
-        """Seed default children data for demo purposes"""
-        default_children = [
+    def get_default_children(self) -> list:
+        """Demo children, also used as templates by the dataset generator"""
+        return [
             {
                 'id': 'child-001',
                 'region_id': 'central',
@@ -536,13 +606,16 @@ class ChildrenTable:
                 'total_received': 3500.00
             }
         ]
-        
-        for child_data in default_children:
-            existing = Child.get_or_none(Child.id == child_data['id'])
-            if not existing:
-                # Extract region_id separately as it's a foreign key
-                region_id = child_data.pop('region_id')
-                Child.create(region=region_id, **child_data)
+
+    def seed_default_children(self):
+        """Seed default children data for demo purposes"""
+        rows = []
+        for child_data in self.get_default_children():
+            # Extract region_id separately as it's a foreign key
+            region_id = child_data.pop('region_id')
+            rows.append({'region': region_id, **child_data})
+        insert_missing(Child, rows)
+        invalidate("child")
 
     def _child_to_dict(self, child) -> dict:
         if not child:
@@ -567,5 +640,4 @@ class ChildrenTable:
         }
 
 
-Children = ChildrenTable(DB)
-Children.seed_default_children()
\ No newline at end of file
+Children = ChildrenTable(DB)
\ No newline at end of file
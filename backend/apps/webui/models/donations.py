@@ -1,15 +1,64 @@
 from peewee import *
 from playhouse.shortcuts import model_to_dict
 from datetime import datetime, timedelta, date
+import base64
 import uuid
 from decimal import Decimal, InvalidOperation 
 
+from apps.webui.internal import outbox
 from apps.webui.internal.db import DB
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import bulk_insert, insert_missing
 from apps.webui.models.users import User
 from apps.webui.models.children import Child
 from apps.webui.models.regions import Region
 
 
+def random_donation_time(rng, year: int = None) -> datetime:
+    """
+    Random donation timestamp with a realistic shape: clustered in the last
+    few weeks and peaking in the evening. `rng` is a `random.Random`-like
+    source. With `year`, the date is spread over that calendar year instead.
+    """
+    # Add time of day variation (realistic donation times)
+    hours = rng.choices(
+        [9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22],
+        weights=[2, 3, 3, 4, 3, 3, 4, 5, 5, 6, 6, 5, 4, 3]  # Peak in evening
+    )[0]
+    minutes = rng.randint(0, 59)
+    seconds = rng.randint(0, 59)
+
+    if year:
+        # Random day within the specified year
+        year_start = datetime(year, 1, 1)
+        days_in_year = (datetime(year, 12, 31) - year_start).days
+        random_day = rng.randint(0, days_in_year)
+        return year_start + timedelta(
+            days=random_day,
+            hours=hours,
+            minutes=minutes,
+            seconds=seconds
+        )
+
+    # Spread donations over the past 365 days with clustering around certain periods
+    base_days_ago = rng.randint(1, 365)
+
+    # Add some clustering - 30% chance to be within last 30 days
+    if rng.random() < 0.3:
+        base_days_ago = rng.randint(1, 30)
+    # 20% chance to be within last 60-90 days
+    elif rng.random() < 0.2:
+        base_days_ago = rng.randint(60, 90)
+
+    now = datetime.now()
+    return now - timedelta(
+        days=base_days_ago,
+        hours=now.hour - hours,
+        minutes=now.minute - minutes,
+        seconds=now.second - seconds
+    )
+
+
 class Donation(Model):
     id = CharField(max_length=255, unique=True, primary_key=True, default=lambda: str(uuid.uuid4()))
     user = ForeignKeyField(User, backref='donations', on_delete='CASCADE', null=True)  # for quick donate
@@ -36,6 +85,20 @@ class Donation(Model):
 
     class Meta:
         database = DB
+        indexes = (
+            # Donation history pages, newest first
+            (('user', 'created_at', 'id'), False),
+            (('child', 'created_at', 'id'), False),
+            (('region', 'created_at', 'id'), False),
+            # Analytics over completed donations. Each index covers the columns
+            # its queries aggregate, so they never read the table rows:
+            # top donors overall and donation stats
+            (('status', 'user', 'amount'), False),
+            # region stats
+            (('region', 'status', 'user', 'amount'), False),
+            # leaderboard and summary rebuilds over a period
+            (('status', 'created_at', 'user', 'region', 'child', 'amount'), False),
+        )
 
 
 
@@ -58,12 +121,51 @@ class DonationSummary(Model):
 
 
 
+class ChildDonationTotal(Model):
+    """Completed donations to one child, kept up to date as donations are made"""
+    child = ForeignKeyField(Child, primary_key=True, backref='donation_total', on_delete='CASCADE')
+    total_amount = DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    donation_count = IntegerField(default=0)
+    max_amount = DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    last_donation_at = DateTimeField(null=True)
+    updated_at = DateTimeField(default=datetime.now)
+
+
+    class Meta:
+        database = DB
+        table_name = 'child_donation_total'
+
+
+
+class ChildDonorTotal(Model):
+    """Completed donations of one user to one child, for the child's donor lists"""
+    id = CharField(max_length=255, unique=True, primary_key=True, default=lambda: str(uuid.uuid4()))
+    child = ForeignKeyField(Child, backref='donor_totals', on_delete='CASCADE')
+    user = ForeignKeyField(User, backref='child_donor_totals', on_delete='CASCADE')
+    total_amount = DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    donation_count = IntegerField(default=0)
+    max_amount = DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    last_amount = DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    last_donated_at = DateTimeField()
+    updated_at = DateTimeField(default=datetime.now)
+
+
+    class Meta:
+        database = DB
+        table_name = 'child_donor_total'
+        indexes = (
+            (('child', 'user'), True),
+            # top donors, top single donations and recent donors of a child
+            (('child', 'total_amount'), False),
+            (('child', 'max_amount'), False),
+            (('child', 'last_donated_at'), False),
+        )
+
+
+
 class DonationsTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Donation, DonationSummary], safe=True)
-        # Seed default donations for demo
-        self.seed_default_donations()
 
 
     def create_donation(
@@ -140,66 +242,223 @@ class DonationsTable:
             raise ValueError("Invalid amount")
 
 
-        # Create donation
-        donation = Donation.create(
-            user=user_id,
-            child=child_id,
-            region=region_id,
-            amount=amount,  # Decimal now
-            currency=currency,
-            donation_type=donation_type,
-            is_anonymous=is_anonymous,
-            referral_code=referral_code,
-            transaction_id=transaction_id,
-            payment_method=payment_method,
-            status='completed',
-        )
+        # The donation and the counters it moves commit together. Counters are
+        # incremented in SQL, so concurrent donations cannot lose updates.
+        with self.db.atomic():
+            donation = Donation.create(
+                user=user_id,
+                child=child_id,
+                region=region_id,
+                amount=amount,  # Decimal now
+                currency=currency,
+                donation_type=donation_type,
+                is_anonymous=is_anonymous,
+                referral_code=referral_code,
+                transaction_id=transaction_id,
+                payment_method=payment_method,
+                status='completed',
+            )
 
+            if child_id:
+                Children.increment_donation_received(child_id, amount)
+                self._record_child_donations(
+                    [(child_id, user_id, amount, donation.created_at)]
+                )
 
-        # Side effects
-        if child_id:
-            Children.update_donation_received(child_id, amount)
-        
-        # Track referral if referral code is provided (for all donation types)
-        if referral_code:
-            self._track_referral_donation(referral_code, user_id, float(amount))
+            # Referral tracking and leaderboards are updated from the outbox
+            outbox.enqueue('donation.completed', {'donation_id': donation.id})
 
+        invalidate("donation", "child")
 
         return self._donation_to_dict(donation)
 
 
-    def get_donations_by_user(self, user_id: str) -> list:
-        return [
-            self._donation_to_dict(d)
-            for d in Donation.select()
-            .where(Donation.user == user_id)
-            .order_by(Donation.created_at.desc())
-        ]
+    def create_bulk_donations(
+        self,
+        child_ids: list,
+        amount,
+        user_id: str = None,
+        currency: str = 'HKD',
+        referral_code: str = None,
+        transaction_id: str = None,
+        payment_method: str = None,
+    ) -> list:
+        """
+        Donate `amount` to each of `child_ids` at once: Standard donations when
+        `user_id` is given, Guest donations otherwise. The children are looked
+        up in one query, the donations inserted with multi-row INSERTs and the
+        children's totals incremented in one UPDATE, all in one transaction.
+        """
+        from apps.webui.models.users import Users
 
+        if not child_ids:
+            return []
+        if len(set(child_ids)) != len(child_ids):
+            raise ValueError("child_ids must not contain duplicates")
 
-    def get_donations_by_child(self, child_id: str) -> list:
-        return [
-            self._donation_to_dict(d)
-            for d in Donation.select()
-            .where(Donation.child == child_id)
-            .order_by(Donation.created_at.desc())
+        try:
+            amount = Decimal(str(amount))
+        except (InvalidOperation, TypeError):
+            raise ValueError("Invalid amount")
+
+        if user_id:
+            donation_type, is_anonymous = 'Standard', False
+            user = Users.get_user_by_id(user_id)
+            user_name = user.name if user else None
+        else:
+            # Use sentinel user '0000' if present; otherwise store NULL
+            donation_type, is_anonymous = 'Guest', True
+            sentinel = Users.get_user_by_id("0000")
+            user_id = "0000" if sentinel else None
+            user_name = sentinel.name if sentinel else None
+
+        children = {
+            child.id: child
+            for child in Child.select(Child.id, Child.name, Child.region, Region.name.alias('region_name'))
+            .join(Region, JOIN.LEFT_OUTER, on=(Child.region == Region.id))
+            .where(Child.id.in_(child_ids))
+            .objects()
+        }
+        missing = [child_id for child_id in child_ids if child_id not in children]
+        if missing:
+            raise ValueError(f"Child not found: {', '.join(missing)}")
+
+        now = datetime.now()
+        rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'user': user_id,
+                'child': child_id,
+                'region': children[child_id].region_id,
+                'amount': amount,
+                'currency': currency,
+                'donation_type': donation_type,
+                'is_anonymous': is_anonymous,
+                'referral_code': referral_code,
+                'transaction_id': transaction_id,
+                'payment_method': payment_method,
+                'status': 'completed',
+                'created_at': now,
+            }
+            for child_id in child_ids
         ]
 
+        with self.db.atomic():
+            bulk_insert(Donation, rows)
+            Child.update(
+                total_received=Child.total_received + amount,
+                updated_at=now,
+            ).where(Child.id.in_(child_ids)).execute()
+            self._record_child_donations(
+                [(row['child'], user_id, amount, now) for row in rows]
+            )
+            outbox.enqueue_many(
+                'donation.completed', [{'donation_id': row['id']} for row in rows]
+            )
+        invalidate("donation", "child")
 
-    def get_donations_by_region(self, region_id: str) -> list:
         return [
-            self._donation_to_dict(d)
-            for d in Donation.select()
-            .where(Donation.region == region_id)
-            .order_by(Donation.created_at.desc())
+            {
+                'id': row['id'],
+                'user_id': user_id if user_name is not None else None,
+                'user_name': user_name if user_name is not None else ('Anonymous' if is_anonymous else None),
+                'child_id': row['child'],
+                'child_name': children[row['child']].name,
+                'region_id': row['region'],
+                'region_name': children[row['child']].region_name,
+                'amount': float(amount),
+                'currency': currency,
+                'donation_type': donation_type,
+                'is_anonymous': is_anonymous,
+                'referral_code': referral_code,
+                'transaction_id': transaction_id,
+                'payment_method': payment_method,
+                'status': 'completed',
+                'created_at': now.isoformat(),
+            }
+            for row in rows
         ]
 
 
+    def _select_donations(self):
+        """
+        Donations together with the names of their user, child and region, in a
+        single joined query instead of one lazy lookup per row and relation.
+        """
+        return (
+            Donation.select(
+                Donation,
+                User.name.alias('user_name'),
+                Child.name.alias('child_name'),
+                Region.name.alias('region_name'),
+            )
+            .join(User, JOIN.LEFT_OUTER, on=(Donation.user == User.id))
+            .switch(Donation)
+            .join(Child, JOIN.LEFT_OUTER, on=(Donation.child == Child.id))
+            .switch(Donation)
+            .join(Region, JOIN.LEFT_OUTER, on=(Donation.region == Region.id))
+            .objects()
+        )
+
+
+    def _encode_cursor(self, d: Donation) -> str:
+        return base64.urlsafe_b64encode(
+            f"{d.created_at.isoformat()}|{d.id}".encode()
+        ).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> tuple:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, donation_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+            return datetime.fromisoformat(created_at), donation_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+
+    def _get_donation_page(self, where, limit: int = 50, cursor: str = None) -> dict:
+        """
+        One page of donations, newest first. Pages are addressed by an opaque
+        (created_at, id) cursor rather than an offset, so each page is a seek
+        on the (..., created_at, id) index whatever its depth.
+        """
+        query = self._select_donations().where(where)
+        if cursor:
+            created_at, donation_id = self._decode_cursor(cursor)
+            query = query.where(
+                (Donation.created_at < created_at)
+                | ((Donation.created_at == created_at) & (Donation.id < donation_id))
+            )
+
+        # One extra row tells whether there is a next page
+        rows = list(
+            query.order_by(Donation.created_at.desc(), Donation.id.desc()).limit(limit + 1)
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            'donations': [self._donation_to_dict(d) for d in rows],
+            'next_cursor': self._encode_cursor(rows[-1]) if has_more else None,
+        }
+
+
+    def get_donations_by_user(self, user_id: str, limit: int = 50, cursor: str = None) -> dict:
+        return self._get_donation_page(Donation.user == user_id, limit, cursor)
+
+
+    def get_donations_by_child(self, child_id: str, limit: int = 50, cursor: str = None) -> dict:
+        return self._get_donation_page(Donation.child == child_id, limit, cursor)
+
+
+    def get_donations_by_region(self, region_id: str, limit: int = 50, cursor: str = None) -> dict:
+        return self._get_donation_page(Donation.region == region_id, limit, cursor)
+
+
     def get_recent_donations(self, limit: int = 10) -> list:
         return [
             self._donation_to_dict(d)
             for d in (
-                Donation.select()
+                self._select_donations()
                 .where(Donation.status == 'completed')
                 .order_by(Donation.created_at.desc())
                 .limit(limit)
@@ -252,6 +511,20 @@ class DonationsTable:
 
 
     def get_donation_stats(self, region_id: str = None, child_id: str = None) -> dict:
+        # Region totals are precomputed by the donation summaries job
+        if region_id and not child_id:
+            summary = DonationSummary.get_or_none(
+                (DonationSummary.region == region_id)
+                & (DonationSummary.period == 'all_time')
+                & (DonationSummary.period_date == date(2000, 1, 1))
+            )
+            if summary:
+                return {
+                    'total_amount': float(summary.total_amount or 0),
+                    'total_donations': summary.donation_count or 0,
+                    'unique_donors': summary.unique_donors or 0,
+                }
+
         q = Donation.select(
             fn.SUM(Donation.amount).alias('total_amount'),
             fn.COUNT(Donation.id).alias('total_donations'),
@@ -273,6 +546,22 @@ class DonationsTable:
         }
 
 
+    def get_user_donation_stats(self, user_id: str) -> dict:
+        """A donor's totals over all their donations, whatever the history page"""
+        total_amount, total_donations, children_supported = Donation.select(
+            fn.SUM(Donation.amount),
+            fn.COUNT(Donation.id),
+            fn.COUNT(fn.DISTINCT(Donation.child)),
+        ).where(
+            (Donation.user == user_id) & (Donation.status == 'completed')
+        ).tuples().get()
+        return {
+            'total_amount': float(total_amount or 0),
+            'total_donations': total_donations or 0,
+            'children_supported': children_supported or 0,
+        }
+
+
     def _update_donation_summary(self, region_id: str, amount: Decimal):
         today = date.today()
         periods = [
@@ -327,8 +616,64 @@ class DonationsTable:
         return float(total) if total else 0.0
 
 
+    def rebuild_donation_summaries(self, day: date = None) -> int:
+        """
+        Recompute the current DonationSummary bucket of every period, with one
+        GROUP BY region query per period. Each bucket is replaced in its own
+        transaction. Returns the number of summaries written.
+        """
+        from apps.webui.models.leaderboard import get_period_dates
+
+        count = 0
+        for period, period_date in get_period_dates(day):
+            query = Donation.select(
+                Donation.region,
+                fn.SUM(Donation.amount),
+                fn.COUNT(Donation.id),
+                fn.COUNT(fn.DISTINCT(Donation.user)),
+            ).where(
+                (Donation.status == 'completed') & (Donation.region.is_null(False))
+            )
+            if period != 'all_time':
+                query = query.where(
+                    Donation.created_at >= datetime.combine(period_date, datetime.min.time())
+                )
+
+            now = datetime.now()
+            rows = [
+                {
+                    'region': region_id,
+                    'period': period,
+                    'period_date': period_date,
+                    'total_amount': total_amount or Decimal("0.00"),
+                    'donation_count': donation_count,
+                    'unique_donors': unique_donors,
+                    'updated_at': now,
+                }
+                for region_id, total_amount, donation_count, unique_donors in (
+                    query.group_by(Donation.region).tuples()
+                )
+            ]
+
+            with self.db.atomic():
+                DonationSummary.delete().where(
+                    (DonationSummary.period == period)
+                    & (DonationSummary.period_date == period_date)
+                ).execute()
+                count += bulk_insert(DonationSummary, rows)
+        return count
+
     def get_region_summaries(self, period: str = 'all_time') -> list:
-        summaries = DonationSummary.select().where(DonationSummary.period == period)
+        from apps.webui.models.leaderboard import get_period_date
+
+        summaries = (
+            DonationSummary.select(DonationSummary, Region)
+            .join(Region)
+            .where(
+                (DonationSummary.period == period)
+                & (DonationSummary.period_date == get_period_date(period))
+            )
+        )
         return [
             {
                 'region_id': s.region_id,
@@ -342,6 +687,241 @@ class DonationsTable:
         ]
 
 
+    ####################
+    # Per-child aggregates
+    ####################
+
+    def _record_child_donations(self, donations: list):
+        """
+        Add completed donations, given as (child_id, user_id, amount, created_at)
+        tuples, to the per-child aggregates with one upsert per table. Call
+        inside the transaction that creates the donations.
+        """
+        now = datetime.now()
+        totals, donors = {}, {}
+        for child_id, user_id, amount, created_at in donations:
+            if not child_id:
+                continue
+            amount = Decimal(str(amount))
+            total = totals.setdefault(child_id, {
+                'child': child_id, 'total_amount': Decimal("0.00"), 'donation_count': 0,
+                'max_amount': amount, 'last_donation_at': created_at, 'updated_at': now,
+            })
+            total['total_amount'] += amount
+            total['donation_count'] += 1
+            total['max_amount'] = max(total['max_amount'], amount)
+            total['last_donation_at'] = max(total['last_donation_at'], created_at)
+
+            # Guests (no user or the '0000' sentinel) are left out of donor lists
+            if not user_id or user_id == '0000':
+                continue
+            donor = donors.setdefault((child_id, user_id), {
+                'id': str(uuid.uuid4()), 'child': child_id, 'user': user_id,
+                'total_amount': Decimal("0.00"), 'donation_count': 0, 'max_amount': amount,
+                'last_amount': amount, 'last_donated_at': created_at, 'updated_at': now,
+            })
+            donor['total_amount'] += amount
+            donor['donation_count'] += 1
+            donor['max_amount'] = max(donor['max_amount'], amount)
+            if created_at >= donor['last_donated_at']:
+                donor['last_amount'], donor['last_donated_at'] = amount, created_at
+
+        if totals:
+            ChildDonationTotal.insert_many(list(totals.values())).on_conflict(
+                conflict_target=(ChildDonationTotal.child,),
+                update={
+                    ChildDonationTotal.total_amount: ChildDonationTotal.total_amount + EXCLUDED.total_amount,
+                    ChildDonationTotal.donation_count: ChildDonationTotal.donation_count + EXCLUDED.donation_count,
+                    ChildDonationTotal.max_amount: Case(None, [(
+                        EXCLUDED.max_amount > ChildDonationTotal.max_amount, EXCLUDED.max_amount
+                    )], ChildDonationTotal.max_amount),
+                    ChildDonationTotal.last_donation_at: Case(None, [(
+                        ChildDonationTotal.last_donation_at.is_null()
+                        | (EXCLUDED.last_donation_at > ChildDonationTotal.last_donation_at),
+                        EXCLUDED.last_donation_at
+                    )], ChildDonationTotal.last_donation_at),
+                    ChildDonationTotal.updated_at: EXCLUDED.updated_at,
+                }
+            ).execute()
+
+        if donors:
+            newer = EXCLUDED.last_donated_at >= ChildDonorTotal.last_donated_at
+            ChildDonorTotal.insert_many(list(donors.values())).on_conflict(
+                conflict_target=(ChildDonorTotal.child, ChildDonorTotal.user),
+                update={
+                    ChildDonorTotal.total_amount: ChildDonorTotal.total_amount + EXCLUDED.total_amount,
+                    ChildDonorTotal.donation_count: ChildDonorTotal.donation_count + EXCLUDED.donation_count,
+                    ChildDonorTotal.max_amount: Case(None, [(
+                        EXCLUDED.max_amount > ChildDonorTotal.max_amount, EXCLUDED.max_amount
+                    )], ChildDonorTotal.max_amount),
+                    ChildDonorTotal.last_amount: Case(None, [(
+                        newer, EXCLUDED.last_amount
+                    )], ChildDonorTotal.last_amount),
+                    ChildDonorTotal.last_donated_at: Case(None, [(
+                        newer, EXCLUDED.last_donated_at
+                    )], ChildDonorTotal.last_donated_at),
+                    ChildDonorTotal.updated_at: EXCLUDED.updated_at,
+                }
+            ).execute()
+
+    def _child_aggregates_transaction(self):
+        """
+        A transaction that holds off donations from recording into the
+        per-child aggregates until it commits: SQLite takes the write lock
+        up front, Postgres locks both aggregate tables.
+        """
+        if isinstance(self.db, SqliteDatabase):
+            return self.db.atomic('IMMEDIATE')
+        return self.db.atomic()
+
+    def rebuild_child_aggregates(self) -> int:
+        """
+        Recompute the per-child aggregates from the donations table, which also
+        picks up donations deleted or changed status since they were recorded.
+        Both tables are read and replaced in one transaction that blocks
+        donations from recording, so a donation is either in the rebuilt rows
+        or added to them once it commits. Returns the number of rows written.
+        """
+        now = datetime.now()
+        completed = (Donation.status == 'completed') & Donation.child.is_null(False)
+        by_donor = completed & Donation.user.is_null(False) & (Donation.user != '0000')
+
+        # Every donor's totals per child, with their latest donation from the
+        # first row of the partition
+        partition = [Donation.child, Donation.user]
+        ranked = Donation.select(
+            Donation.child,
+            Donation.user,
+            fn.SUM(Donation.amount).over(partition_by=partition).alias('total_amount'),
+            fn.COUNT(Donation.id).over(partition_by=partition).alias('donation_count'),
+            fn.MAX(Donation.amount).over(partition_by=partition).alias('max_amount'),
+            Donation.amount.alias('last_amount'),
+            Donation.created_at.alias('last_donated_at'),
+            fn.ROW_NUMBER().over(
+                partition_by=partition,
+                order_by=[Donation.created_at.desc(), Donation.id.desc()]
+            ).alias('rn')
+        ).where(by_donor).alias('ranked')
+
+        with self._child_aggregates_transaction():
+            if not isinstance(self.db, SqliteDatabase):
+                self.db.execute_sql(
+                    "LOCK TABLE child_donation_total, child_donor_total IN EXCLUSIVE MODE"
+                )
+
+            totals = [
+                {
+                    'child': child_id,
+                    'total_amount': total_amount or Decimal("0.00"),
+                    'donation_count': donation_count,
+                    'max_amount': max_amount or Decimal("0.00"),
+                    'last_donation_at': last_donation_at,
+                    'updated_at': now,
+                }
+                for child_id, total_amount, donation_count, max_amount, last_donation_at in (
+                    Donation.select(
+                        Donation.child,
+                        fn.SUM(Donation.amount),
+                        fn.COUNT(Donation.id),
+                        fn.MAX(Donation.amount),
+                        fn.MAX(Donation.created_at),
+                    ).where(completed).group_by(Donation.child).tuples()
+                )
+            ]
+            donors = [
+                {
+                    'id': str(uuid.uuid4()),
+                    'child': child_id,
+                    'user': user_id,
+                    'total_amount': total_amount or Decimal("0.00"),
+                    'donation_count': donation_count,
+                    'max_amount': max_amount or Decimal("0.00"),
+                    'last_amount': last_amount or Decimal("0.00"),
+                    'last_donated_at': last_donated_at,
+                    'updated_at': now,
+                }
+                for child_id, user_id, total_amount, donation_count, max_amount, last_amount, last_donated_at in (
+                    Donation.select(
+                        ranked.c.child_id,
+                        ranked.c.user_id,
+                        ranked.c.total_amount,
+                        ranked.c.donation_count,
+                        ranked.c.max_amount,
+                        ranked.c.last_amount,
+                        ranked.c.last_donated_at,
+                    )
+                    .from_(ranked)
+                    .where(ranked.c.rn == 1)
+                    .tuples()
+                )
+            ]
+
+            ChildDonorTotal.delete().execute()
+            ChildDonationTotal.delete().execute()
+            return bulk_insert(ChildDonationTotal, totals) + bulk_insert(ChildDonorTotal, donors)
+
+    def get_child_totals(self, child_ids: list) -> dict:
+        """Total completed donations per child id, 0.0 for children without any"""
+        totals = {child_id: 0.0 for child_id in child_ids}
+        if child_ids:
+            for child_id, total_amount in (
+                ChildDonationTotal.select(ChildDonationTotal.child, ChildDonationTotal.total_amount)
+                .where(ChildDonationTotal.child.in_(child_ids))
+                .tuples()
+            ):
+                totals[child_id] = float(total_amount)
+        return totals
+
+    def _get_child_donors(self, child_id: str, order_by, limit: int) -> list:
+        query = (
+            ChildDonorTotal.select(ChildDonorTotal, User.name.alias('user_name'))
+            .join(User, JOIN.LEFT_OUTER, on=(ChildDonorTotal.user == User.id))
+            .where(ChildDonorTotal.child == child_id)
+            .order_by(order_by.desc())
+            .limit(limit)
+            .objects()
+        )
+        return [
+            {
+                'user_id': donor.user_id,
+                'user_name': donor.user_name,
+                'total_amount': float(donor.total_amount),
+                'donation_count': donor.donation_count,
+                'max_amount': float(donor.max_amount),
+                'amount': float(donor.last_amount),
+                'created_at': donor.last_donated_at.isoformat() if donor.last_donated_at else None,
+            }
+            for donor in query
+        ]
+
+    def get_top_child_donors(self, child_id: str, limit: int = 10) -> list:
+        """A child's donors with the highest total donated"""
+        return self._get_child_donors(child_id, ChildDonorTotal.total_amount, limit)
+
+    def get_top_single_child_donors(self, child_id: str, limit: int = 10) -> list:
+        """A child's donors with the highest single donation"""
+        return self._get_child_donors(child_id, ChildDonorTotal.max_amount, limit)
+
+    def get_recent_child_donors(self, child_id: str, limit: int = 10) -> list:
+        """A child's donors, most recent first, with the amount of their latest donation"""
+        return self._get_child_donors(child_id, ChildDonorTotal.last_donated_at, limit)
+
+    def process_completed_donation(self, payload: dict):
+        """Outbox handler for 'donation.completed': the donation's side effects"""
+        from apps.webui.models.leaderboard import Leaderboard
+
+        donation = Donation.get_or_none(Donation.id == payload['donation_id'])
+        if donation is None:
+            return  # Deleted before its side effects ran
+
+        # Track referral if referral code is provided (for all donation types)
+        if donation.referral_code:
+            self._track_referral_donation(donation.referral_code, donation.user_id, donation.amount)
+
+        # Add the donation to the user, region and school leaderboards
+        Leaderboard.record_donation(donation)
+
+
     def _track_referral_donation(self, referral_code: str, donor_user_id: str, amount: float):
         """Track referral donation in the referral system"""
         try:
@@ -349,17 +929,17 @@ class DonationsTable:
             from apps.webui.models.users import Users
             
             # Validate referral code exists
-            referrer = Users.get_user_by_referral_code(referral_code)
+            referrer = Users.get_cached_user_by_referral_code(referral_code)
             if not referrer:
                 print(f"Invalid referral code: {referral_code}")
                 return  # Invalid referral code, skip tracking
             
             # Don't track self-referrals
-            if donor_user_id and donor_user_id == referrer['id']:
+            if donor_user_id and donor_user_id == referrer.id:
                 print(f"Self-referral attempted for user {donor_user_id}")
                 return
             
-            referrer_id = referrer['id']
+            referrer_id = referrer.id
             
             # Create or update referral tracking
             if donor_user_id:
@@ -383,10 +963,11 @@ class DonationsTable:
                     print(f"Created new referral tracking for user {donor_user_id} referred by {referrer_id}")
                 else:
                     # Update existing tracking
-                    existing.total_donations += amount
-                    existing.donation_count += 1
-                    existing.updated_at = datetime.now()
-                    existing.save()
+                    ReferralTracking.update(
+                        total_donations=ReferralTracking.total_donations + amount,
+                        donation_count=ReferralTracking.donation_count + 1,
+                        updated_at=datetime.now(),
+                    ).where(ReferralTracking.id == existing.id).execute()
                     print(f"Updated referral tracking for user {donor_user_id}")
             else:
                 # For anonymous/guest donations, still track them
@@ -403,6 +984,7 @@ class DonationsTable:
             
             # Update referrer's total in the users table
             Users.update_referral_donation_total(referrer_id, amount)
+            invalidate("referral")
             
             # Check for milestone rewards (simplified for now)
             # This would normally be handled by the referral system's reward logic
@@ -410,16 +992,13 @@ class DonationsTable:
             print(f"Successfully tracked referral donation: {referral_code} -> {amount}")
             
         except Exception as e:
-            # Log error but don't fail the donation
+            # Log error and re-raise, so the outbox retries the donation's side effects
             print(f"Error tracking referral donation: {e}")
-            import traceback
-            traceback.print_exc()
+            raise
 
-    def seed_default_donations(self):
-        """Seed default donations data for demo purposes"""
-        import random
-        random.seed(42)  # For reproducibility
-        default_donations = [
+    def get_default_donations(self) -> list:
+        """Demo donations, also used as templates by the dataset generator"""
+        return [
             # Standard donations from users to children with referral codes
             {
                 'id': 'donation-001',
@@ -760,110 +1339,70 @@ class DonationsTable:
                 'year': 2024
             }
         ]
-        
+
+    def seed_default_donations(self):
+        """Seed default donations data for demo purposes"""
+        import random
+        random.seed(42)  # For reproducibility
+
+        default_donations = self.get_default_donations()
+        child_ids = {d['child_id'] for d in default_donations if d['child_id']}
+        child_regions = {
+            child_id: region_id
+            for child_id, region_id in Child.select(Child.id, Child.region)
+            .where(Child.id.in_(list(child_ids)))
+            .tuples()
+        }
+
+        rows = []
         for donation_data in default_donations:
-            existing = Donation.get_or_none(Donation.id == donation_data['id'])
-            if not existing:
-                donation_id = donation_data.pop('id')
-                user_id = donation_data.pop('user_id')
-                child_id = donation_data.pop('child_id')
-                amount = donation_data.pop('amount')
-                donation_type = donation_data.pop('donation_type')
-                payment_method = donation_data.pop('payment_method')
-                referral_code = donation_data.pop('referral_code')
-                specific_year = donation_data.pop('year', None)  # Get specific year if provided
-                
-                # Determine region from child if child_id exists
-                region_id = None
-                if child_id:
-                    try:
-                        child = Child.get(Child.id == child_id)
-                        region_id = child.region_id
-                    except:
-                        continue  # Skip if child not found
-                
-                # Create donation with proper handling of anonymous/guest donations
-                is_anonymous = donation_type in ['Quick', 'Guest']
-                
-                # Generate more random dates
-                if specific_year:
-                    # For specific year donations (e.g., 2024)
-                    from datetime import date
-                    year_start = datetime(specific_year, 1, 1)
-                    year_end = datetime(specific_year, 12, 31)
-                    
-                    # Random day within the specified year
-                    days_in_year = (year_end - year_start).days
-                    random_day = random.randint(0, days_in_year)
-                    
-                    # Add time of day variation
-                    hours = random.choices(
-                        [9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22],
-                        weights=[2, 3, 3, 4, 3, 3, 4, 5, 5, 6, 6, 5, 4, 3]  # Peak in evening
-                    )[0]
-                    minutes = random.randint(0, 59)
-                    seconds = random.randint(0, 59)
-                    
-                    donation_time = year_start + timedelta(
-                        days=random_day,
-                        hours=hours,
-                        minutes=minutes,
-                        seconds=seconds
-                    )
-                else:
-                    # Original logic for donations without specific year
-                    # Spread donations over the past 365 days with clustering around certain periods
-                    base_days_ago = random.randint(1, 365)
-                    
-                    # Add some clustering - 30% chance to be within last 30 days
-                    if random.random() < 0.3:
-                        base_days_ago = random.randint(1, 30)
-                    # 20% chance to be within last 60-90 days
-                    elif random.random() < 0.2:
-                        base_days_ago = random.randint(60, 90)
-                    
-                    # Add time of day variation (realistic donation times)
-                    hours = random.choices(
-                        [9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22],
-                        weights=[2, 3, 3, 4, 3, 3, 4, 5, 5, 6, 6, 5, 4, 3]  # Peak in evening
-                    )[0]
-                    minutes = random.randint(0, 59)
-                    seconds = random.randint(0, 59)
-                    
-                    donation_time = datetime.now() - timedelta(
-                        days=base_days_ago,
-                        hours=datetime.now().hour - hours,
-                        minutes=datetime.now().minute - minutes,
-                        seconds=datetime.now().second - seconds
-                    )
-                
-                Donation.create(
-                    id=donation_id,
-                    user=user_id,
-                    child=child_id,
-                    region=region_id,
-                    amount=Decimal(str(amount)),
-                    currency='HKD',
-                    donation_type=donation_type,
-                    is_anonymous=is_anonymous,
-                    referral_code=referral_code,
-                    transaction_id=f'TXN-{donation_id}',
-                    payment_method=payment_method,
-                    status='completed',
-                    created_at=donation_time
-                )
+            donation_id = donation_data['id']
+            child_id = donation_data['child_id']
+            # Determine region from child if child_id exists
+            if child_id and child_id not in child_regions:
+                continue  # Skip if child not found
+
+            donation_type = donation_data['donation_type']
+            rows.append({
+                'id': donation_id,
+                'user': donation_data['user_id'],
+                'child': child_id,
+                'region': child_regions.get(child_id),
+                'amount': Decimal(str(donation_data['amount'])),
+                'currency': 'HKD',
+                'donation_type': donation_type,
+                # Proper handling of anonymous/guest donations
+                'is_anonymous': donation_type in ['Quick', 'Guest'],
+                'referral_code': donation_data['referral_code'],
+                'transaction_id': f'TXN-{donation_id}',
+                'payment_method': donation_data['payment_method'],
+                'status': 'completed',
+                'created_at': random_donation_time(random, donation_data.get('year')),
+            })
+
+        insert_missing(Donation, rows)
+        invalidate("donation")
 
     def _donation_to_dict(self, d: Donation) -> dict:
         if not d:
             return None
+
+        if hasattr(d, 'user_name'):
+            # Names already joined in by `_select_donations`
+            user_name, child_name, region_name = d.user_name, d.child_name, d.region_name
+        else:
+            user_name = d.user.name if d.user else None
+            child_name = d.child.name if d.child else None
+            region_name = d.region.name if d.region else None
+
         return {
             'id': d.id,
-            'user_id': d.user_id if d.user else None,
-            'user_name': d.user.name if d.user else ('Anonymous' if d.is_anonymous else None),
-            'child_id': d.child_id if d.child else None,
-            'child_name': d.child.name if d.child else None,
-            'region_id': d.region_id if d.region else None,
-            'region_name': d.region.name if d.region else None,
+            'user_id': d.user_id if user_name is not None else None,
+            'user_name': user_name if user_name is not None else ('Anonymous' if d.is_anonymous else None),
+            'child_id': d.child_id if child_name is not None else None,
+            'child_name': child_name,
+            'region_id': d.region_id if region_name is not None else None,
+            'region_name': region_name,
             'amount': float(d.amount),
             'currency': d.currency,
             'donation_type': d.donation_type,
@@ -877,4 +1416,5 @@ class DonationsTable:
 
 
 
-Donations = DonationsTable(DB)
\ No newline at end of file
+Donations = DonationsTable(DB)
+outbox.register_handler('donation.completed', Donations.process_completed_donation)
@@ -1,10 +1,39 @@
 from peewee import *
 from playhouse.shortcuts import model_to_dict
 from datetime import datetime
+import json
+import logging
+import sys
+import threading
 import uuid
+from apps.webui.internal.cache import TTLCache
 from apps.webui.internal.db import DB
+from apps.webui.internal.executor import AsyncTable
+from apps.webui.internal.response_cache import invalidate
 from apps.webui.models.users import User
 from apps.webui.models.children import Child
+from config import (
+    SRC_LOG_LEVELS,
+    FOLLOW_SET_CACHE_TTL,
+    FOLLOW_SET_CACHE_MAXSIZE,
+    FOLLOW_SET_CACHE_REDIS_URL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+def normalize_id(value) -> str:
+    """
+    Canonical form of a user or child id in the follower table: without
+    surrounding whitespace, CR/LF, non-breaking or zero-width spaces, in
+    lowercase. Ids are normalized on the way in, so lookups compare the
+    stored columns as they are and can use the (user, child) index.
+    """
+    value = str(value or "")
+    for char in ("\r", "\n", "\u00a0", "\u200b"):
+        value = value.replace(char, "")
+    return value.strip().lower()
 
 
 class Follower(Model):
@@ -21,10 +50,106 @@ class Follower(Model):
         )
 
 
+class FollowSetCache:
+    """
+    The ids of the children each user follows, loaded on first use with one
+    query and kept as a frozenset of interned strings, so ids shared by many
+    users are stored once. Held in an LRU cache of `maxsize` users for `ttl`
+    seconds, or in Redis when a `client` is given, so all workers share it.
+
+    Follows and unfollows made through FollowersTable update the cached set
+    (or drop it from Redis); other writes show up within `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float, maxsize: int, client=None, prefix: str = "follow-set:"):
+        self.ttl = ttl
+        self.client = client
+        self.prefix = prefix
+        self.local = TTLCache(ttl, maxsize)
+        self._lock = threading.Lock()
+        # Bumped by every write, so a load that raced one is not cached
+        self._writes = 0
+
+    def get(self, user_id: str) -> frozenset:
+        cached = self._get(user_id)
+        if cached is not None:
+            return cached
+
+        writes = self._writes
+        followed = frozenset(
+            sys.intern(child_id) for (child_id,) in Follower.select(Follower.child_id)
+            .where(Follower.user == user_id)
+            .tuples()
+        )
+        with self._lock:
+            if writes == self._writes:
+                self._set(user_id, followed)
+        return followed
+
+    def add(self, user_id: str, child_id: str):
+        self._update(user_id, lambda followed: followed | {sys.intern(child_id)})
+
+    def discard(self, user_id: str, child_id: str):
+        self._update(user_id, lambda followed: followed - {child_id})
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self.local.clear()
+
+    def _update(self, user_id: str, change):
+        with self._lock:
+            self._writes += 1
+            if self.client is not None:
+                # Reloaded on next use, rather than a read-modify-write across workers
+                try:
+                    self.client.delete(f"{self.prefix}{user_id}")
+                except Exception as e:
+                    log.warning(f"Failed to drop the follow set of {user_id}: {e}")
+                return
+            followed = self.local.get(user_id)
+            if followed is not None:
+                self.local.set(user_id, change(followed))
+
+    def _get(self, user_id: str):
+        if self.ttl <= 0:
+            return None
+        if self.client is None:
+            return self.local.get(user_id)
+        try:
+            raw = self.client.get(f"{self.prefix}{user_id}")
+        except Exception as e:
+            log.warning(f"Failed to read the follow set of {user_id}: {e}")
+            return None
+        return None if raw is None else frozenset(sys.intern(id) for id in json.loads(raw))
+
+    def _set(self, user_id: str, followed: frozenset):
+        if self.ttl <= 0:
+            return
+        if self.client is None:
+            self.local.set(user_id, followed)
+            return
+        try:
+            self.client.set(
+                f"{self.prefix}{user_id}", json.dumps(sorted(followed)), ex=max(int(self.ttl), 1)
+            )
+        except Exception as e:
+            log.warning(f"Failed to store the follow set of {user_id}: {e}")
+
+
+def create_follow_set_cache() -> FollowSetCache:
+    client = None
+    if FOLLOW_SET_CACHE_REDIS_URL:
+        import redis
+
+        client = redis.Redis.from_url(FOLLOW_SET_CACHE_REDIS_URL, decode_responses=True)
+    return FollowSetCache(FOLLOW_SET_CACHE_TTL, FOLLOW_SET_CACHE_MAXSIZE, client)
+
+
 class FollowersTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Follower], safe=True)
+        self.follow_sets = create_follow_set_cache()
 
     def follow_child(
         self,
@@ -35,22 +160,19 @@ class FollowersTable:
         """User follows a child"""
         from apps.webui.models.children import Children
         
+        user_id, child_id = normalize_id(user_id), normalize_id(child_id)
         try:
-            # Create the follow relationship
-            follower = Follower.create(
-                user=user_id,
-                child=child_id,
-                notifications_enabled=notifications_enabled
-            )
-            
-            # Increment the child's follower count
-            Children.increment_follower_count(child_id)
-            
-            return {
-                'success': True,
-                'follower': self._follower_to_dict(follower),
-                'message': 'Successfully followed child'
-            }
+            # The follow and the count change commit together. The count goes
+            # first, so a missing child is told apart from a duplicate follow
+            # where foreign keys are enforced.
+            with self.db.atomic():
+                if not Children.adjust_follower_count(child_id, 1):
+                    raise Child.DoesNotExist(f"Child {child_id} not found")
+                follower = Follower.create(
+                    user=user_id,
+                    child=child_id,
+                    notifications_enabled=notifications_enabled
+                )
         except IntegrityError:
             # User already follows this child
             return {
@@ -58,20 +180,17 @@ class FollowersTable:
                 'message': 'User already follows this child'
             }
 
+        invalidate("child")
+        self.follow_sets.add(user_id, child_id)
+        return {
+            'success': True,
+            'follower': self._follower_to_dict(follower),
+            'message': 'Successfully followed child'
+        }
+
     def unfollow_child(self, user_id: str, child_id: str) -> dict:
         """User unfollows a child"""
-        from apps.webui.models.children import Children
-        
-        follower = Follower.get_or_none(
-            (Follower.user == user_id) & (Follower.child == child_id)
-        )
-        
-        if follower:
-            follower.delete_instance()
-            
-            # Decrement the child's follower count using the proper method
-            Children.decrement_follower_count(child_id)
-            
+        if self.delete_follower(user_id, child_id):
             return {
                 'success': True,
                 'message': 'Successfully unfollowed child'
@@ -83,23 +202,21 @@ class FollowersTable:
         }
 
     def is_following(self, user_id: str, child_id: str) -> bool:
-        uid = str(user_id or "").strip()
-        cid = str(child_id or "").strip()
-        if not uid or not cid:
-            return False
+        return self.follow_status_for(user_id, [child_id]).get(child_id, False)
 
-        # Normalize both sides in SQL: trim + remove CR/LF + NBSP (0xC2A0) + zero-width space (200B)
-        norm_user = fn.replace(fn.replace(fn.replace(fn.replace(fn.trim(Follower.user_id), '\r', ''), '\n', ''), '\u00A0', ''), '\u200B', '')
-        norm_child = fn.replace(fn.replace(fn.replace(fn.replace(fn.trim(Follower.child_id), '\r', ''), '\n', ''), '\u00A0', ''), '\u200B', '')
+    def follow_status_for(self, user_id: str, child_ids: list) -> dict:
+        """
+        Whether the user follows each of `child_ids`, keyed by the ids as
+        given. Answered from the user's cached follow set; a miss loads it
+        with one lookup on the (user, child) index.
+        """
+        uid = normalize_id(user_id)
+        normalized = {child_id: normalize_id(child_id) for child_id in child_ids}
+        if not uid or not any(normalized.values()):
+            return {child_id: False for child_id in child_ids}
 
-        q = (Follower
-            .select(Follower.id)
-            .where(
-                (fn.lower(norm_user) == uid.lower()) &
-                (fn.lower(norm_child) == cid.lower())
-            )
-            .limit(1))
-        return q.exists()
+        followed = self.follow_sets.get(uid)
+        return {child_id: cid in followed for child_id, cid in normalized.items()}
 
     def get_user_following(self, user_id: str, limit: int = None) -> list:
         """Get all children that a user is following"""
@@ -135,6 +252,7 @@ class FollowersTable:
 
     def update_notifications(self, user_id: str, child_id: str, enabled: bool) -> bool:
         """Update notification preferences for a follow relationship"""
+        user_id, child_id = normalize_id(user_id), normalize_id(child_id)
         follower = Follower.get_or_none(
             (Follower.user == user_id) & (Follower.child == child_id)
         )
@@ -263,7 +381,7 @@ class FollowersTable:
         from apps.webui.models.children import Children
         
         # Use the sync method from Children model
-        Children.sync_all_follower_counts()
+        return Children.sync_all_follower_counts()
 
     def _follower_to_dict(self, follower) -> dict:
         if not follower:
@@ -329,50 +447,40 @@ class FollowersTable:
 
     def create_follower(self, user_id: str, child_id: str, notifications_enabled: bool = True) -> bool:
         """Create a new follower relationship"""
-        try:
-            Follower.create(
-                user=user_id,
-                child=child_id,
-                notifications_enabled=notifications_enabled
-            )
-            # Update child's follower count
-            child = Child.get(Child.id == child_id)
-            child.follower_count += 1
-            child.save()
-            return True
-        except IntegrityError:
-            return False
+        return self.follow_child(user_id, child_id, notifications_enabled)['success']
 
     def delete_follower(self, user_id: str, child_id: str) -> bool:
         """Delete a follower relationship"""
-        follower = Follower.get_or_none(
-            (Follower.user == user_id) & (Follower.child == child_id)
-        )
-        if follower:
-            follower.delete_instance()
-            # Update child's follower count
-            child = Child.get(Child.id == child_id)
-            child.follower_count = max(0, child.follower_count - 1)
-            child.save()
-            return True
-        return False
+        from apps.webui.models.children import Children
 
-    def get_top_k_children_by_followers(self, k: int) -> list:
+        user_id, child_id = normalize_id(user_id), normalize_id(child_id)
+        # Only the request that deleted the row changes the count
+        with self.db.atomic():
+            deleted = Follower.delete().where(
+                (Follower.user == user_id) & (Follower.child == child_id)
+            ).execute()
+            if deleted:
+                Children.adjust_follower_count(child_id, -deleted)
+        if not deleted:
+            return False
+
+        invalidate("child")
+        self.follow_sets.discard(user_id, child_id)
+        return True
+
+    def get_top_k_children_by_followers(self, k: int, seed: int = None) -> list:
         """Get top K children by follower count with random tie-breaking"""
-        import random
-        
-        # Get all children with their follower counts
-        children = list(Child.select().order_by(Child.follower_count.desc(), fn.Random()))
-        
-        # Take top K
-        top_children = children[:k]
-        
+        from apps.webui.models.children import Children
+
         return [
             {
-                'child_id': str(child.id),
-                'follower_count': child.follower_count
+                'child_id': str(child_id),
+                'follower_count': follower_count
             }
-            for child in top_children
+            for child_id, follower_count in Children.top_children_query(
+                k, Child.id, Child.follower_count, seed=seed
+            ).tuples()
         ]
 
-Followers = FollowersTable(DB)
\ No newline at end of file
+Followers = FollowersTable(DB)
+AsyncFollowers = AsyncTable(Followers)
\ No newline at end of file
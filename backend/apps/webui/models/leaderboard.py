@@ -3,6 +3,8 @@ from playhouse.shortcuts import model_to_dict
 from datetime import datetime, timedelta, date
 import uuid
 from apps.webui.internal.db import DB
+from apps.webui.internal.outbox import OutboxEvent
+from apps.webui.internal.seeding import bulk_insert
 from apps.webui.models.users import User
 from apps.webui.models.regions import Region
 from apps.webui.models.donations import Donation
@@ -27,209 +29,288 @@ class LeaderboardEntry(Model):
         database = DB
         indexes = (
             (('leaderboard_type', 'period', 'period_date', 'entity_id'), True),  # Unique compound index
+            (('leaderboard_type', 'period', 'period_date', 'total_amount'), False),  # Ranking order
         )
 
 
+LEADERBOARD_TYPES = ('user', 'region', 'school')
+PERIODS = ('daily', 'weekly', 'monthly', 'yearly', 'all_time')
+
+
+def get_period_date(period: str, day: date = None) -> date:
+    """Start of the `period` bucket that `day` (default today) falls in"""
+    day = day or date.today()
+    if period == 'all_time':
+        return date(2000, 1, 1)
+    elif period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    elif period == 'monthly':
+        return day.replace(day=1)
+    elif period == 'yearly':
+        return day.replace(month=1, day=1)
+    # 'daily', and the fallback for unknown periods
+    return day
+
+
+def get_period_dates(day: date = None) -> list:
+    """(period, period_date) of every bucket that `day` falls in"""
+    return [(period, get_period_date(period, day)) for period in PERIODS]
+
+
+def get_previous_period_date(period: str, period_date: date) -> date:
+    if period == 'daily':
+        return period_date - timedelta(days=1)
+    elif period == 'weekly':
+        return period_date - timedelta(days=7)
+    elif period == 'monthly':
+        return (period_date - timedelta(days=1)).replace(day=1)
+    elif period == 'yearly':
+        return period_date.replace(year=period_date.year - 1)
+    return None
+
+
 class LeaderboardTable:
+    """
+    Leaderboard buckets are kept up to date incrementally: every completed
+    donation adds its amount to the user, region and school entries of each
+    period it falls in (`record_donation`). Ranks are resolved at read time
+    from the (type, period, period_date, total_amount) index, so a donation
+    never has to renumber a whole leaderboard. `rebuild_leaderboards`
+    recomputes the current buckets from scratch and reconciles any drift.
+
+    `record_donation` runs from the outbox, after the donation committed. A
+    rebuild leaves out the donations whose event is still pending, and holds
+    off the outbox handler while it replaces a bucket, so every donation is
+    counted by exactly one of the two.
+    """
+
     def __init__(self, db):
         self.db = db
-        db.create_tables([LeaderboardEntry], safe=True)
+
+    ####################
+    # Incremental updates
+    ####################
+
+    def record_donation(self, donation: Donation) -> int:
+        """
+        Add a completed donation to every leaderboard bucket it falls in, with
+        a single upsert. Returns the number of entries touched.
+        """
+        from apps.webui.models.children import Child
+
+        if donation.status != 'completed':
+            return 0
+
+        entities = []
+        if donation.user_id:
+            user = User.select(User.name, User.profile_image_url).where(
+                User.id == donation.user_id
+            ).first()
+            if user:
+                entities.append(('user', donation.user_id, user.name, 'individual', user.profile_image_url))
+        if donation.region_id:
+            region = Region.select(Region.name).where(Region.id == donation.region_id).first()
+            if region:
+                entities.append(('region', donation.region_id, region.name, 'region', None))
+        if donation.child_id:
+            child = Child.select(Child.school).where(Child.id == donation.child_id).first()
+            if child and child.school:
+                entities.append(('school', child.school, child.school, 'school', None))
+        if not entities:
+            return 0
+
+        created_at = donation.created_at or datetime.now()
+        now = datetime.now()
+        rows = [
+            {
+                'leaderboard_type': leaderboard_type,
+                'period': period,
+                'period_date': period_date,
+                'entity_id': str(entity_id),
+                'entity_name': entity_name,
+                'entity_type': entity_type,
+                'total_amount': donation.amount,
+                'donation_count': 1,
+                'rank': 0,
+                'avatar_url': avatar_url,
+                'updated_at': now,
+            }
+            for leaderboard_type, entity_id, entity_name, entity_type, avatar_url in entities
+            for period, period_date in get_period_dates(created_at.date())
+        ]
+
+        LeaderboardEntry.insert_many(rows).on_conflict(
+            conflict_target=(LeaderboardEntry.leaderboard_type, LeaderboardEntry.period,
+                             LeaderboardEntry.period_date, LeaderboardEntry.entity_id),
+            update={
+                LeaderboardEntry.total_amount: LeaderboardEntry.total_amount + EXCLUDED.total_amount,
+                LeaderboardEntry.donation_count: LeaderboardEntry.donation_count + EXCLUDED.donation_count,
+                LeaderboardEntry.entity_name: EXCLUDED.entity_name,
+                LeaderboardEntry.avatar_url: EXCLUDED.avatar_url,
+                LeaderboardEntry.updated_at: EXCLUDED.updated_at,
+            }
+        ).execute()
+        return len(rows)
+
+    ####################
+    # Full rebuild
+    ####################
 
     def update_leaderboards(self):
         """Update all leaderboards with current data"""
-        from datetime import date
-        
-        today = date.today()
-        periods = [
-            ('daily', today),
-            ('weekly', today - timedelta(days=today.weekday())),
-            ('monthly', today.replace(day=1)),
-            ('yearly', today.replace(month=1, day=1)),
-            ('all_time', date(2000, 1, 1))
+        return self.rebuild_leaderboards()
+
+    def rebuild_leaderboards(self, day: date = None) -> int:
+        """
+        Recompute the current bucket of every leaderboard type and period from
+        the donations table. Each bucket is replaced in its own transaction, so
+        readers see either the old or the new entries. Returns the number of
+        entries written.
+        """
+        count = 0
+        for period, period_date in get_period_dates(day):
+            for leaderboard_type in LEADERBOARD_TYPES:
+                count += self._rebuild_bucket(leaderboard_type, period, period_date)
+        return count
+
+    def _bucket_transaction(self):
+        """
+        A transaction that holds off `record_donation` until it commits: SQLite
+        takes the write lock up front, Postgres locks the leaderboard table.
+        """
+        if isinstance(self.db, SqliteDatabase):
+            return self.db.atomic('IMMEDIATE')
+        return self.db.atomic()
+
+    def _pending_donation_ids(self) -> list:
+        """Donations whose 'donation.completed' event has not been handled yet"""
+        return [
+            payload['donation_id']
+            for (payload,) in OutboxEvent.select(OutboxEvent.payload)
+            .where(OutboxEvent.topic == 'donation.completed')
+            .tuples()
         ]
-        
-        for period, period_date in periods:
-            self._update_user_leaderboard(period, period_date)
-            self._update_region_leaderboard(period, period_date)
-            self._update_school_leaderboard(period, period_date)
 
-    def _update_user_leaderboard(self, period: str, period_date: date):
-        """Update user/individual donor leaderboard"""
-        
-        # Get donation data for the period
-        query = Donation.select(
-            Donation.user,
-            fn.SUM(Donation.amount).alias('total_amount'),
-            fn.COUNT(Donation.id).alias('donation_count')
-        ).where(Donation.status == 'completed')
-        
-        if period != 'all_time':
-            query = query.where(Donation.created_at >= datetime.combine(period_date, datetime.min.time()))
-        
-        query = query.group_by(Donation.user).order_by(fn.SUM(Donation.amount).desc())
-        
-        # Get previous rankings for rank change calculation
-        previous_rankings = {}
-        if period != 'all_time':
-            previous_entries = LeaderboardEntry.select().where(
-                (LeaderboardEntry.leaderboard_type == 'user') &
-                (LeaderboardEntry.period == period) &
-                (LeaderboardEntry.period_date < period_date)
-            ).order_by(LeaderboardEntry.period_date.desc())
-            
-            for entry in previous_entries:
-                if entry.entity_id not in previous_rankings:
-                    previous_rankings[entry.entity_id] = entry.rank
-        
-        # Update leaderboard entries
-        rank = 0
-        for row in query:
-            rank += 1
-            user_data = model_to_dict(row.user)
-            
-            # Calculate rank change
-            previous_rank = previous_rankings.get(str(row.user.id), 0)
-            rank_change = previous_rank - rank if previous_rank > 0 else 0
-            
-            LeaderboardEntry.insert(
-                leaderboard_type='user',
-                period=period,
-                period_date=period_date,
-                entity_id=str(row.user.id),
-                entity_name=user_data['name'],
-                entity_type='individual',
-                total_amount=row.total_amount,
-                donation_count=row.donation_count,
-                rank=rank,
-                rank_change=rank_change,
-                avatar_url=user_data.get('profile_image_url'),
-                updated_at=datetime.now()
-            ).on_conflict(
-                conflict_target=(LeaderboardEntry.leaderboard_type, LeaderboardEntry.period, 
-                               LeaderboardEntry.period_date, LeaderboardEntry.entity_id),
-                preserve=[LeaderboardEntry.total_amount, LeaderboardEntry.donation_count, 
-                         LeaderboardEntry.rank, LeaderboardEntry.rank_change, 
-                         LeaderboardEntry.updated_at]
-            ).execute()
+    def _aggregate(
+        self, leaderboard_type: str, period: str, period_date: date, exclude: list = None
+    ):
+        """
+        (entity_id, entity_name, avatar_url, total_amount, donation_count) of
+        the donations in a bucket, one GROUP BY query per bucket, leaving out
+        the donations in `exclude`.
+        """
+        from apps.webui.models.children import Child
 
-    def _update_region_leaderboard(self, period: str, period_date: date):
-        """Update region leaderboard"""
-        
-        # Get donation data by region for the period
-        query = Donation.select(
-            Donation.region,
-            fn.SUM(Donation.amount).alias('total_amount'),
-            fn.COUNT(Donation.id).alias('donation_count')
-        ).where((Donation.status == 'completed') & (Donation.region.is_null(False)))
-        
-        if period != 'all_time':
-            query = query.where(Donation.created_at >= datetime.combine(period_date, datetime.min.time()))
-        
-        query = query.group_by(Donation.region).order_by(fn.SUM(Donation.amount).desc())
-        
-        # Get previous rankings
-        previous_rankings = {}
+        total_amount = fn.SUM(Donation.amount)
+        donation_count = fn.COUNT(Donation.id)
+        where = Donation.status == 'completed'
+        if exclude:
+            where &= Donation.id.not_in(exclude)
         if period != 'all_time':
-            previous_entries = LeaderboardEntry.select().where(
-                (LeaderboardEntry.leaderboard_type == 'region') &
-                (LeaderboardEntry.period == period) &
-                (LeaderboardEntry.period_date < period_date)
-            ).order_by(LeaderboardEntry.period_date.desc())
-            
-            for entry in previous_entries:
-                if entry.entity_id not in previous_rankings:
-                    previous_rankings[entry.entity_id] = entry.rank
-        
-        # Update leaderboard entries
-        rank = 0
-        for row in query:
-            rank += 1
-            
-            # Calculate rank change
-            previous_rank = previous_rankings.get(str(row.region.id), 0)
-            rank_change = previous_rank - rank if previous_rank > 0 else 0
-            
-            LeaderboardEntry.insert(
-                leaderboard_type='region',
-                period=period,
-                period_date=period_date,
-                entity_id=str(row.region.id),
-                entity_name=row.region.name,
-                entity_type='region',
-                total_amount=row.total_amount,
-                donation_count=row.donation_count,
-                rank=rank,
-                rank_change=rank_change,
-                updated_at=datetime.now()
-            ).on_conflict(
-                conflict_target=(LeaderboardEntry.leaderboard_type, LeaderboardEntry.period, 
-                               LeaderboardEntry.period_date, LeaderboardEntry.entity_id),
-                preserve=[LeaderboardEntry.total_amount, LeaderboardEntry.donation_count, 
-                         LeaderboardEntry.rank, LeaderboardEntry.rank_change, 
-                         LeaderboardEntry.updated_at]
+            where &= Donation.created_at >= datetime.combine(period_date, datetime.min.time())
+
+        if leaderboard_type == 'user':
+            query = Donation.select(
+                User.id, User.name, User.profile_image_url, total_amount, donation_count
+            ).join(User, on=(Donation.user == User.id)).group_by(
+                User.id, User.name, User.profile_image_url
+            )
+        elif leaderboard_type == 'region':
+            query = Donation.select(
+                Region.id, Region.name, Value(None), total_amount, donation_count
+            ).join(Region, on=(Donation.region == Region.id)).group_by(Region.id, Region.name)
+        else:
+            query = Donation.select(
+                Child.school, Child.school, Value(None), total_amount, donation_count
+            ).join(Child, on=(Donation.child == Child.id)).group_by(Child.school)
+            where &= Child.school.is_null(False)
+
+        return query.where(where).tuples()
+
+    def _rebuild_bucket(self, leaderboard_type: str, period: str, period_date: date) -> int:
+        previous_ranks = self._get_previous_ranks(leaderboard_type, period, period_date)
+        entity_type = {'user': 'individual'}.get(leaderboard_type, leaderboard_type)
+
+        with self._bucket_transaction():
+            if not isinstance(self.db, SqliteDatabase):
+                self.db.execute_sql("LOCK TABLE leaderboardentry IN EXCLUSIVE MODE")
+
+            rows = sorted(
+                self._aggregate(
+                    leaderboard_type, period, period_date, self._pending_donation_ids()
+                ),
+                key=lambda row: (-row[3], str(row[0])),
+            )
+
+            now = datetime.now()
+            entries = []
+            for rank, (entity_id, entity_name, avatar_url, total_amount, donation_count) in enumerate(rows, 1):
+                # Calculate rank change
+                previous_rank = previous_ranks.get(str(entity_id), 0)
+                entries.append({
+                    'leaderboard_type': leaderboard_type,
+                    'period': period,
+                    'period_date': period_date,
+                    'entity_id': str(entity_id),
+                    'entity_name': entity_name,
+                    'entity_type': entity_type,
+                    'total_amount': total_amount,
+                    'donation_count': donation_count,
+                    'rank': rank,
+                    'rank_change': previous_rank - rank if previous_rank > 0 else 0,
+                    'avatar_url': avatar_url,
+                    'updated_at': now,
+                })
+
+            LeaderboardEntry.delete().where(
+                self._bucket(leaderboard_type, period, period_date)
             ).execute()
+            bulk_insert(LeaderboardEntry, entries)
+        return len(entries)
 
-    def _update_school_leaderboard(self, period: str, period_date: date):
-        """Update school leaderboard based on children's schools"""
-        from apps.webui.models.children import Child
-        
-        # Get donation data by school for the period
-        query = Donation.select(
-            Child.school,
-            fn.SUM(Donation.amount).alias('total_amount'),
-            fn.COUNT(Donation.id).alias('donation_count')
-        ).join(Child, on=(Donation.child == Child.id)).where(
-            (Donation.status == 'completed') & 
-            (Child.school.is_null(False))
+    ####################
+    # Reads
+    ####################
+
+    def _bucket(self, leaderboard_type: str, period: str, period_date: date):
+        return (
+            (LeaderboardEntry.leaderboard_type == leaderboard_type) &
+            (LeaderboardEntry.period == period) &
+            (LeaderboardEntry.period_date == period_date)
         )
-        
-        if period != 'all_time':
-            query = query.where(Donation.created_at >= datetime.combine(period_date, datetime.min.time()))
-        
-        query = query.group_by(Child.school).order_by(fn.SUM(Donation.amount).desc())
-        
-        # Get previous rankings
-        previous_rankings = {}
-        if period != 'all_time':
-            previous_entries = LeaderboardEntry.select().where(
-                (LeaderboardEntry.leaderboard_type == 'school') &
-                (LeaderboardEntry.period == period) &
-                (LeaderboardEntry.period_date < period_date)
-            ).order_by(LeaderboardEntry.period_date.desc())
-            
-            for entry in previous_entries:
-                if entry.entity_id not in previous_rankings:
-                    previous_rankings[entry.entity_id] = entry.rank
-        
-        # Update leaderboard entries
-        rank = 0
-        for row in query:
-            rank += 1
-            school_name = row.school
-            
-            # Calculate rank change
-            previous_rank = previous_rankings.get(school_name, 0)
-            rank_change = previous_rank - rank if previous_rank > 0 else 0
-            
-            LeaderboardEntry.insert(
-                leaderboard_type='school',
-                period=period,
-                period_date=period_date,
-                entity_id=school_name,
-                entity_name=school_name,
-                entity_type='school',
-                total_amount=row.total_amount,
-                donation_count=row.donation_count,
-                rank=rank,
-                rank_change=rank_change,
-                updated_at=datetime.now()
-            ).on_conflict(
-                conflict_target=(LeaderboardEntry.leaderboard_type, LeaderboardEntry.period, 
-                               LeaderboardEntry.period_date, LeaderboardEntry.entity_id),
-                preserve=[LeaderboardEntry.total_amount, LeaderboardEntry.donation_count, 
-                         LeaderboardEntry.rank, LeaderboardEntry.rank_change, 
-                         LeaderboardEntry.updated_at]
-            ).execute()
+
+    def _get_rank(self, entry: LeaderboardEntry) -> int:
+        """Rank of an entry within its bucket; ties are ordered by entity id"""
+        return LeaderboardEntry.select().where(
+            self._bucket(entry.leaderboard_type, entry.period, entry.period_date) &
+            (
+                (LeaderboardEntry.total_amount > entry.total_amount) |
+                (
+                    (LeaderboardEntry.total_amount == entry.total_amount) &
+                    (LeaderboardEntry.entity_id < entry.entity_id)
+                )
+            )
+        ).count() + 1
+
+    def _get_previous_ranks(
+        self, leaderboard_type: str, period: str, period_date: date, entity_ids: list = None
+    ) -> dict:
+        """Ranks in the previous bucket of the same period, by entity id"""
+        previous_date = get_previous_period_date(period, period_date)
+        if previous_date is None or entity_ids == []:
+            return {}
+
+        ranked = LeaderboardEntry.select(
+            LeaderboardEntry.entity_id,
+            fn.ROW_NUMBER().over(
+                order_by=[LeaderboardEntry.total_amount.desc(), LeaderboardEntry.entity_id]
+            ).alias('rank')
+        ).where(self._bucket(leaderboard_type, period, previous_date)).alias('ranked')
+
+        query = LeaderboardEntry.select(ranked.c.entity_id, ranked.c.rank).from_(ranked)
+        if entity_ids is not None:
+            query = query.where(ranked.c.entity_id.in_(entity_ids))
+        return {entity_id: rank for entity_id, rank in query.tuples()}
 
     def get_leaderboard(
         self,
@@ -241,69 +322,52 @@ class LeaderboardTable:
         """Get leaderboard entries for a specific type and period"""
         
         # Get the most recent period date for this period type
-        if period == 'all_time':
-            period_date = date(2000, 1, 1)
-        elif period == 'daily':
-            period_date = date.today()
-        elif period == 'weekly':
-            today = date.today()
-            period_date = today - timedelta(days=today.weekday())
-        elif period == 'monthly':
-            period_date = date.today().replace(day=1)
-        elif period == 'yearly':
-            period_date = date.today().replace(month=1, day=1)
-        else:
-            period_date = date.today()
+        period_date = get_period_date(period)
+        bucket = self._bucket(leaderboard_type, period, period_date)
         
-        # Get leaderboard entries
-        entries = LeaderboardEntry.select().where(
-            (LeaderboardEntry.leaderboard_type == leaderboard_type) &
-            (LeaderboardEntry.period == period) &
-            (LeaderboardEntry.period_date == period_date)
-        ).order_by(LeaderboardEntry.rank).limit(limit).offset(offset)
+        # Get leaderboard entries, highest first
+        entries = list(
+            LeaderboardEntry.select().where(bucket)
+            .order_by(LeaderboardEntry.total_amount.desc(), LeaderboardEntry.entity_id)
+            .limit(limit).offset(offset)
+        )
         
         # Get total count
-        total_count = LeaderboardEntry.select().where(
-            (LeaderboardEntry.leaderboard_type == leaderboard_type) &
-            (LeaderboardEntry.period == period) &
-            (LeaderboardEntry.period_date == period_date)
-        ).count()
+        total_count = LeaderboardEntry.select().where(bucket).count()
+
+        previous_ranks = self._get_previous_ranks(
+            leaderboard_type, period, period_date, [entry.entity_id for entry in entries]
+        )
         
         return {
             'leaderboard_type': leaderboard_type,
             'period': period,
             'period_date': period_date.isoformat(),
             'total_entries': total_count,
-            'entries': [self._entry_to_dict(entry) for entry in entries]
+            'entries': [
+                self._entry_to_dict(entry, rank, previous_ranks.get(entry.entity_id))
+                for rank, entry in enumerate(entries, offset + 1)
+            ]
         }
 
-    def get_user_ranking(self, user_id: str, period: str = 'all_time') -> dict:
-        """Get a specific user's ranking across different leaderboards"""
-        
-        # Get the appropriate period date
-        if period == 'all_time':
-            period_date = date(2000, 1, 1)
-        elif period == 'daily':
-            period_date = date.today()
-        elif period == 'weekly':
-            today = date.today()
-            period_date = today - timedelta(days=today.weekday())
-        elif period == 'monthly':
-            period_date = date.today().replace(day=1)
-        elif period == 'yearly':
-            period_date = date.today().replace(month=1, day=1)
-        else:
-            period_date = date.today()
-        
+    def _get_ranking(self, leaderboard_type: str, entity_id: str, period: str):
+        period_date = get_period_date(period)
         entry = LeaderboardEntry.get_or_none(
-            (LeaderboardEntry.leaderboard_type == 'user') &
-            (LeaderboardEntry.period == period) &
-            (LeaderboardEntry.period_date == period_date) &
-            (LeaderboardEntry.entity_id == user_id)
+            self._bucket(leaderboard_type, period, period_date) &
+            (LeaderboardEntry.entity_id == entity_id)
         )
+        if not entry:
+            return None
+
+        previous_ranks = self._get_previous_ranks(leaderboard_type, period, period_date, [entity_id])
+        return self._entry_to_dict(entry, self._get_rank(entry), previous_ranks.get(entity_id))
+
+    def get_user_ranking(self, user_id: str, period: str = 'all_time') -> dict:
+        """Get a specific user's ranking across different leaderboards"""
         
+        entry = self._get_ranking('user', user_id, period)
         if entry:
-            return self._entry_to_dict(entry)
+            return entry
         
         return {
             'user_id': user_id,
@@ -316,30 +380,9 @@ class LeaderboardTable:
     def get_region_ranking(self, region_id: str, period: str = 'all_time') -> dict:
         """Get a specific region's ranking"""
         
-        # Get the appropriate period date
-        if period == 'all_time':
-            period_date = date(2000, 1, 1)
-        elif period == 'daily':
-            period_date = date.today()
-        elif period == 'weekly':
-            today = date.today()
-            period_date = today - timedelta(days=today.weekday())
-        elif period == 'monthly':
-            period_date = date.today().replace(day=1)
-        elif period == 'yearly':
-            period_date = date.today().replace(month=1, day=1)
-        else:
-            period_date = date.today()
-        
-        entry = LeaderboardEntry.get_or_none(
-            (LeaderboardEntry.leaderboard_type == 'region') &
-            (LeaderboardEntry.period == period) &
-            (LeaderboardEntry.period_date == period_date) &
-            (LeaderboardEntry.entity_id == region_id)
-        )
-        
+        entry = self._get_ranking('region', region_id, period)
         if entry:
-            return self._entry_to_dict(entry)
+            return entry
         
         return {
             'region_id': region_id,
@@ -349,13 +392,20 @@ class LeaderboardTable:
             'message': 'Region not ranked in this period'
         }
 
-    def _entry_to_dict(self, entry) -> dict:
+    def _entry_to_dict(self, entry, rank: int = None, previous_rank: int = None) -> dict:
         if not entry:
             return None
+
+        # Ranks resolved at read time take precedence over the ones stored by
+        # the last rebuild
+        if rank is None:
+            rank, rank_change = entry.rank, entry.rank_change
+        else:
+            rank_change = previous_rank - rank if previous_rank else 0
         
         return {
-            'rank': entry.rank,
-            'rank_change': entry.rank_change,
+            'rank': rank,
+            'rank_change': rank_change,
             'entity_id': entry.entity_id,
             'entity_name': entry.entity_name,
             'entity_type': entry.entity_type,
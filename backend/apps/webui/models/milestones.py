@@ -28,7 +28,8 @@ class Milestone(Model):
 class MilestonesTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Milestone], safe=True)
+
+    def seed_default_milestones(self):
         if Milestone.select().count() == 0:
             self._create_default_milestones()
 
@@ -2,6 +2,9 @@ from peewee import *
 from datetime import datetime, timedelta
 import uuid
 from apps.webui.internal.db import DB
+from apps.webui.internal.executor import AsyncTable
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import insert_missing
 from apps.webui.models.children import Child
 from apps.webui.models.users import User
 
@@ -53,7 +56,6 @@ class PostComment(Model):
 class PostsTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Post, PostLike, PostComment], safe=True)
 
     # CREATE
     def create_post(self, child_id: str, title: str, comments: str, author_id: str = None, caption: str = None, post_type: str = 'update', media_urls: list = None, video_link: str = None, is_featured: bool = False) -> dict:
@@ -69,6 +71,7 @@ class PostsTable:
             video_link=video_link,
             is_featured=is_featured
         )
+        invalidate("post")
         return self._post_to_dict(post)
 
     # READ
@@ -117,6 +120,7 @@ class PostsTable:
                 setattr(post, key, value)
         post.updated_at = datetime.now()
         post.save()
+        invalidate("post")
         return self._post_to_dict(post)
 
     # DELETE
@@ -135,6 +139,7 @@ class PostsTable:
             
             # Delete the post itself
             post.delete_instance()
+            invalidate("post")
             
             return True
         except Exception:
@@ -147,6 +152,7 @@ class PostsTable:
             post = Post.get(Post.id == post_id)
             post.likes += 1
             post.save()
+            invalidate("post")
             return True
         except IntegrityError:
             return False
@@ -158,6 +164,7 @@ class PostsTable:
             post = Post.get(Post.id == post_id)
             post.likes = max(0, post.likes - 1)
             post.save()
+            invalidate("post")
             return True
         return False
 
@@ -177,6 +184,7 @@ class PostsTable:
         post = Post.get(Post.id == post_id)
         post.comments_count += 1
         post.save()
+        invalidate("post")
         return self._comment_to_dict(comment)
 
     def get_post_comments(self, post_id: str, approved_only: bool = True) -> list:
@@ -195,6 +203,7 @@ class PostsTable:
             post.comments_count = max(0, post.comments_count - 1)
             post.save()
             comment.delete_instance()
+            invalidate("post")
             return True
         return False
 
@@ -257,12 +266,12 @@ class PostsTable:
             'updated_at': comment.updated_at.isoformat() if comment.updated_at else None
         }
 
-    def seed_default_posts(self):
-        """Seed default posts data for demo purposes"""
+    def get_default_posts(self) -> list:
+        """Demo posts, also used as templates by the dataset generator"""
         import json
         from datetime import datetime, timedelta
         
-        default_posts = [
+        return [
             {
                 'id': 'post-001',
                 'child_id': 'child-001',
@@ -361,13 +370,16 @@ class PostsTable:
                 'created_at': datetime.now() - timedelta(days=8)
             },
         ]
-        
-        for post_data in default_posts:
-            existing = Post.get_or_none(Post.id == post_data['id'])
-            if not existing:
-                # Extract child_id separately as it's a foreign key
-                child_id = post_data.pop('child_id')
-                Post.create(child=child_id, **post_data)
+
+    def seed_default_posts(self):
+        """Seed default posts data for demo purposes"""
+        rows = []
+        for post_data in self.get_default_posts():
+            # Extract child_id separately as it's a foreign key
+            child_id = post_data.pop('child_id')
+            rows.append({'child': child_id, **post_data})
+        insert_missing(Post, rows)
+        invalidate("post")
 
 Posts = PostsTable(DB)
-Posts.seed_default_posts()
\ No newline at end of file
+AsyncPosts = AsyncTable(Posts)
\ No newline at end of file
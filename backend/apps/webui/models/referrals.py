@@ -1,10 +1,19 @@
 from peewee import *
 from playhouse.shortcuts import model_to_dict
 from datetime import datetime, timedelta, date
+import logging
+import threading
 import uuid
-from apps.webui.internal.db import DB
+from typing import Optional
+from apps.webui.internal.db import DB, connection_scope
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import bulk_insert, insert_missing
 from apps.webui.models.users import User
 from apps.webui.models.donations import Donation
+from config import SRC_LOG_LEVELS, REFERRAL_CLICK_FLUSH_INTERVAL, REFERRAL_CLICK_MAX_PENDING
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 
 class ReferralTracking(Model):
@@ -28,6 +37,8 @@ class ReferralTracking(Model):
         database = DB
         indexes = (
             (('referrer', 'referred_user'), True),  # Unique compound index
+            # A referrer's most recent referrals
+            (('referrer', 'created_at'), False),
         )
 
 
@@ -49,60 +60,182 @@ class ReferralReward(Model):
         database = DB
 
 
+class ReferralClickBuffer:
+    """
+    Counts referral link clicks in memory and adds them to the referral's
+    open tracking row (one without a referred user yet) with one batched
+    UPDATE every `interval` seconds, instead of a read-modify-write per click.
+    A flush also happens as soon as `max_pending` clicks are buffered, which
+    bounds what a crashed worker can lose. An `interval` of 0 writes every
+    click immediately.
+
+    Every worker has its own buffer, so with several workers the clicks on a
+    code reach the database in no particular order relative to its
+    registrations.
+    """
+
+    def __init__(self, interval: int, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        # (referrer id, referral code) -> [clicks, first source, first click time]
+        self._pending = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, referrer_id: str, referral_code: str, source: str = None, clicks: int = 1,
+            clicked_at: datetime = None):
+        with self._lock:
+            entry = self._pending.setdefault(
+                (referrer_id, referral_code), [0, source, clicked_at or datetime.now()]
+            )
+            entry[0] += clicks
+            self._count += clicks
+            full = self._count >= self.max_pending
+            if self._thread is None and self.interval > 0:
+                self._thread = threading.Thread(
+                    target=self._run, name="referral-click-flush", daemon=True
+                )
+                self._thread.start()
+
+        if self.interval <= 0 or full:
+            self.flush()
+
+    def flush(self, referral_code: str = None) -> int:
+        """
+        Write the pending clicks, or only those of `referral_code`. Returns the
+        number of clicks written.
+        """
+        with self._lock:
+            if referral_code is None:
+                pending, self._pending, self._count = self._pending, {}, 0
+            else:
+                pending = {
+                    key: self._pending.pop(key)
+                    for key in list(self._pending)
+                    if key[1] == referral_code
+                }
+                self._count -= sum(clicks for clicks, _, _ in pending.values())
+        if not pending:
+            return 0
+
+        try:
+            with connection_scope(), DB.atomic():
+                created = 0
+                for batch in chunked(list(pending.items()), 500):
+                    created += self._write(batch)
+            if created:
+                invalidate("referral")
+        except Exception as e:
+            log.warning(f"Failed to flush referral clicks: {e}")
+            # Keep them for the next flush
+            with self._lock:
+                for key, (clicks, source, clicked_at) in pending.items():
+                    entry = self._pending.setdefault(key, [0, source, clicked_at])
+                    entry[0] += clicks
+                    self._count += clicks
+            return 0
+
+        return sum(clicks for clicks, _, _ in pending.values())
+
+    def _write(self, batch: list) -> int:
+        """Add a batch of clicks to the open tracking rows. Returns the rows created."""
+        codes = [code for (_, code), _ in batch]
+        # One open row per code takes the clicks, as `get_or_none` used to pick
+        open_rows = dict(
+            ReferralTracking.select(ReferralTracking.referral_code, fn.MIN(ReferralTracking.id))
+            .where(
+                ReferralTracking.referral_code.in_(codes)
+                & ReferralTracking.referred_user.is_null()
+            )
+            .group_by(ReferralTracking.referral_code)
+            .tuples()
+        )
+
+        updates = [
+            (open_rows[code], clicks) for (_, code), (clicks, _, _) in batch if code in open_rows
+        ]
+        if updates:
+            ReferralTracking.update(
+                click_count=ReferralTracking.click_count + Case(ReferralTracking.id, updates, 0),
+                updated_at=datetime.now(),
+            ).where(ReferralTracking.id.in_([id for id, _ in updates])).execute()
+
+        new_rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'referrer': referrer_id,
+                'referral_code': code,
+                'referral_source': source,
+                'click_count': clicks,
+                'first_clicked_at': clicked_at,
+            }
+            for (referrer_id, code), (clicks, source, clicked_at) in batch
+            if code not in open_rows
+        ]
+        if new_rows:
+            ReferralTracking.insert_many(new_rows).execute()
+        return len(new_rows)
+
+    def stop(self):
+        """Stop the flush thread and write what is still pending."""
+        self._stopped.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+
 class ReferralsTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([ReferralTracking, ReferralReward], safe=True)
-        # Seed default referral tracking data
-        self.seed_default_referral_tracking()
+        self.clicks = ReferralClickBuffer(REFERRAL_CLICK_FLUSH_INTERVAL, REFERRAL_CLICK_MAX_PENDING)
 
     def track_referral_click(self, referral_code: str, source: str = None) -> dict:
-        """Track when someone clicks on a referral link"""
+        """
+        Track when someone clicks on a referral link. The click is buffered and
+        written with others by `self.clicks`.
+        """
         from apps.webui.models.users import Users
         
-        referrer = Users.get_user_by_referral_code(referral_code)
+        referrer = Users.get_cached_user_by_referral_code(referral_code)
         if not referrer:
             return {'success': False, 'message': 'Invalid referral code'}
         
-        # Check if tracking already exists for this session
-        tracking = ReferralTracking.get_or_none(
-            (ReferralTracking.referral_code == referral_code) &
-            (ReferralTracking.referred_user.is_null())
-        )
-        
-        if tracking:
-            # Update existing tracking
-            tracking.click_count += 1
-            tracking.updated_at = datetime.now()
-            tracking.save()
-        else:
-            # Create new tracking
-            tracking = ReferralTracking.create(
-                referrer=referrer['id'],
-                referral_code=referral_code,
-                referral_source=source,
-                click_count=1,
-                first_clicked_at=datetime.now()
-            )
+        self.clicks.add(referrer.id, referral_code, source)
         
         return {
             'success': True,
-            'tracking_id': tracking.id,
-            'referrer_name': referrer['name']
+            'referrer_name': referrer.name
         }
 
     def complete_referral_registration(self, referral_code: str, new_user_id: str) -> dict:
         """Mark a referral as successfully registered"""
         from apps.webui.models.users import Users
         
-        referrer = Users.get_user_by_referral_code(referral_code)
+        referrer = Users.get_cached_user_by_referral_code(referral_code)
         if not referrer:
             return {'success': False, 'message': 'Invalid referral code'}
         
-        # Check if referral tracking exists
-        tracking = ReferralTracking.get_or_none(
-            (ReferralTracking.referral_code == referral_code) &
-            (ReferralTracking.referred_user.is_null())
+        # Buffered clicks go to the open row first, or a flush after the
+        # registration would leave them in a new row nobody registers from.
+        # Only this worker's buffer is flushed: clicks buffered by other
+        # workers still land in a new open row. They are not lost, as the
+        # referrer's click total sums every row, but the registered row does
+        # not include them.
+        self.clicks.flush(referral_code)
+
+        # Check if referral tracking exists, the row the clicks were added to
+        tracking = (
+            ReferralTracking.select()
+            .where(
+                (ReferralTracking.referral_code == referral_code) &
+                (ReferralTracking.referred_user.is_null())
+            )
+            .order_by(ReferralTracking.id)
+            .first()
         )
         
         if tracking:
@@ -115,7 +248,7 @@ class ReferralsTable:
         else:
             # Create new tracking
             tracking = ReferralTracking.create(
-                referrer=referrer['id'],
+                referrer=referrer.id,
                 referred_user=new_user_id,
                 referral_code=referral_code,
                 status='registered',
@@ -124,6 +257,7 @@ class ReferralsTable:
         
         # Award registration reward if configured
         self._check_and_award_reward(tracking.id, 'registration')
+        invalidate("referral")
         
         return {
             'success': True,
@@ -155,6 +289,7 @@ class ReferralsTable:
         
         # Check for milestone rewards
         self._check_milestone_rewards(tracking)
+        invalidate("referral")
         
         return {
             'success': True,
@@ -162,105 +297,165 @@ class ReferralsTable:
             'total_referral_donations': float(tracking.total_donations)
         }
 
+    def _select_trackings(self):
+        """ReferralTracking rows with the referrer's and referred user's names joined in"""
+        Referrer, Referred = User.alias(), User.alias()
+        return (
+            ReferralTracking.select(
+                ReferralTracking,
+                Referrer.name.alias('referrer_name'),
+                Referred.name.alias('referred_user_name'),
+            )
+            .join(Referrer, JOIN.LEFT_OUTER, on=(ReferralTracking.referrer == Referrer.id))
+            .switch(ReferralTracking)
+            .join(Referred, JOIN.LEFT_OUTER, on=(ReferralTracking.referred_user == Referred.id))
+            .objects()
+        )
+
     def get_user_referral_stats(self, user_id: str) -> dict:
-        """Get comprehensive referral statistics for a user"""
+        """
+        Get comprehensive referral statistics for a user. The counters come
+        from one grouped query per table, so the number of queries does not
+        grow with the user's referrals.
+        """
         # As a referrer
-        referrals_made = ReferralTracking.select().where(
-            ReferralTracking.referrer == user_id
-        )
-        
-        total_clicks = sum(r.click_count for r in referrals_made)
-        registered_count = referrals_made.where(
-            ReferralTracking.status.in_(['registered', 'donated'])
-        ).count()
-        donated_count = referrals_made.where(
-            ReferralTracking.status == 'donated'
-        ).count()
-        
-        total_referral_donations = sum(
-            float(r.total_donations) for r in referrals_made
+        total_clicks, registered_count, donated_count, total_referral_donations = (
+            ReferralTracking.select(
+                fn.COALESCE(fn.SUM(ReferralTracking.click_count), 0),
+                fn.COALESCE(fn.SUM(Case(None, [
+                    (ReferralTracking.status.in_(['registered', 'donated']), 1)
+                ], 0)), 0),
+                fn.COALESCE(fn.SUM(Case(None, [
+                    (ReferralTracking.status == 'donated', 1)
+                ], 0)), 0),
+                fn.COALESCE(fn.SUM(ReferralTracking.total_donations), 0),
+            )
+            .where(ReferralTracking.referrer == user_id)
+            .tuples()
+            .get()
         )
         
         # Recent referrals
         recent_referrals = [
             self._tracking_to_dict(r)
-            for r in referrals_made.order_by(ReferralTracking.created_at.desc()).limit(5)
+            for r in self._select_trackings()
+            .where(ReferralTracking.referrer == user_id)
+            .order_by(ReferralTracking.created_at.desc())
+            .limit(5)
         ]
         
         # Rewards earned
-        rewards = ReferralReward.select().where(
-            ReferralReward.user == user_id
+        total_rewards_value, pending_rewards = (
+            ReferralReward.select(
+                fn.COALESCE(fn.SUM(ReferralReward.reward_value), 0),
+                fn.COALESCE(fn.SUM(Case(None, [(ReferralReward.status == 'pending', 1)], 0)), 0),
+            )
+            .where(ReferralReward.user == user_id)
+            .tuples()
+            .get()
         )
-        
-        total_rewards_value = sum(float(r.reward_value) for r in rewards)
-        pending_rewards = rewards.where(ReferralReward.status == 'pending').count()
+        rewards = ReferralReward.select().where(ReferralReward.user == user_id).limit(10)
         
         # As referred user
-        was_referred = ReferralTracking.get_or_none(
+        was_referred = self._select_trackings().where(
             ReferralTracking.referred_user == user_id
-        )
+        ).first()
         
         return {
             'as_referrer': {
-                'total_clicks': total_clicks,
-                'registered_count': registered_count,
-                'donated_count': donated_count,
-                'total_referral_donations': total_referral_donations,
+                'total_clicks': int(total_clicks),
+                'registered_count': int(registered_count),
+                'donated_count': int(donated_count),
+                'total_referral_donations': float(total_referral_donations),
                 'recent_referrals': recent_referrals
             },
             'rewards': {
-                'total_value': total_rewards_value,
-                'pending_count': pending_rewards,
-                'rewards': [self._reward_to_dict(r) for r in rewards.limit(10)]
+                'total_value': float(total_rewards_value),
+                'pending_count': int(pending_rewards),
+                'rewards': [self._reward_to_dict(r) for r in rewards]
             },
             'was_referred_by': self._tracking_to_dict(was_referred) if was_referred else None
         }
 
-    def get_referral_leaderboard(self, period: str = 'all_time', limit: int = 10) -> list:
-        """Get top referrers by various metrics"""
-        query = ReferralTracking.select(
-            ReferralTracking.referrer,
-            fn.COUNT(ReferralTracking.id).alias('referral_count'),
-            fn.SUM(ReferralTracking.total_donations).alias('total_donations'),
-            fn.SUM(ReferralTracking.donation_count).alias('donation_count')
+    def _in_period(self, query, period: str, now: datetime = None):
+        """Restrict a ReferralTracking query to referrals that donated within `period`"""
+        if period == 'all_time':
+            return query
+        days = {'daily': 1, 'weekly': 7, 'monthly': 30}.get(period, 365)
+        since = (now or datetime.now()) - timedelta(days=days)
+        return query.where(ReferralTracking.first_donation_at >= since)
+
+    def get_referral_leaderboard(self, period: str = 'all_time', limit: int = 10, offset: int = 0) -> list:
+        """
+        Top referrers by the donations of the people they referred, with their
+        user details, from one grouped query. Ties are ordered by user id, the
+        same order `get_referrer_rank` counts in.
+        """
+        total_donations = fn.SUM(ReferralTracking.total_donations)
+        query = self._in_period(
+            ReferralTracking.select(
+                User.id,
+                User.name,
+                User.profile_image_url,
+                User.referral_code,
+                fn.COUNT(ReferralTracking.id).alias('referral_count'),
+                total_donations.alias('total_donations'),
+                fn.SUM(ReferralTracking.donation_count).alias('donation_count')
+            ).join(User, on=(ReferralTracking.referrer == User.id)),
+            period
         )
-        
-        if period != 'all_time':
-            if period == 'daily':
-                since = datetime.now() - timedelta(days=1)
-            elif period == 'weekly':
-                since = datetime.now() - timedelta(days=7)
-            elif period == 'monthly':
-                since = datetime.now() - timedelta(days=30)
-            else:
-                since = datetime.now() - timedelta(days=365)
-            
-            query = query.where(ReferralTracking.first_donation_at >= since)
-        
-        # Group by referrer and order by total donations
-        query = query.group_by(ReferralTracking.referrer).order_by(
-            fn.SUM(ReferralTracking.total_donations).desc()
-        ).limit(limit)
-        
-        results = []
-        for row in query:
-            try:
-                user_data = model_to_dict(row.referrer)
-                results.append({
-                    'user': {
-                        'id': user_data['id'],
-                        'name': user_data['name'],
-                        'profile_image_url': user_data.get('profile_image_url')
-                    },
-                    'referral_count': row.referral_count,
-                    'total_donations': float(row.total_donations or 0),
-                    'donation_count': row.donation_count
-                })
-            except:
-                # Skip invalid entries
-                continue
-        
-        return results
+        query = (
+            query.group_by(User.id, User.name, User.profile_image_url, User.referral_code)
+            .order_by(total_donations.desc(), User.id)
+            .limit(limit)
+            .offset(offset)
+        )
+
+        return [
+            {
+                'rank': offset + idx,
+                'user': {
+                    'id': user_id,
+                    'name': name,
+                    'profile_image_url': profile_image_url,
+                    'referral_code': referral_code,
+                },
+                'referral_count': referral_count,
+                'total_donations': float(total or 0),
+                'donation_count': donation_count or 0
+            }
+            for idx, (user_id, name, profile_image_url, referral_code, referral_count, total, donation_count)
+            in enumerate(query.tuples(), 1)
+        ]
+
+    def get_referrer_rank(self, user_id: str, period: str = 'all_time') -> Optional[int]:
+        """
+        Rank of a referrer on the leaderboard of `period`, counted as the
+        referrers ahead of them plus one. None if they have no referrals in it.
+        """
+        now = datetime.now()
+        own = self._in_period(
+            ReferralTracking.select(ReferralTracking.id).where(ReferralTracking.referrer == user_id),
+            period, now
+        )
+        if not own.exists():
+            return None
+
+        own_total = self._in_period(
+            ReferralTracking.select(fn.SUM(ReferralTracking.total_donations))
+            .where(ReferralTracking.referrer == user_id),
+            period, now
+        )
+        total_donations = fn.SUM(ReferralTracking.total_donations)
+        ahead = self._in_period(
+            ReferralTracking.select(ReferralTracking.referrer)
+            .join(User, on=(ReferralTracking.referrer == User.id)),
+            period, now
+        ).group_by(ReferralTracking.referrer).having(
+            (total_donations > own_total)
+            | ((total_donations == own_total) & (ReferralTracking.referrer < user_id))
+        )
+        return ahead.count() + 1
 
     def _check_and_award_reward(self, tracking_id: str, reward_trigger: str):
         """Check and award rewards based on triggers"""
@@ -333,12 +528,19 @@ class ReferralsTable:
         if not tracking:
             return None
         
+        if hasattr(tracking, 'referrer_name'):
+            # Names already joined in by `_select_trackings`
+            referrer_name, referred_user_name = tracking.referrer_name, tracking.referred_user_name
+        else:
+            referrer_name = tracking.referrer.name if tracking.referrer else None
+            referred_user_name = tracking.referred_user.name if tracking.referred_user else None
+
         return {
             'id': tracking.id,
             'referrer_id': tracking.referrer_id,
-            'referrer_name': tracking.referrer.name if tracking.referrer else None,
-            'referred_user_id': tracking.referred_user_id if tracking.referred_user else None,
-            'referred_user_name': tracking.referred_user.name if tracking.referred_user else None,
+            'referrer_name': referrer_name,
+            'referred_user_id': tracking.referred_user_id if referred_user_name is not None else None,
+            'referred_user_name': referred_user_name,
             'referral_code': tracking.referral_code,
             'status': tracking.status,
             'click_count': tracking.click_count,
@@ -366,11 +568,11 @@ class ReferralsTable:
             'expires_at': reward.expires_at.isoformat() if reward.expires_at else None
         }
 
-    def seed_default_referral_tracking(self):
-        """Seed default referral tracking data based on donations with referral codes"""
+    def get_default_referral_trackings(self) -> list:
+        """Demo referral trackings, also used as templates by the dataset generator"""
         from decimal import Decimal
         
-        default_trackings = [
+        return [
             # John Smith (user-001) referrals - JOHN123
             {
                 'id': 'ref-track-001',
@@ -621,68 +823,85 @@ class ReferralsTable:
                 'donation_count': 1
             }
         ]
-        
+
+    def seed_default_referral_tracking(self):
+        """Seed default referral tracking data based on donations with referral codes"""
+        now = datetime.now()
+        default_trackings = self.get_default_referral_trackings()
+        existing = {
+            tracking_id
+            for (tracking_id,) in ReferralTracking.select(ReferralTracking.id)
+            .where(ReferralTracking.id.in_([t['id'] for t in default_trackings]))
+            .tuples()
+        }
+
         # Create referral tracking records
+        trackings = []
+        rewards = []
         for tracking_data in default_trackings:
-            existing = ReferralTracking.get_or_none(ReferralTracking.id == tracking_data['id'])
-            if not existing:
-                tracking_id = tracking_data['id']
-                ReferralTracking.create(
-                    id=tracking_id,
-                    referrer=tracking_data['referrer_id'],
-                    referred_user=tracking_data['referred_user_id'],
-                    referral_code=tracking_data['referral_code'],
-                    status=tracking_data['status'],
-                    click_count=tracking_data['click_count'],
-                    first_clicked_at=datetime.now() - timedelta(days=35),
-                    registered_at=datetime.now() - timedelta(days=33) if tracking_data['referred_user_id'] else None,
-                    first_donation_at=datetime.now() - timedelta(days=30),
-                    total_donations=tracking_data['total_donations'],
-                    donation_count=tracking_data['donation_count'],
-                    referral_source=tracking_data['referral_source'],
-                    created_at=datetime.now() - timedelta(days=35),
-                    updated_at=datetime.now() - timedelta(days=25)
-                )
-                
-                # Create associated rewards for successful referrals
-                if tracking_data['status'] == 'donated':
-                    # Registration reward (if referred user exists)
-                    if tracking_data['referred_user_id']:
-                        ReferralReward.create(
-                            id=f'reward-reg-{tracking_id}',
-                            user=tracking_data['referrer_id'],
-                            referral_tracking=tracking_id,
-                            reward_type='points',
-                            reward_value=100,
-                            reward_description='Referral registration bonus',
-                            status='awarded',
-                            awarded_at=datetime.now() - timedelta(days=33)
-                        )
-                    
-                    # First donation reward
-                    ReferralReward.create(
-                        id=f'reward-don-{tracking_id}',
-                        user=tracking_data['referrer_id'],
-                        referral_tracking=tracking_id,
-                        reward_type='points',
-                        reward_value=500,
-                        reward_description='First donation from referral',
-                        status='awarded',
-                        awarded_at=datetime.now() - timedelta(days=30)
-                    )
-                    
-                    # Milestone rewards for high-value referrals
-                    if tracking_data['total_donations'] >= 1000:
-                        ReferralReward.create(
-                            id=f'reward-milestone-{tracking_id}',
-                            user=tracking_data['referrer_id'],
-                            referral_tracking=tracking_id,
-                            reward_type='badge',
-                            reward_value=1,
-                            reward_description='Bronze Referrer',
-                            status='awarded',
-                            awarded_at=datetime.now() - timedelta(days=25)
-                        )
+            tracking_id = tracking_data['id']
+            if tracking_id in existing:
+                continue
+
+            trackings.append({
+                'id': tracking_id,
+                'referrer': tracking_data['referrer_id'],
+                'referred_user': tracking_data['referred_user_id'],
+                'referral_code': tracking_data['referral_code'],
+                'status': tracking_data['status'],
+                'click_count': tracking_data['click_count'],
+                'first_clicked_at': now - timedelta(days=35),
+                'registered_at': now - timedelta(days=33) if tracking_data['referred_user_id'] else None,
+                'first_donation_at': now - timedelta(days=30),
+                'total_donations': tracking_data['total_donations'],
+                'donation_count': tracking_data['donation_count'],
+                'referral_source': tracking_data['referral_source'],
+                'created_at': now - timedelta(days=35),
+                'updated_at': now - timedelta(days=25),
+            })
+
+            # Create associated rewards for successful referrals
+            if tracking_data['status'] == 'donated':
+                reward = {
+                    'user': tracking_data['referrer_id'],
+                    'referral_tracking': tracking_id,
+                    'status': 'awarded',
+                }
+                # Registration reward (if referred user exists)
+                if tracking_data['referred_user_id']:
+                    rewards.append({
+                        **reward,
+                        'id': f'reward-reg-{tracking_id}',
+                        'reward_type': 'points',
+                        'reward_value': 100,
+                        'reward_description': 'Referral registration bonus',
+                        'awarded_at': now - timedelta(days=33),
+                    })
+
+                # First donation reward
+                rewards.append({
+                    **reward,
+                    'id': f'reward-don-{tracking_id}',
+                    'reward_type': 'points',
+                    'reward_value': 500,
+                    'reward_description': 'First donation from referral',
+                    'awarded_at': now - timedelta(days=30),
+                })
+
+                # Milestone rewards for high-value referrals
+                if tracking_data['total_donations'] >= 1000:
+                    rewards.append({
+                        **reward,
+                        'id': f'reward-milestone-{tracking_id}',
+                        'reward_type': 'badge',
+                        'reward_value': 1,
+                        'reward_description': 'Bronze Referrer',
+                        'awarded_at': now - timedelta(days=25),
+                    })
 
+        with self.db.atomic():
+            bulk_insert(ReferralTracking, trackings)
+            insert_missing(ReferralReward, rewards)
+        invalidate("referral")
 
 Referrals = ReferralsTable(DB)
\ No newline at end of file
@@ -3,6 +3,8 @@ from peewee import *
 from playhouse.shortcuts import model_to_dict
 import uuid
 from apps.webui.internal.db import DB
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import insert_missing
 
 class Region(Model):
     id = CharField(max_length=255, unique=True, primary_key=True,
@@ -15,7 +17,6 @@ class Region(Model):
 class RegionsTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Region], safe=True)
 
     def get_all_regions(self) -> list:
         return [model_to_dict(r) for r in Region.select().order_by(Region.name.asc())]
@@ -30,6 +31,7 @@ class RegionsTable:
 
     def create_region(self, name: str) -> dict:
         r = Region.create(name=name)
+        invalidate("region")
         return model_to_dict(r)
 
     def update_region_name(self, region_id: str, new_name: str) -> dict:
@@ -38,10 +40,13 @@ class RegionsTable:
             return None
         r.name = new_name
         r.save()
+        invalidate("region")
         return model_to_dict(r)
 
     def delete_region(self, region_id: str) -> bool:
-        return Region.delete().where(Region.id == region_id).execute() == 1
+        deleted = Region.delete().where(Region.id == region_id).execute() == 1
+        invalidate("region")
+        return deleted
     
     def seed_default_regions(self):
         """Seed default Hong Kong regions if they don't exist"""
@@ -65,11 +70,7 @@ class RegionsTable:
             {'id': 'tuen-mun', 'name': 'Tuen Mun'},
             {'id': 'yuen-long', 'name': 'Yuen Long'},
         ]
-        
-        for region_data in default_regions:
-            existing = Region.get_or_none(Region.id == region_data['id'])
-            if not existing:
-                Region.create(id=region_data['id'], name=region_data['name'])
+        insert_missing(Region, default_regions)
+        invalidate("region")
 
 Regions = RegionsTable(DB)
-Regions.seed_default_regions()
@@ -2,12 +2,23 @@ from pydantic import BaseModel, ConfigDict
 from peewee import *
 from playhouse.shortcuts import model_to_dict
 from typing import List, Union, Optional
+import base64
+import logging
+import threading
 import time
 import uuid
 import random
 import string
 
-from apps.webui.internal.db import DB, JSONField
+from apps.webui.internal.cache import TTLCache
+from apps.webui.internal.db import DB, JSONField, connection_scope
+from apps.webui.internal.executor import AsyncTable
+from apps.webui.internal.response_cache import invalidate
+from apps.webui.internal.seeding import insert_missing
+from config import SRC_LOG_LEVELS, USER_CACHE_TTL, USER_LAST_ACTIVE_FLUSH_INTERVAL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 ####################
 # User DB Schema
@@ -39,6 +50,27 @@ class User(Model):
 
     class Meta:
         database = DB
+        indexes = (
+            # The admin user list, newest first, with or without a role filter
+            (('created_at', 'id'), False),
+            (('role', 'created_at', 'id'), False),
+        )
+
+
+# Columns of the admin user list: everything but the `settings` and `info` JSON
+LIST_FIELDS = [
+    User.id,
+    User.name,
+    User.email,
+    User.role,
+    User.profile_image_url,
+    User.referral_code,
+    User.last_active_at,
+    User.updated_at,
+    User.created_at,
+    User.api_key,
+    User.oauth_sub,
+]
 
 
 class UserSettings(BaseModel):
@@ -84,35 +116,133 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# Last active write-behind
+####################
+
+
+class LastActiveBuffer:
+    """
+    Coalesces `last_active_at` updates in memory and writes them with one
+    batched UPDATE every `interval` seconds, instead of an UPDATE per
+    authenticated request. An `interval` of 0 writes every touch immediately.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def touch(self, id: str, timestamp: Optional[int] = None):
+        with self._lock:
+            self._pending[id] = timestamp or int(time.time())
+            if self._thread is None and self.interval > 0:
+                self._thread = threading.Thread(
+                    target=self._run, name="last-active-flush", daemon=True
+                )
+                self._thread.start()
+
+        if self.interval <= 0:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the pending timestamps. Returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            with connection_scope(), DB.atomic():
+                for batch in chunked(list(pending.items()), 500):
+                    User.update(last_active_at=Case(User.id, batch)).where(
+                        User.id.in_([id for id, _ in batch])
+                    ).execute()
+        except Exception as e:
+            log.warning(f"Failed to flush last_active_at updates: {e}")
+            # Keep them for the next flush unless the user was touched again
+            with self._lock:
+                for id, timestamp in pending.items():
+                    self._pending.setdefault(id, timestamp)
+            return 0
+
+        return len(pending)
+
+    def stop(self):
+        """Stop the flush thread and write what is still pending."""
+        self._stopped.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+
 class UsersTable:
     def __init__(self, db):
         self.db = db
-        self.db.create_tables([User], safe=True)
-        # Populate referral codes for existing users without them
-        self._ensure_referral_codes()
-        # Seed default users for demo
-        self.seed_default_users()
+        # Users by ("id", user id), and user ids by ("api_key", api key) and
+        # ("referral_code", code). Invalidated by every update made through
+        # this table; the id lookups are checked against the cached user.
+        self.cache = TTLCache(USER_CACHE_TTL)
+        self.last_active = LastActiveBuffer(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+
+    def invalidate_user(self, id: str):
+        self.cache.delete(("id", id))
+        # Names and avatars appear in cached public responses
+        invalidate("user")
+
+    def _referral_code_candidate(self, name: Optional[str], attempt: int) -> str:
+        # Readable codes first: first 3 letters of the name + random digits
+        prefix = ''.join(filter(str.isalpha, (name or '').upper()))[:3]
+        if prefix and attempt < 5:
+            return prefix + ''.join(random.choices(string.digits, k=5))
+        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+
+    def generate_referral_codes(self, names: list) -> list:
+        """
+        One unique referral code per name. Every round proposes 3 candidates
+        per name and checks all of them with one IN query per 500 candidates,
+        instead of an exists() query per candidate.
+        """
+        codes = [None] * len(names)
+        used = set()
+        pending = list(range(len(names)))
+        for first in range(0, 15, 3):
+            if not pending:
+                break
+            candidates = {
+                i: [self._referral_code_candidate(names[i], attempt) for attempt in range(first, first + 3)]
+                for i in pending
+            }
+            taken = set()
+            for batch in chunked(list({code for codes_ in candidates.values() for code in codes_}), 500):
+                taken.update(
+                    code for (code,) in User.select(User.referral_code)
+                    .where(User.referral_code.in_(batch))
+                    .tuples()
+                )
+
+            still_pending = []
+            for i in pending:
+                code = next((c for c in candidates[i] if c not in taken and c not in used), None)
+                if code is None:
+                    still_pending.append(i)
+                else:
+                    codes[i] = code
+                    used.add(code)
+            pending = still_pending
+
+        # Last resort: use UUID
+        for i in pending:
+            codes[i] = str(uuid.uuid4())[:8].upper()
+        return codes
 
     def generate_referral_code(self, name: str = None) -> str:
         """Generate a unique referral code"""
-        # Try to create a readable code first using name
-        if name:
-            # Use first 3 letters of name + random digits
-            prefix = ''.join(filter(str.isalpha, name.upper()))[:3]
-            if prefix:
-                for _ in range(5):  # Try 5 times with name prefix
-                    code = prefix + ''.join(random.choices(string.digits, k=5))
-                    if not User.select().where(User.referral_code == code).exists():
-                        return code
-        
-        # Fallback to random code
-        for _ in range(10):  # Try 10 times
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            if not User.select().where(User.referral_code == code).exists():
-                return code
-        
-        # Last resort: use UUID
-        return str(uuid.uuid4())[:8].upper()
+        return self.generate_referral_codes([name])[0]
 
     def insert_new_user(
         self,
@@ -130,12 +260,13 @@ class UsersTable:
         # Find referrer if referral code provided
         referred_by_id = None
         if referred_by_code:
-            referrer = User.get_or_none(User.referral_code == referred_by_code)
+            referrer = self.get_cached_user_by_referral_code(referred_by_code)
             if referrer:
                 referred_by_id = referrer.id
                 # Increment referrer's referral count
-                referrer.referral_count += 1
-                referrer.save()
+                User.update(referral_count=fn.COALESCE(User.referral_count, 0) + 1).where(
+                    User.id == referrer.id
+                ).execute()
         
         user = UserModel(
             **{
@@ -176,6 +307,52 @@ class UsersTable:
         except:
             return None
 
+    def get_cached_user_by_id(self, id: str) -> Optional[UserModel]:
+        """`get_user_by_id` served from the user cache when possible"""
+        user = self.cache.get(("id", id))
+        if user is None:
+            user = self.get_user_by_id(id)
+            if user is None:
+                return None
+            self.cache.set(("id", id), user)
+        # Callers get their own copy so they cannot change the cached one
+        return user.model_copy()
+
+    def get_cached_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        """`get_user_by_api_key` served from the user cache when possible"""
+        id = self.cache.get(("api_key", api_key))
+        if id is not None:
+            user = self.get_cached_user_by_id(id)
+            # The key may have been changed or revoked since it was cached
+            if user is not None and user.api_key == api_key:
+                return user
+            self.cache.delete(("api_key", api_key))
+
+        user = self.get_user_by_api_key(api_key)
+        if user is None:
+            return None
+        self.cache.set(("id", user.id), user)
+        self.cache.set(("api_key", api_key), user.id)
+        return user.model_copy()
+
+    def get_cached_user_by_referral_code(self, referral_code: str) -> Optional[UserModel]:
+        """The owner of a referral code, served from the user cache when possible"""
+        id = self.cache.get(("referral_code", referral_code))
+        if id is not None:
+            user = self.get_cached_user_by_id(id)
+            # The code may have been regenerated since it was cached
+            if user is not None and user.referral_code == referral_code:
+                return user
+            self.cache.delete(("referral_code", referral_code))
+
+        try:
+            user = UserModel(**model_to_dict(User.get(User.referral_code == referral_code)))
+        except:
+            return None
+        self.cache.set(("id", user.id), user)
+        self.cache.set(("referral_code", referral_code), user.id)
+        return user.model_copy()
+
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         try:
             user = User.get(User.email == email)
@@ -193,10 +370,58 @@ class UsersTable:
     def get_users(self, skip: int = 0, limit: int = 50) -> List[UserModel]:
         return [
             UserModel(**model_to_dict(user))
-            for user in User.select()
-            # .limit(limit).offset(skip)
+            for user in User.select().order_by(User.created_at, User.id).limit(limit).offset(skip)
         ]
 
+    def _encode_cursor(self, created_at: int, id: str) -> str:
+        return base64.urlsafe_b64encode(f"{created_at}|{id}".encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> tuple:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+            return int(created_at), id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def get_user_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        role: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> dict:
+        """
+        One page of users for the admin user list, newest first, optionally
+        filtered by role and by a case-insensitive match on name or email.
+        Pages are addressed by a (created_at, id) cursor, so each page is a
+        seek on the (role,) created_at, id index whatever its depth. The
+        `settings` and `info` JSON columns are not loaded.
+        """
+        query = User.select(*LIST_FIELDS)
+        if role:
+            query = query.where(User.role == role)
+        if search:
+            query = query.where(User.name.contains(search) | User.email.contains(search))
+        if cursor:
+            created_at, id = self._decode_cursor(cursor)
+            query = query.where(
+                (User.created_at < created_at)
+                | ((User.created_at == created_at) & (User.id < id))
+            )
+
+        # One extra row tells whether there is a next page
+        rows = list(query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1).dicts())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            'users': [UserModel(**row) for row in rows],
+            'next_cursor': (
+                self._encode_cursor(rows[-1]['created_at'], rows[-1]['id']) if has_more else None
+            ),
+        }
+
     def get_num_users(self) -> Optional[int]:
         return User.select().count()
 
@@ -211,6 +436,7 @@ class UsersTable:
         try:
             query = User.update(role=role).where(User.id == id)
             query.execute()
+            self.invalidate_user(id)
 
             user = User.get(User.id == id)
             return UserModel(**model_to_dict(user))
@@ -225,6 +451,7 @@ class UsersTable:
                 User.id == id
             )
             query.execute()
+            self.invalidate_user(id)
 
             user = User.get(User.id == id)
             return UserModel(**model_to_dict(user))
@@ -235,18 +462,24 @@ class UsersTable:
         try:
             query = User.update(last_active_at=int(time.time())).where(User.id == id)
             query.execute()
+            self.invalidate_user(id)
 
             user = User.get(User.id == id)
             return UserModel(**model_to_dict(user))
         except:
             return None
 
+    def touch_user_last_active_by_id(self, id: str):
+        """Record activity now; the write is batched by `self.last_active`"""
+        self.last_active.touch(id)
+
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
     ) -> Optional[UserModel]:
         try:
             query = User.update(oauth_sub=oauth_sub).where(User.id == id)
             query.execute()
+            self.invalidate_user(id)
 
             user = User.get(User.id == id)
             return UserModel(**model_to_dict(user))
@@ -257,6 +490,7 @@ class UsersTable:
         try:
             query = User.update(**updated).where(User.id == id)
             query.execute()
+            self.invalidate_user(id)
 
             user = User.get(User.id == id)
             return UserModel(**model_to_dict(user))
@@ -268,6 +502,7 @@ class UsersTable:
             # Delete User
             query = User.delete().where(User.id == id)
             query.execute()  # Remove the rows, return number of rows removed.
+            self.invalidate_user(id)
 
             return True
 
@@ -278,6 +513,7 @@ class UsersTable:
         try:
             query = User.update(api_key=api_key).where(User.id == id)
             result = query.execute()
+            self.invalidate_user(id)
 
             return True if result == 1 else False
         except:
@@ -309,10 +545,11 @@ class UsersTable:
     def update_referral_donation_total(self, referrer_id: str, amount: float):
         """Update the total donations from referrals for a user"""
         try:
-            user = User.get(User.id == referrer_id)
-            user.referral_donations_total += amount
-            user.save()
-            return True
+            # Incremented in SQL, so concurrent referral donations are not lost
+            query = User.update(
+                referral_donations_total=fn.COALESCE(User.referral_donations_total, 0) + amount
+            ).where(User.id == referrer_id)
+            return query.execute() == 1
         except:
             return False
     
@@ -342,30 +579,51 @@ class UsersTable:
         """Regenerate a user's referral code"""
         try:
             user = User.get(User.id == user_id)
+            old_code = user.referral_code
             new_code = self.generate_referral_code(user.name)
-            user.referral_code = new_code
-            user.save()
+            User.update(referral_code=new_code, updated_at=int(time.time())).where(
+                User.id == user_id
+            ).execute()
+            self.cache.delete(("referral_code", old_code))
+            self.invalidate_user(user_id)
             return new_code
         except:
             return None
     
-    def _ensure_referral_codes(self):
-        """Ensure all existing users have referral codes"""
+    def ensure_referral_codes(self) -> int:
+        """
+        Give every user without a referral code one. Codes are generated for
+        all of them together and written with one UPDATE per 500 users.
+        Returns the number of users updated.
+        """
         try:
-            users_without_codes = User.select().where(
-                (User.referral_code.is_null()) | (User.referral_code == '')
+            missing = list(
+                User.select(User.id, User.name).where(
+                    (User.referral_code.is_null()) | (User.referral_code == '')
+                ).tuples()
             )
-            for user in users_without_codes:
-                if not user.referral_code:
-                    user.referral_code = self.generate_referral_code(user.name)
-                    user.save()
         except Exception as e:
             # Table might not exist yet during initial migration
-            pass
-
-    def seed_default_users(self):
-        """Seed default users data for demo purposes"""
-        default_users = [
+            return 0
+        if not missing:
+            return 0
+
+        codes = self.generate_referral_codes([name for _, name in missing])
+        assignments = [(id, code) for (id, _), code in zip(missing, codes)]
+        with self.db.atomic():
+            for batch in chunked(assignments, 500):
+                User.update(referral_code=Case(User.id, batch)).where(
+                    User.id.in_([id for id, _ in batch])
+                ).execute()
+
+        for id, _ in assignments:
+            self.cache.delete(("id", id))
+        invalidate("user")
+        return len(assignments)
+
+    def get_default_users(self) -> list:
+        """Demo users, also used as templates by the dataset generator"""
+        return [
             {
                 'id': 'user-001',
                 'name': 'Tingxiao Shi',
@@ -547,15 +805,18 @@ class UsersTable:
                 'oauth_sub': None
             }
         ]
-        
-        for user_data in default_users:
-            existing = User.get_or_none(User.id == user_data['id'])
-            if not existing:
-                # Set timestamps
-                user_data['last_active_at'] = int(time.time())
-                user_data['created_at'] = int(time.time())
-                user_data['updated_at'] = int(time.time())
-                User.create(**user_data)
+
+    def seed_default_users(self):
+        """Seed default users data for demo purposes"""
+        now = int(time.time())
+        insert_missing(
+            User,
+            [
+                {**user_data, 'last_active_at': now, 'created_at': now, 'updated_at': now}
+                for user_data in self.get_default_users()
+            ],
+        )
 
 
 Users = UsersTable(DB)
+AsyncUsers = AsyncTable(Users)
@@ -43,7 +43,6 @@ class VideoView(Model):
 class VideosTable:
     def __init__(self, db):
         self.db = db
-        db.create_tables([Video, VideoView], safe=True)
 
     def create_video(
         self,
@@ -12,9 +12,10 @@ from utils.utils import get_admin_user  # add this
 from apps.webui.models.regions import Region  # for region existence check
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
-import random
 
-from apps.webui.models.children import Children
+from apps.webui.internal.response_cache import cached
+from apps.webui.models.children import Children, Child, daily_seed
+from apps.webui.models.followers import Followers
 from apps.webui.models.users import Users
 from utils.utils import get_verified_user  # to require login
 from utils.utils import get_current_user  # to require admin for certain actions
@@ -38,12 +39,14 @@ router = APIRouter()
 ############################
 @router.get("/popular")
 def get_popular_children(limit: int = 3):
-    popular = Children.get_popular_children(limit=10)  # fetch top 10
-    if not popular:
-        return []
-    # pick top 3, break ties randomly if follower_count matches
-    top_sorted = sorted(popular, key=lambda c: (c["follower_count"], random.random()), reverse=True)
-    return top_sorted[:limit]
+    # Ties in follower_count are broken randomly, in the same order all day,
+    # so the day's seed is part of the cache key
+    return _get_popular_children(limit, daily_seed())
+
+
+@cached("children.popular", ("child",))
+def _get_popular_children(limit: int, seed: int):
+    return Children.get_popular_children(limit=limit, seed=seed)
 
 
 ############################
@@ -52,25 +55,28 @@ def get_popular_children(limit: int = 3):
 @router.post("/{child_id}/follow")
 def follow_child(child_id: str, user_id: str, user=Depends(get_current_user)):
     """Make a user follow a child. Expects user_id in query/body"""
-    # Check child exists
-    child = Children.get_child_by_id(child_id)
-    if not child:
-        raise HTTPException(status_code=404, detail="Child not found")
-
     # Check user exists
     user = Users.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Increment follower count
-    updated = Children.increment_follower_count(child_id)
-    return {"message": f"{user.name} is now following {child['name']}", "child": updated}
+    # The follower row and the follower count are written together
+    try:
+        result = Followers.follow_child(user_id, child_id)
+    except Child.DoesNotExist:
+        raise HTTPException(status_code=404, detail="Child not found")
+    if not result['success']:
+        raise HTTPException(status_code=409, detail="Already following this child")
+
+    child = Children.get_child_by_id(result['follower']['child_id'])
+    return {"message": f"{user.name} is now following {child['name']}", "child": child}
 
 
 ############################
 # Get all children
 ############################
 @router.get("/", response_model=List[dict])
+@cached("children.list", ("child", "region"))
 def get_all_children():
     return Children.get_all_children()
 
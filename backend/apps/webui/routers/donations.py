@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
-from peewee import fn
+from typing import Optional, List, Dict, Literal
+from peewee import JOIN, fn
 
 from utils.utils import get_current_user
+from apps.webui.internal import idempotency
+from apps.webui.internal.response_cache import cached, invalidate
 from apps.webui.models.donations import Donations, Donation
+from apps.webui.models.leaderboard import Leaderboard
 from apps.webui.models.users import User, Users
 
 from decimal import Decimal, ROUND_DOWN
@@ -49,6 +52,10 @@ class DonationOut(BaseModel):  # reuse yours if already defined
     status: str
     created_at: Optional[str] = None
 
+class DonationPageOut(BaseModel):
+    donations: List[DonationOut]
+    next_cursor: Optional[str] = None  # pass as `cursor` to get the next page
+
 class BulkDonateOut(BaseModel):
     per_child_amount: float
     total_requested: float
@@ -113,53 +120,83 @@ class RecentDonorOut(BaseModel):
 # =========================
 
 @router.post("/quick", response_model=DonationOut, status_code=status.HTTP_201_CREATED)
-def create_quick_donation(body: QuickDonationIn):
+def create_quick_donation(
+    body: QuickDonationIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Create a quick donation (amount only; anonymous)."""
     try:
-        return Donations.create_donation(
-            donation_type="Quick",
-            user_id=None,
-            child_id=None,
-            amount=body.amount,
-            currency=body.currency,
-            payment_method=body.payment_method,
-            transaction_id=body.transaction_id,
-            referral_code=body.referral_code,
+        return idempotency.run_once(
+            "donations.quick",
+            idempotency_key or body.transaction_id,
+            body.dict(),
+            lambda: Donations.create_donation(
+                donation_type="Quick",
+                user_id=None,
+                child_id=None,
+                amount=body.amount,
+                currency=body.currency,
+                payment_method=body.payment_method,
+                transaction_id=body.transaction_id,
+                referral_code=body.referral_code,
+            ),
         )
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Quick donation failed: {e}")
 
 @router.post("/anonymous", response_model=DonationOut, status_code=status.HTTP_201_CREATED)
-def create_anonymous_donation(body: GuestDonationIn):
+def create_anonymous_donation(
+    body: GuestDonationIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Create an anonymous (guest) donation for a child."""
     try:
-        return Donations.create_donation(
-            donation_type="Guest",
-            user_id=None,
-            child_id=body.child_id,
-            amount=body.amount,
-            currency=body.currency,
-            payment_method=body.payment_method,
-            transaction_id=body.transaction_id,
-            referral_code=body.referral_code,
+        return idempotency.run_once(
+            "donations.anonymous",
+            idempotency_key or body.transaction_id,
+            body.dict(),
+            lambda: Donations.create_donation(
+                donation_type="Guest",
+                user_id=None,
+                child_id=body.child_id,
+                amount=body.amount,
+                currency=body.currency,
+                payment_method=body.payment_method,
+                transaction_id=body.transaction_id,
+                referral_code=body.referral_code,
+            ),
         )
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Anonymous donation failed: {e}")
     
 @router.post("/standard", response_model=DonationOut, status_code=status.HTTP_201_CREATED)
-def create_standard_donation(body: StandardDonationIn):
+def create_standard_donation(
+    body: StandardDonationIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """Create a standard donation (logged-in user -> child)."""
     try:
-        return Donations.create_donation(
-            donation_type="Standard",
-            user_id=body.user_id,
-            child_id=body.child_id,
-            amount=body.amount,
-            currency=body.currency,
-            payment_method=body.payment_method,
-            transaction_id=body.transaction_id,
-            referral_code=body.referral_code,
+        return idempotency.run_once(
+            "donations.standard",
+            idempotency_key or body.transaction_id,
+            body.dict(),
+            lambda: Donations.create_donation(
+                donation_type="Standard",
+                user_id=body.user_id,
+                child_id=body.child_id,
+                amount=body.amount,
+                currency=body.currency,
+                payment_method=body.payment_method,
+                transaction_id=body.transaction_id,
+                referral_code=body.referral_code,
+            ),
         )
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Standard donation failed: {e}")
 
@@ -168,119 +205,69 @@ def create_standard_donation(body: StandardDonationIn):
 # =========================
 
 @router.get("/top/total", response_model=List[TopDonorOut])
+@cached("donations.top_total", ("donation", "user"))
 def top_donors_total(k: int = Query(10, gt=0, le=100)):
     """
     Top K users by total donated (all children). Excludes NULL and '0000' sentinel.
     """
+    # The donor's name comes from the same query; it is None if the user is gone
     q = (
         Donation
         .select(
             Donation.user_id,
+            User.name.alias("user_name"),
             fn.SUM(Donation.amount).alias("total_amount"),
             fn.COUNT(Donation.id).alias("donation_count"),
         )
+        .join(User, JOIN.LEFT_OUTER, on=(Donation.user == User.id))
         .where(
             (Donation.status == "completed") &
             Donation.user.is_null(False) &
             (Donation.user_id != "0")
         )
-        .group_by(Donation.user_id)
+        .group_by(Donation.user_id, User.name)
         .order_by(fn.SUM(Donation.amount).desc())
         .limit(k)
+        .objects()
     )
-    out: List[TopDonorOut] = []
-    for row in q:
-        user_name = None
-        try:
-            # row.user is a User model thanks to FK; it may be None if dangling
-            user_name = row.user.name if row.user else None
-        except Exception:
-            pass
-        out.append(
-            TopDonorOut(
-                user_id=row.user_id,
-                user_name=user_name,
-                total_amount=float(row.total_amount or 0),
-                donation_count=int(row.donation_count or 0),
-            )
+    return [
+        TopDonorOut(
+            user_id=row.user_id,
+            user_name=row.user_name,
+            total_amount=float(row.total_amount or 0),
+            donation_count=int(row.donation_count or 0),
         )
-    return out
+        for row in q
+    ]
 
 @router.get("/top/total/{child_id}", response_model=List[TopDonorOut])
 def top_donors_total_for_child(child_id: str, k: int = Query(10, gt=0, le=100)):
     """
     Top K users by total donated to a specific child.
     """
-    q = (
-        Donation
-        .select(
-            Donation.user_id,
-            fn.SUM(Donation.amount).alias("total_amount"),
-            fn.COUNT(Donation.id).alias("donation_count"),
-        )
-        .where(
-            (Donation.status == "completed") &
-            (Donation.child_id == child_id) &
-            Donation.user.is_null(False) &
-            (Donation.user_id != "0000")
-        )
-        .group_by(Donation.user_id)
-        .order_by(fn.SUM(Donation.amount).desc())
-        .limit(k)
-    )
-    out: List[TopDonorOut] = []
-    for row in q:
-        user_name = None
-        try:
-            user_name = row.user.name if row.user else None
-        except Exception:
-            pass
-        out.append(
-            TopDonorOut(
-                user_id=row.user_id,
-                user_name=user_name,
-                total_amount=float(row.total_amount or 0),
-                donation_count=int(row.donation_count or 0),
-            )
+    return [
+        TopDonorOut(
+            user_id=donor["user_id"],
+            user_name=donor["user_name"],
+            total_amount=donor["total_amount"],
+            donation_count=donor["donation_count"],
         )
-    return out
+        for donor in Donations.get_top_child_donors(child_id, k)
+    ]
 
 @router.get("/top/single/{child_id}", response_model=List[TopSingleDonationOut])
 def top_single_donations_for_child(child_id: str, k: int = Query(10, gt=0, le=100)):
     """
     Top K users by highest single donation to a specific child.
     """
-    q = (
-        Donation
-        .select(
-            Donation.user_id,
-            fn.MAX(Donation.amount).alias("max_amount"),
+    return [
+        TopSingleDonationOut(
+            user_id=donor["user_id"],
+            user_name=donor["user_name"],
+            max_amount=donor["max_amount"],
         )
-        .where(
-            (Donation.status == "completed") &
-            (Donation.child_id == child_id) &
-            Donation.user.is_null(False) &
-            (Donation.user_id != "0000")
-        )
-        .group_by(Donation.user_id)
-        .order_by(fn.MAX(Donation.amount).desc())
-        .limit(k)
-    )
-    out: List[TopSingleDonationOut] = []
-    for row in q:
-        user_name = None
-        try:
-            user_name = row.user.name if row.user else None
-        except Exception:
-            pass
-        out.append(
-            TopSingleDonationOut(
-                user_id=row.user_id,
-                user_name=user_name,
-                max_amount=float(row.max_amount or 0),
-            )
-        )
-    return out
+        for donor in Donations.get_top_single_child_donors(child_id, k)
+    ]
 
 @router.post("/total/by-children", response_model=List[ChildTotalOut])
 def total_amount_by_children(body: ChildTotalsIn):
@@ -288,66 +275,30 @@ def total_amount_by_children(body: ChildTotalsIn):
     Total donated amount per child for a given list of child_ids.
     Returns zeros for ids with no donations.
     """
-    if not body.child_ids:
-        return []
-    agg = (
-        Donation
-        .select(
-            Donation.child_id,
-            fn.SUM(Donation.amount).alias("total_amount"),
-        )
-        .where(
-            (Donation.status == "completed") &
-            (Donation.child_id.in_(body.child_ids))
-        )
-        .group_by(Donation.child_id)
-    )
-    totals_map: Dict[str, float] = {cid: 0.0 for cid in body.child_ids}
-    for row in agg:
-        totals_map[row.child_id] = float(row.total_amount or 0)
-    return [ChildTotalOut(child_id=cid, total_amount=totals_map[cid]) for cid in body.child_ids]
+    totals = Donations.get_child_totals(body.child_ids)
+    return [ChildTotalOut(child_id=cid, total_amount=totals[cid]) for cid in body.child_ids]
 
 @router.get("/recent-donors/{child_id}", response_model=List[RecentDonorOut])
 def recent_donors_by_child(child_id: str, k: int = Query(10, gt=0, le=100)):
     """
-    Return up to K most recent **unique** donors (excluding NULL and '0000') for a child.
-    De-dupes by user_id using recent donations first.
+    Return up to K most recent **unique** donors (excluding NULL and '0000') for a child,
+    each with the amount of their latest donation.
     """
-    rows = (
-        Donation
-        .select()
-        .where(
-            (Donation.status == "completed") &
-            (Donation.child_id == child_id) &
-            Donation.user.is_null(False) &
-            (Donation.user_id != "0000")
-        )
-        .order_by(Donation.created_at.desc())
-        .limit(200)  # fetch extra to allow de-dupe
-    )
-    seen = set()
-    out: List[RecentDonorOut] = []
-    for d in rows:
-        if d.user_id in seen:
-            continue
-        seen.add(d.user_id)
-        out.append(
-            RecentDonorOut(
-                user_id=d.user_id,
-                user_name=(d.user.name if d.user else None),
-                amount=float(d.amount),
-                created_at=d.created_at.isoformat() if d.created_at else None,
-            )
+    return [
+        RecentDonorOut(
+            user_id=donor["user_id"],
+            user_name=donor["user_name"],
+            amount=donor["amount"],
+            created_at=donor["created_at"],
         )
-        if len(out) >= k:
-            break
-    return out
+        for donor in Donations.get_recent_child_donors(child_id, k)
+    ]
 
 @router.get("/validate-referral/{referral_code}")
 def validate_referral_code(referral_code: str):
     """Validate if a referral code exists and return referrer info."""
     try:
-        referrer = Users.get_user_by_referral_code(referral_code)
+        referrer = Users.get_cached_user_by_referral_code(referral_code)
         if not referrer:
             return {
                 "valid": False,
@@ -356,8 +307,8 @@ def validate_referral_code(referral_code: str):
         
         return {
             "valid": True,
-            "referrer_name": referrer.get('name', 'Anonymous'),
-            "message": f"Referral code from {referrer.get('name', 'a supporter')}"
+            "referrer_name": referrer.name or 'Anonymous',
+            "message": f"Referral code from {referrer.name or 'a supporter'}"
         }
     except Exception as e:
         return {
@@ -366,11 +317,16 @@ def validate_referral_code(referral_code: str):
         }
 
 @router.post("/bulk/split", response_model=BulkDonateOut, status_code=status.HTTP_201_CREATED)
-def donate_to_all(body: BulkDonateIn):
+def donate_to_all(
+    body: BulkDonateIn,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Split `amount` equally across `child_ids`, each share rounded DOWN to 2dp.
     If `user_id` is provided -> Standard donations; otherwise Guest (anonymous).
     Any leftover remainder (from rounding down) is returned as unallocated.
+    A retry with the same Idempotency-Key (or transaction_id) returns the
+    original response.
     """
     try:
         amount = Decimal(str(body.amount))
@@ -388,29 +344,31 @@ def donate_to_all(body: BulkDonateIn):
 
         donation_type = "Standard" if body.user_id else "Guest"
 
-        created: List[dict] = []
-        for cid in body.child_ids:
-            d = Donations.create_donation(
-                donation_type=donation_type,
-                user_id=body.user_id,            # None => Guest path in your model
-                child_id=cid,
-                amount=float(per),               # model converts to Decimal internally
+        def create():
+            created = Donations.create_bulk_donations(
+                child_ids=body.child_ids,
+                amount=per,
+                user_id=body.user_id,            # None => Guest donations
                 currency=body.currency,
                 payment_method=body.payment_method,
                 transaction_id=body.transaction_id,
             )
-            created.append(d)
-
-        return BulkDonateOut(
-            per_child_amount=float(per),
-            total_requested=float(amount),
-            total_allocated=float(total_allocated),
-            remainder_unallocated=float(remainder),
-            donation_type=donation_type,
-            donations=created,
+            return BulkDonateOut(
+                per_child_amount=float(per),
+                total_requested=float(amount),
+                total_allocated=float(total_allocated),
+                remainder_unallocated=float(remainder),
+                donation_type=donation_type,
+                donations=created,
+            ).dict()
+
+        return idempotency.run_once(
+            "donations.bulk_split", idempotency_key or body.transaction_id, body.dict(), create
         )
     except HTTPException:
         raise
+    except idempotency.IdempotencyConflict as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Bulk split donation failed: {e}")
 
@@ -430,26 +388,53 @@ def get_all_donations(
     return Donations.get_recent_donations(limit)
 
 @router.get("/recent", response_model=List[DonationOut])
+@cached("donations.recent", ("donation", "user", "child", "region"))
 def get_recent_donations(
     limit: int = Query(50, gt=0, le=500)
 ):
     """Get recent donations."""
     return Donations.get_recent_donations(limit)
 
-@router.get("/user/{user_id}", response_model=List[DonationOut])
-def get_donations_by_user(user_id: str):
-    """Get donations by user ID."""
-    return Donations.get_donations_by_user(user_id)
-
-@router.get("/child/{child_id}", response_model=List[DonationOut])
-def get_donations_by_child(child_id: str):
-    """Get donations by child ID."""
-    return Donations.get_donations_by_child(child_id)
-
-@router.get("/region/{region_id}", response_model=List[DonationOut])
-def get_donations_by_region(region_id: str):
-    """Get donations by region ID."""
-    return Donations.get_donations_by_region(region_id)
+@router.get("/user/{user_id}", response_model=DonationPageOut)
+def get_donations_by_user(
+    user_id: str,
+    limit: int = Query(50, gt=0, le=500),
+    cursor: Optional[str] = None
+):
+    """Get donations by user ID, newest first, one page at a time."""
+    try:
+        return Donations.get_donations_by_user(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/user/{user_id}/stats")
+def get_user_donation_stats(user_id: str):
+    """Get a donor's totals: amount, number of donations and children supported."""
+    return Donations.get_user_donation_stats(user_id)
+
+@router.get("/child/{child_id}", response_model=DonationPageOut)
+def get_donations_by_child(
+    child_id: str,
+    limit: int = Query(50, gt=0, le=500),
+    cursor: Optional[str] = None
+):
+    """Get donations by child ID, newest first, one page at a time."""
+    try:
+        return Donations.get_donations_by_child(child_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/region/{region_id}", response_model=DonationPageOut)
+def get_donations_by_region(
+    region_id: str,
+    limit: int = Query(50, gt=0, le=500),
+    cursor: Optional[str] = None
+):
+    """Get donations by region ID, newest first, one page at a time."""
+    try:
+        return Donations.get_donations_by_region(region_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.get("/stats")
 def get_donation_stats(
@@ -459,6 +444,23 @@ def get_donation_stats(
     """Get donation statistics."""
     return Donations.get_donation_stats(region_id, child_id)
 
+@router.get("/leaderboard")
+def get_donation_leaderboard(
+    leaderboard_type: Literal["user", "region", "school"] = "user",
+    period: Literal["daily", "weekly", "monthly", "yearly", "all_time"] = "all_time",
+    limit: int = Query(10, gt=0, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Get a precomputed donation leaderboard."""
+    return Leaderboard.get_leaderboard(leaderboard_type, period, limit, offset)
+
+@router.get("/summaries")
+def get_region_summaries(
+    period: Literal["daily", "weekly", "monthly", "yearly", "all_time"] = "all_time"
+):
+    """Get precomputed per-region donation summaries."""
+    return Donations.get_region_summaries(period)
+
 @router.delete("/{donation_id}")
 def delete_donation(
     donation_id: str,
@@ -471,6 +473,7 @@ def delete_donation(
     try:
         donation = Donation.get(Donation.id == donation_id)
         donation.delete_instance()
+        invalidate("donation")
         return {"message": "Donation deleted successfully"}
     except Donation.DoesNotExist:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Donation not found")
@@ -494,6 +497,7 @@ def update_donation_status(
         
         donation.status = new_status
         donation.save()
+        invalidate("donation")
         
         return Donations._donation_to_dict(donation)
     except Donation.DoesNotExist:
@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
 from typing import List, Optional
 from pydantic import BaseModel
 
-from apps.webui.models.followers import Followers 
+from apps.webui.internal.response_cache import cached
+from apps.webui.models.children import daily_seed
+from apps.webui.models.followers import AsyncFollowers
 from utils.utils import get_current_user
 
 router = APIRouter()
@@ -29,7 +31,7 @@ class TopChildResponse(BaseModel):
 @router.get("/child/{child_id}/followers", response_model=List[FollowerResponse])
 async def get_followers_by_child(child_id: str):
     try:
-        followers = Followers.get_followers_by_child(child_id)
+        followers = await AsyncFollowers.get_followers_by_child(child_id)
         return followers
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Error retrieving followers: {str(e)}")
@@ -40,7 +42,7 @@ async def get_followers_by_child(child_id: str):
 @router.get("/user/{user_id}/following", response_model=List[FollowedChildResponse])
 async def get_children_followed_by_user(user_id: str):
     try:
-        following = Followers.get_children_followed_by_user(user_id)
+        following = await AsyncFollowers.get_children_followed_by_user(user_id)
         return following
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Error retrieving following: {str(e)}")
@@ -54,7 +56,7 @@ async def follow_child(
     user_id: str = Query(..., alias="userId"),
 ):
     try:
-        success = Followers.create_follower(user_id, child_id)
+        success = await AsyncFollowers.create_follower(user_id, child_id)
         if not success:
             raise HTTPException(
                 status.HTTP_409_CONFLICT,
@@ -78,7 +80,7 @@ async def unfollow_child(
     user_id: str = Query(..., alias="userId"),
 ):
     try:
-        success = Followers.delete_follower(user_id, child_id)
+        success = await AsyncFollowers.delete_follower(user_id, child_id)
         if not success:
             raise HTTPException(
                 status.HTTP_404_NOT_FOUND,
@@ -99,11 +101,16 @@ async def unfollow_child(
 @router.get("/top/{k}", response_model=List[TopChildResponse])
 async def get_top_children_by_followers(k: int = Path(gt=0, description="Number of top children to return")):
     try:
-        top_children = Followers.get_top_k_children_by_followers(k)
-        return top_children
+        # Ties are ordered by the day's seed, so it is part of the cache key
+        return await _get_top_children_by_followers(k, daily_seed())
     except Exception as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=f"Error retrieving top children: {str(e)}")
 
+
+@cached("followers.top", ("child",))
+async def _get_top_children_by_followers(k: int, seed: int):
+    return await AsyncFollowers.get_top_k_children_by_followers(k, seed=seed)
+
 class IsFollowingResponse(BaseModel):
     user_id: str
     child_id: str
@@ -119,7 +126,7 @@ async def is_user_following_child(
     Example: GET /followers/is-following?userId=USER123&childId=CHILD456
     """
     try:
-        following = Followers.is_following(user_id, child_id)
+        following = await AsyncFollowers.is_following(user_id, child_id)
         return IsFollowingResponse(user_id=user_id, child_id=child_id, is_following=following)
     except Exception as e:
         raise HTTPException(
@@ -7,11 +7,11 @@ import logging
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
-from apps.webui.models.posts import Posts
+from apps.webui.models.posts import Posts, AsyncPosts
+from apps.webui.internal.response_cache import cached
 from apps.webui.models.posts_schemas import PostCreateRequest, PostUpdateRequest, PostResponse
 from utils.utils import get_current_user
-import apps.webui.models.followers as followers_models
-from peewee import fn
+from apps.webui.models.followers import AsyncFollowers
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -42,7 +42,7 @@ async def create_post(
             media_urls.append(form_data.picture_link)
         # video_link should NOT be added to media_urls - it's stored separately
 
-        post = Posts.create_post(
+        post = await AsyncPosts.create_post(
             child_id=form_data.child_id,
             title="",
             comments="",
@@ -76,7 +76,7 @@ async def create_post(
 @router.get("/child/{child_id}/recent", response_model=PostResponse)
 async def get_most_recent_post_by_child(child_id: str):
     try:
-        posts = Posts.get_posts_by_child(child_id, limit=1)
+        posts = await AsyncPosts.get_posts_by_child(child_id, limit=1)
         if posts:
             return posts[0]
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No posts found for this child")
@@ -98,10 +98,10 @@ async def get_posts_by_child(
 
         # Try model methods that might support offset
         try:
-            results = Posts.get_posts_by_child(child_id, limit=fetch_n, offset=offset)
+            results = await AsyncPosts.get_posts_by_child(child_id, limit=fetch_n, offset=offset)
         except TypeError:
             # Fallback: fetch more and slice
-            bulk = Posts.get_posts_by_child(child_id, limit=offset + fetch_n)
+            bulk = await AsyncPosts.get_posts_by_child(child_id, limit=offset + fetch_n)
             results = bulk[offset: offset + fetch_n]
 
         has_next = len(results) > limit
@@ -124,10 +124,10 @@ async def get_posts_by_region(
 
         # Try model methods that might support offset
         try:
-            results = Posts.get_posts_by_region(region_id, limit=fetch_n, offset=offset)
+            results = await AsyncPosts.get_posts_by_region(region_id, limit=fetch_n, offset=offset)
         except TypeError:
             # Fallback: fetch more and slice
-            bulk = Posts.get_posts_by_region(region_id, limit=offset + fetch_n)
+            bulk = await AsyncPosts.get_posts_by_region(region_id, limit=offset + fetch_n)
             results = bulk[offset: offset + fetch_n]
 
         has_next = len(results) > limit
@@ -142,7 +142,7 @@ async def get_posts_by_region(
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post_by_id(post_id: str):
     try:
-        post = Posts.get_post_by_id(post_id)
+        post = await AsyncPosts.get_post_by_id(post_id)
         if not post:
             raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Post not found")
         return post
@@ -157,7 +157,7 @@ async def get_post_by_id(post_id: str):
 @router.put("/{post_id}", response_model=PostResponse)
 async def update_post(post_id: str, form_data: PostUpdateRequest, user=Depends(get_current_user)):
     try:
-        existing_post = Posts.get_post_by_id(post_id)
+        existing_post = await AsyncPosts.get_post_by_id(post_id)
         if not existing_post:
             raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Post not found")
         
@@ -194,7 +194,7 @@ async def update_post(post_id: str, form_data: PostUpdateRequest, user=Depends(g
             update_data["video_link"] = form_data.video_link
         
         # Perform the update
-        updated_post = Posts.update_post(post_id, **update_data)
+        updated_post = await AsyncPosts.update_post(post_id, **update_data)
         
         if not updated_post:
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update post")
@@ -211,14 +211,14 @@ async def update_post(post_id: str, form_data: PostUpdateRequest, user=Depends(g
 @router.delete("/{post_id}", response_model=bool)
 async def delete_post(post_id: str, user=Depends(get_current_user)):
     try:
-        existing_post = Posts.get_post_by_id(post_id)
+        existing_post = await AsyncPosts.get_post_by_id(post_id)
         if not existing_post:
             raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Post not found")
 
         if existing_post["author_id"] != user.id and user.role != "admin":
             raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this post")
 
-        success = Posts.delete_post(post_id)
+        success = await AsyncPosts.delete_post(post_id)
         if not success:
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete post")
         return success
@@ -231,6 +231,24 @@ async def delete_post(post_id: str, user=Depends(get_current_user)):
 # Get Posts
 ############################
 
+@cached("posts.page", ("post", "child"))
+async def _get_posts_page(sort: SortOrder, offset: int, fetch_n: int) -> list:
+    """One page of posts, before the per-user follow_status is added"""
+    if sort == SortOrder.recent:
+        try:
+            return await AsyncPosts.get_all_posts(limit=fetch_n, offset=offset)
+        except TypeError:
+            bulk = await AsyncPosts.get_all_posts(limit=offset + fetch_n)
+            return bulk[offset: offset + fetch_n]
+    elif sort == SortOrder.likes:
+        try:
+            return await AsyncPosts.get_trending_posts(days=365, limit=fetch_n, offset=offset)
+        except TypeError:
+            bulk = await AsyncPosts.get_trending_posts(days=365, limit=offset + fetch_n)
+            return bulk[offset: offset + fetch_n]
+    else:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid sort parameter")
+
 @router.get("/", response_model=PaginatedPosts, response_model_exclude_none=True)
 async def get_posts(
     sort: SortOrder = Query(SortOrder.recent, description="Sort by 'recent' or 'likes'"),
@@ -242,72 +260,21 @@ async def get_posts(
         offset = (page - 1) * limit
         fetch_n = limit + 1
 
-        if sort == SortOrder.recent:
-            try:
-                results = Posts.get_all_posts(limit=fetch_n, offset=offset)
-            except TypeError:
-                bulk = Posts.get_all_posts(limit=offset + fetch_n)
-                results = bulk[offset: offset + fetch_n]
-        elif sort == SortOrder.likes:
-            try:
-                results = Posts.get_trending_posts(days=365, limit=fetch_n, offset=offset)
-            except TypeError:
-                bulk = Posts.get_trending_posts(days=365, limit=offset + fetch_n)
-                results = bulk[offset: offset + fetch_n]
-        else:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid sort parameter")
+        results = await _get_posts_page(sort, offset, fetch_n)
 
         has_next = len(results) > limit
-        items = results[:limit]
+        # Copies, as the page is shared with other requests through the cache
+        items = [dict(p) for p in results[:limit]]
 
         # Enrich with follow_status only when userId is supplied
         if user_id:
-            uid_norm = str(user_id).strip().lower()
-            child_ids = {p.get("child_id") for p in items if p.get("child_id")}
+            child_ids = list({p.get("child_id") for p in items if p.get("child_id")})
             if child_ids:
-                # Normalize DB columns (trim + remove CR/LF + NBSP + ZWSP) and compare lowercase
-                norm_user_col = fn.lower(
-                    fn.replace(
-                        fn.replace(
-                            fn.replace(
-                                fn.replace(fn.trim(followers_models.Follower.user_id), '\r', ''),
-                                '\n', ''
-                            ),
-                            '\u00A0', ''  # NBSP
-                        ),
-                        '\u200B', ''    # zero-width space
-                    )
-                )
-                norm_child_col = fn.lower(
-                    fn.replace(
-                        fn.replace(
-                            fn.replace(
-                                fn.replace(fn.trim(followers_models.Follower.child_id), '\r', ''),
-                                '\n', ''
-                            ),
-                            '\u00A0', ''
-                        ),
-                        '\u200B', ''
-                    )
-                )
-
-                norm_child_ids = [str(cid).strip().lower() for cid in child_ids]
-
-                rows = (
-                    followers_models.Follower
-                    .select(followers_models.Follower.child_id)
-                    .where(
-                        (norm_user_col == uid_norm) &
-                        (norm_child_col.in_(norm_child_ids))
-                    )
-                )
-
-                followed_set_norm = {str(r.child_id).strip().lower() for r in rows}
-
+                follow_status = await AsyncFollowers.follow_status_for(user_id, child_ids)
                 for p in items:
                     cid = p.get("child_id")
                     if cid is not None:
-                        p["follow_status"] = (str(cid).strip().lower() in followed_set_norm)
+                        p["follow_status"] = follow_status.get(cid, False)
 
         return PaginatedPosts(items=items, page=page, limit=limit, has_next=has_next)
 
@@ -453,7 +420,7 @@ async def upload_to_youtube(
     """Manually trigger YouTube upload for a post"""
     try:
         # Check if user has permission
-        post = Posts.get_post_by_id(post_id)
+        post = await AsyncPosts.get_post_by_id(post_id)
         if not post:
             raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Post not found")
         
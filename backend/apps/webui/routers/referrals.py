@@ -4,6 +4,7 @@ from typing import Optional, List, Dict, Literal
 from datetime import datetime, timedelta
 
 from utils.utils import get_current_user
+from apps.webui.internal.response_cache import cached
 from apps.webui.models.referrals import Referrals, ReferralTracking, ReferralReward
 from apps.webui.models.users import Users, User
 from apps.webui.models.donations import Donation
@@ -151,6 +152,7 @@ def calculate_tier(total_amount: float, referral_count: int) -> ReferralTier:
 # =========================
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
+@cached("referrals.leaderboard", ("referral", "user"))
 def get_referral_leaderboard(
     period: Literal["all_time", "monthly", "weekly", "daily"] = Query("all_time"),
     limit: int = Query(20, ge=1, le=100)
@@ -189,18 +191,12 @@ def get_referral_leaderboard(
                 if idx == 1 and leaderboard_data:
                     badges.append("🏆 #1")
                 
-                # Get referral code safely
-                user = Users.get_user_by_id(user_data['id'])
-                referral_code = ""
-                if user and hasattr(user, 'referral_code'):
-                    referral_code = user.referral_code or ""
-                
                 entries.append(LeaderboardEntry(
-                    rank=idx,
+                    rank=entry.get('rank', idx),
                     user_id=user_data['id'],
                     user_name=user_data.get('name', 'Anonymous'),
                     profile_image_url=user_data.get('profile_image_url'),
-                    referral_code=referral_code,
+                    referral_code=user_data.get('referral_code') or "",
                     total_referrals=entry.get('referral_count', 0),
                     total_donations=entry.get('total_donations', 0),
                     tier=tier.name,
@@ -218,10 +214,14 @@ def get_referral_leaderboard(
         print(f"Error in get_referral_leaderboard: {e}")
         import traceback
         traceback.print_exc()
-        # Return empty list instead of raising error
-        return []
+        # Not a response the cache may keep
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch referral leaderboard: {str(e)}"
+        )
 
 @router.get("/wall-of-fame", response_model=List[WallOfFameEntry])
+@cached("referrals.wall_of_fame", ("referral", "user"))
 def get_wall_of_fame(limit: int = Query(10, ge=1, le=50)):
     """Get the Wall of Fame - top achievers with special recognition"""
     try:
@@ -283,14 +283,18 @@ def get_wall_of_fame(limit: int = Query(10, ge=1, le=50)):
         print(f"Error in get_wall_of_fame: {e}")
         import traceback
         traceback.print_exc()
-        # Return empty list instead of raising error
-        return []
+        # Not a response the cache may keep
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch wall of fame: {str(e)}"
+        )
 
 # =========================
 # Summary Statistics
 # =========================
 
 @router.get("/summary-stats")
+@cached("referrals.summary_stats", ("referral",))
 def get_referral_summary_stats():
     """Get aggregate referral statistics for the dashboard"""
     try:
@@ -341,13 +345,11 @@ def get_referral_summary_stats():
         print(f"Error in get_referral_summary_stats: {e}")
         import traceback
         traceback.print_exc()
-        # Return default values on error
-        return {
-            "total_referrers": 0,
-            "monthly_referrals": 0,
-            "total_impact": 0,
-            "top_tier": "Ready!"
-        }
+        # Not a response the cache may keep
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch referral summary stats: {str(e)}"
+        )
 
 # =========================
 # User Referral Stats
@@ -389,12 +391,7 @@ def get_user_referral_stats(user_id: str, user=Depends(get_current_user)):
             badges.append("Visionary")
         
         # Get leaderboard rank
-        leaderboard = Referrals.get_referral_leaderboard(period="all_time", limit=100)
-        rank = None
-        for idx, entry in enumerate(leaderboard, 1):
-            if entry['user']['id'] == user_id:
-                rank = idx
-                break
+        rank = Referrals.get_referrer_rank(user_id, period="all_time")
         
         # Handle created_at which might be a Unix timestamp or datetime
         created_at = user_data.get('created_at') if isinstance(user_data, dict) else user_data.created_at
@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, Field
 from typing import List
 
+from apps.webui.internal.response_cache import cached
 from apps.webui.models.regions import Regions
 
 router = APIRouter()
@@ -20,6 +21,7 @@ def create_region(body: RegionCreate):
     return Regions.create_region(body.name)
 
 @router.get("/", response_model=List[dict])
+@cached("regions.list", ("region",))
 def list_regions():
     return Regions.get_all_regions()
 
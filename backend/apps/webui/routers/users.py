@@ -1,5 +1,5 @@
 from fastapi import Response, Request
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, status
 from datetime import datetime, timedelta
 from typing import List, Union, Optional
 
@@ -14,9 +14,9 @@ from apps.webui.models.users import (
     UserUpdateForm,
     UserRoleUpdateForm,
     UserSettings,
-    Users,
+    AsyncUsers,
 )
-from apps.webui.models.auths import Auths
+from apps.webui.models.auths import AsyncAuths
 
 from utils.utils import (
     get_verified_user,
@@ -38,9 +38,24 @@ router = APIRouter()
 ############################
 
 
-@router.get("/", response_model=List[UserModel])
-async def get_users(skip: int = 0, limit: int = 50, user=Depends(get_admin_user)):
-    return Users.get_users(skip, limit)
+class UserPageOut(BaseModel):
+    users: List[UserModel]
+    next_cursor: Optional[str] = None  # pass as `cursor` to get the next page
+
+
+@router.get("/", response_model=UserPageOut)
+async def get_users(
+    limit: int = Query(50, gt=0, le=500),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    search: Optional[str] = None,
+    user=Depends(get_admin_user),
+):
+    """Users, newest first, one page at a time."""
+    try:
+        return await AsyncUsers.get_user_page(limit, cursor, role, search)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 ############################
@@ -69,8 +84,9 @@ async def update_user_permissions(
 @router.post("/update/role", response_model=Optional[UserModel])
 async def update_user_role(form_data: UserRoleUpdateForm, user=Depends(get_admin_user)):
 
-    if user.id != form_data.id and form_data.id != Users.get_first_user().id:
-        return Users.update_user_role_by_id(form_data.id, form_data.role)
+    first_user = await AsyncUsers.get_first_user()
+    if user.id != form_data.id and form_data.id != first_user.id:
+        return await AsyncUsers.update_user_role_by_id(form_data.id, form_data.role)
 
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -85,7 +101,7 @@ async def update_user_role(form_data: UserRoleUpdateForm, user=Depends(get_admin
 
 @router.get("/user/settings", response_model=Optional[UserSettings])
 async def get_user_settings_by_session_user(user=Depends(get_verified_user)):
-    user = Users.get_user_by_id(user.id)
+    user = await AsyncUsers.get_user_by_id(user.id)
     if user:
         return user.settings
     else:
@@ -104,7 +120,7 @@ async def get_user_settings_by_session_user(user=Depends(get_verified_user)):
 async def update_user_settings_by_session_user(
     form_data: UserSettings, user=Depends(get_verified_user)
 ):
-    user = Users.update_user_by_id(user.id, {"settings": form_data.model_dump()})
+    user = await AsyncUsers.update_user_by_id(user.id, {"settings": form_data.model_dump()})
     if user:
         return user.settings
     else:
@@ -121,7 +137,7 @@ async def update_user_settings_by_session_user(
 
 @router.get("/user/info", response_model=Optional[dict])
 async def get_user_info_by_session_user(user=Depends(get_verified_user)):
-    user = Users.get_user_by_id(user.id)
+    user = await AsyncUsers.get_user_by_id(user.id)
     if user:
         return user.info
     else:
@@ -140,12 +156,12 @@ async def get_user_info_by_session_user(user=Depends(get_verified_user)):
 async def update_user_settings_by_session_user(
     form_data: dict, user=Depends(get_verified_user)
 ):
-    user = Users.get_user_by_id(user.id)
+    user = await AsyncUsers.get_user_by_id(user.id)
     if user:
         if user.info is None:
             user.info = {}
 
-        user = Users.update_user_by_id(user.id, {"info": {**user.info, **form_data}})
+        user = await AsyncUsers.update_user_by_id(user.id, {"info": {**user.info, **form_data}})
         if user:
             return user.info
         else:
@@ -176,7 +192,7 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
     # Check if user_id is a shared chat
     # If it is, get the user_id from the chat
 
-    user = Users.get_user_by_id(user_id)
+    user = await AsyncUsers.get_user_by_id(user_id)
 
     if user:
         return UserResponse(name=user.name, profile_image_url=user.profile_image_url)
@@ -196,11 +212,11 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
 async def update_user_by_id(
     user_id: str, form_data: UserUpdateForm, session_user=Depends(get_admin_user)
 ):
-    user = Users.get_user_by_id(user_id)
+    user = await AsyncUsers.get_user_by_id(user_id)
 
     if user:
         if form_data.email.lower() != user.email:
-            email_user = Users.get_user_by_email(form_data.email.lower())
+            email_user = await AsyncUsers.get_user_by_email(form_data.email.lower())
             if email_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -210,10 +226,10 @@ async def update_user_by_id(
         if form_data.password:
             hashed = get_password_hash(form_data.password)
             log.debug(f"hashed: {hashed}")
-            Auths.update_user_password_by_id(user_id, hashed)
+            await AsyncAuths.update_user_password_by_id(user_id, hashed)
 
-        Auths.update_email_by_id(user_id, form_data.email.lower())
-        updated_user = Users.update_user_by_id(
+        await AsyncAuths.update_email_by_id(user_id, form_data.email.lower())
+        updated_user = await AsyncUsers.update_user_by_id(
             user_id,
             {
                 "name": form_data.name,
@@ -242,7 +258,7 @@ async def update_user_by_id(
 
 @router.get("/email/{email}", response_model=str)
 async def get_user_by_email(email: str, user=Depends(get_admin_user)):
-    user = Users.get_user_by_email(email)
+    user = await AsyncUsers.get_user_by_email(email)
     if user:
         return user.id
     else:
@@ -261,7 +277,7 @@ async def get_user_by_email(email: str, user=Depends(get_admin_user)):
 @router.delete("/{user_id}", response_model=bool)
 async def delete_user_by_id(user_id: str, user=Depends(get_admin_user)):
     if user.id != user_id:
-        result = Auths.delete_auth_by_id(user_id)
+        result = await AsyncAuths.delete_auth_by_id(user_id)
 
         if result:
             return True
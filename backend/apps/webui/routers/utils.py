@@ -11,6 +11,8 @@ import black
 
 
 from apps.webui.internal.db import DB
+from apps.webui.internal.response_cache import response_cache
+from apps.webui.internal.scheduler import get_jobs_status
 from utils.utils import get_admin_user
 
 from config import ENABLE_ADMIN_EXPORT
@@ -119,3 +121,17 @@ async def download_db(user=Depends(get_admin_user)):
         filename="webui.db",
     )
 
+
+@router.get("/db/pool")
+async def get_db_pool_stats(user=Depends(get_admin_user)):
+    return DB.pool_stats()
+
+
+@router.get("/jobs")
+def get_background_jobs(user=Depends(get_admin_user)):
+    return get_jobs_status()
+
+
+@router.get("/cache")
+def get_response_cache_stats(user=Depends(get_admin_user)):
+    return response_cache.get_stats()
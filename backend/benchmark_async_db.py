@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark p99 latency of async routes under mixed read/write load, with model
+calls run inline on the event loop (before) and offloaded to the database
+executor (after).
+
+Usage: python benchmark_async_db.py [--requests 400] [--concurrency 16]
+"""
+
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+import apps.webui.internal.executor as executor
+from apps.webui.models.users import Users
+from apps.webui.models.children import Children
+from main import app
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(total, concurrency, user_ids, child_ids):
+    latencies = {"read": [], "write": [], "health": []}
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i):
+            user_id = user_ids[i % len(user_ids)]
+            child_id = child_ids[i % len(child_ids)]
+            kind = ("read", "read", "write", "health")[i % 4]
+            async with semaphore:
+                start = time.perf_counter()
+                if kind == "read":
+                    await client.get("/api/v1/posts/", params={"userId": user_id})
+                elif kind == "write":
+                    params = {"userId": user_id, "childId": child_id}
+                    await client.post("/api/v1/followers/follow", params=params)
+                    await client.delete("/api/v1/followers/unfollow", params=params)
+                else:
+                    # Does not touch the database: measures event loop stalls
+                    await client.get("/health")
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, elapsed
+
+
+def report(label, latencies, elapsed, total):
+    print(f"\n{label}: {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        print(
+            f"   {kind:<7} n={len(values):<4} "
+            f"p50={statistics.median(values):7.1f}ms "
+            f"p99={percentile(values, 99):7.1f}ms "
+            f"max={max(values):7.1f}ms"
+        )
+
+
+def benchmark_async_db(total=400, concurrency=16):
+    print("Benchmarking async database access...")
+    print("=" * 50)
+
+    user_ids = [user.id for user in Users.get_users()] or ["bench-user"]
+    child_ids = [child["id"] for child in Children.get_all_children()] or ["bench-child"]
+
+    results = {}
+    for label, offload in (("Inline (before)", False), ("Offloaded (after)", True)):
+        executor.DATABASE_ASYNC_OFFLOAD = offload
+        latencies, elapsed = asyncio.run(
+            run_load(total, concurrency, user_ids, child_ids)
+        )
+        report(label, latencies, elapsed, total)
+        results[label] = latencies
+
+    print("\nSummary (p99 of requests that do not touch the database):")
+    for label, latencies in results.items():
+        print(f"   {label:<18} {percentile(latencies['health'], 99):7.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    benchmark_async_db(args.requests, args.concurrency)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark a full leaderboard rebuild against the incremental per-donation
+update, on generated datasets of 100k and 1M donations.
+
+Each size runs in its own subprocess with a fresh DATA_DIR, so the timings do
+not share a database or a warm page cache.
+
+Usage: python benchmark_leaderboard.py [--sizes 100000 1000000] [--samples 200]
+"""
+
+import sys
+import os
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Loads a dataset, then times a rebuild and a batch of incremental updates
+BENCH_SCRIPT = """
+import json, sys, time
+from apps.webui.internal.startup import run_startup
+from apps.webui.internal.seeding import generate_dataset
+from apps.webui.models.donations import Donation
+from apps.webui.models.leaderboard import Leaderboard
+
+donations, samples = int(sys.argv[1]), int(sys.argv[2])
+run_startup()
+loaded = generate_dataset(
+    users=max(1_000, donations // 50),
+    children=max(100, donations // 1_000),
+    donations=donations,
+    followers=0,
+    posts=0,
+    referrals=0,
+    prefix="bench",
+)
+
+start = time.perf_counter()
+entries = Leaderboard.rebuild_leaderboards()
+rebuild_ms = (time.perf_counter() - start) * 1000
+
+sample = list(Donation.select().where(Donation.id.startswith("bench-")).limit(samples))
+start = time.perf_counter()
+for donation in sample:
+    Leaderboard.record_donation(donation)
+incremental_ms = (time.perf_counter() - start) * 1000 / max(1, len(sample))
+
+start = time.perf_counter()
+Leaderboard.get_leaderboard("user", "all_time", limit=10, offset=100)
+read_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    "load_s": loaded["seconds"],
+    "entries": entries,
+    "rebuild_ms": rebuild_ms,
+    "incremental_ms": incremental_ms,
+    "read_ms": read_ms,
+}))
+"""
+
+
+def run_size(donations, samples):
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, "DATA_DIR": data_dir}
+        result = subprocess.run(
+            [sys.executable, "-c", BENCH_SCRIPT, str(donations), str(samples)],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr[-2000:]
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_leaderboard(sizes=(100_000, 1_000_000), samples=200):
+    print("Benchmarking leaderboard maintenance...")
+    print("=" * 50)
+
+    for donations in sizes:
+        print(f"\n{donations:,} donations")
+        result = run_size(donations, samples)
+        print(f"   - Dataset load: {result['load_s']:.1f}s")
+        print(f"   - Full rebuild: {result['rebuild_ms']:.0f}ms ({result['entries']} entries)")
+        print(f"   - Incremental update: {result['incremental_ms']:.2f}ms per donation")
+        print(f"   - Page read with ranks: {result['read_ms']:.1f}ms")
+
+    print("\n" + "=" * 50)
+    print("Benchmark complete!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    benchmark_leaderboard(args.sizes, args.samples)
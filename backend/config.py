@@ -633,3 +633,85 @@ else:
 ####################################
 
 DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DATA_DIR}/webui.db")
+
+# Connection pool. Connections are checked out per request and returned to the
+# pool when the response is sent.
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", "20"))
+DATABASE_POOL_MIN_SIZE = int(os.environ.get("DATABASE_POOL_MIN_SIZE", "1"))
+# Seconds to wait for a free connection before failing the request
+DATABASE_POOL_TIMEOUT = int(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+# Seconds after which a connection is closed instead of being reused
+DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", "3600"))
+# Seconds an idle connection above the minimum size is kept open
+DATABASE_POOL_IDLE_TIMEOUT = int(os.environ.get("DATABASE_POOL_IDLE_TIMEOUT", "300"))
+
+# Worker threads shared by sync routes and the model-table calls made from
+# async routes, so a slow query does not stall the event loop. Bounded by the
+# pool size by default, so they cannot wait on each other for connections.
+DATABASE_EXECUTOR_WORKERS = int(
+    os.environ.get("DATABASE_EXECUTOR_WORKERS", str(DATABASE_POOL_SIZE))
+)
+DATABASE_ASYNC_OFFLOAD = (
+    os.environ.get("DATABASE_ASYNC_OFFLOAD", "True").lower() == "true"
+)
+
+# Seconds an authenticated user stays cached in-process after it was loaded.
+# Updates made through UsersTable invalidate it right away; 0 disables it.
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "30"))
+# Seconds between batched writes of users' last_active_at timestamps
+USER_LAST_ACTIVE_FLUSH_INTERVAL = int(
+    os.environ.get("USER_LAST_ACTIVE_FLUSH_INTERVAL", "60")
+)
+# Referral link clicks are counted in memory and written in batches every
+# REFERRAL_CLICK_FLUSH_INTERVAL seconds, or as soon as REFERRAL_CLICK_MAX_PENDING
+# clicks are buffered; at most that many clicks are lost if a worker crashes.
+# An interval of 0 writes every click immediately.
+REFERRAL_CLICK_FLUSH_INTERVAL = int(os.environ.get("REFERRAL_CLICK_FLUSH_INTERVAL", "5"))
+REFERRAL_CLICK_MAX_PENDING = int(os.environ.get("REFERRAL_CLICK_MAX_PENDING", "1000"))
+
+# Seconds public read endpoints (children, regions, donation and referral
+# leaderboards, posts) cache their responses; writes through the models
+# invalidate them right away. 0 disables the cache.
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_MAXSIZE = int(os.environ.get("RESPONSE_CACHE_MAXSIZE", "1000"))
+# Redis URL of a cache shared by all workers; the cache is per process when unset
+RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL", "")
+
+# Seconds the set of children each user follows is cached for feed follow
+# status, for up to FOLLOW_SET_CACHE_MAXSIZE users. Follows and unfollows
+# update it right away. 0 disables the cache.
+FOLLOW_SET_CACHE_TTL = int(os.environ.get("FOLLOW_SET_CACHE_TTL", "300"))
+FOLLOW_SET_CACHE_MAXSIZE = int(os.environ.get("FOLLOW_SET_CACHE_MAXSIZE", "10000"))
+# Redis URL of a follow set cache shared by all workers; per process when unset
+FOLLOW_SET_CACHE_REDIS_URL = os.environ.get(
+    "FOLLOW_SET_CACHE_REDIS_URL", RESPONSE_CACHE_REDIS_URL
+)
+
+####################################
+# Background jobs
+####################################
+
+ENABLE_BACKGROUND_JOBS = (
+    os.environ.get("ENABLE_BACKGROUND_JOBS", "True").lower() == "true"
+)
+# Seconds between refreshes of the precomputed leaderboards and donation
+# summaries; 0 disables the job
+LEADERBOARD_REFRESH_INTERVAL = int(os.environ.get("LEADERBOARD_REFRESH_INTERVAL", "300"))
+DONATION_SUMMARY_REFRESH_INTERVAL = int(
+    os.environ.get("DONATION_SUMMARY_REFRESH_INTERVAL", "300")
+)
+# Per-child donation aggregates are kept up to date as donations are made;
+# the rebuild reconciles deleted donations and status changes
+CHILD_AGGREGATE_REFRESH_INTERVAL = int(
+    os.environ.get("CHILD_AGGREGATE_REFRESH_INTERVAL", "3600")
+)
+# Follower counts are kept up to date as users follow and unfollow; the
+# reconciliation fixes drift from follows written around the models
+FOLLOWER_COUNT_SYNC_INTERVAL = int(os.environ.get("FOLLOWER_COUNT_SYNC_INTERVAL", "3600"))
+# Seconds between runs of the outbox drain, which applies the side effects of
+# donations (referral tracking, leaderboards) after they committed
+OUTBOX_DRAIN_INTERVAL = int(os.environ.get("OUTBOX_DRAIN_INTERVAL", "2"))
+# Seconds a donation idempotency key (the Idempotency-Key header or
+# transaction_id) is remembered, and between purges of expired keys
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+IDEMPOTENCY_PURGE_INTERVAL = int(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL", "3600"))
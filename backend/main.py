@@ -43,7 +43,12 @@ from apps.webui.main import (
 from pydantic import BaseModel
 from typing import List, Optional, Iterator, Generator, Union
 
+from apps.webui.internal.db import DB
+from apps.webui.internal.executor import configure_db_threads
+from apps.webui.internal.scheduler import start_scheduler, stop_scheduler
+from apps.webui.internal.startup import run_startup
 from apps.webui.models.auths import Auths
+from apps.webui.models.referrals import Referrals
 from apps.webui.models.users import Users
 
 
@@ -113,7 +118,21 @@ v{VERSION} - building the best AI user interface.
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Migrations and seeding only run when the schema or seed data changed
+    run_startup()
+    # Hand the connection used for startup back to the pool
+    if not DB.is_closed():
+        DB.close()
+    # Sync routes and offloaded database calls share one bounded thread pool
+    configure_db_threads()
+    # Refresh leaderboards and donation summaries in the background
+    start_scheduler()
     yield
+    stop_scheduler()
+    # Write the last_active_at updates and referral clicks that are still buffered
+    Users.last_active.stop()
+    Referrals.clicks.stop()
+    DB.close_all()
 
 
 app = FastAPI(
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the per-child donation aggregates match the donations
+they summarize, both after a rebuild and as new donations are made
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from peewee import fn
+
+from apps.webui.models.donations import Donations, Donation
+from test_donation_queries import seeded_dataset
+
+PREFIX = "test-aggregates"
+
+
+def live_donors(child_id: str) -> dict:
+    """Per-donor totals of a child, aggregated from the donation rows"""
+    query = (
+        Donation.select(
+            Donation.user,
+            fn.SUM(Donation.amount),
+            fn.COUNT(Donation.id),
+            fn.MAX(Donation.amount),
+        )
+        .where(
+            (Donation.status == "completed")
+            & (Donation.child == child_id)
+            & Donation.user.is_null(False)
+            & (Donation.user != "0000")
+        )
+        .group_by(Donation.user)
+        .tuples()
+    )
+    return {
+        user_id: (round(float(total), 2), count, round(float(max_amount), 2))
+        for user_id, total, count, max_amount in query
+    }
+
+
+def stored_donors(child_id: str) -> dict:
+    return {
+        donor["user_id"]: (
+            round(donor["total_amount"], 2),
+            donor["donation_count"],
+            round(donor["max_amount"], 2),
+        )
+        for donor in Donations.get_top_child_donors(child_id, limit=1000)
+    }
+
+
+def live_total(child_id: str) -> float:
+    total = Donation.select(fn.SUM(Donation.amount)).where(
+        (Donation.status == "completed") & (Donation.child == child_id)
+    ).scalar()
+    return round(float(total or 0), 2)
+
+
+def test_child_aggregates():
+    print("Testing Per-Child Donation Aggregates...")
+    print("=" * 50)
+
+    created = None
+    with seeded_dataset(PREFIX, users=30, children=3, donations=500):
+        try:
+            donation = Donation.select().where(
+                Donation.id.startswith(f"{PREFIX}-")
+                & Donation.child.is_null(False)
+                & Donation.user.is_null(False)
+                & (Donation.user != "0000")
+            ).first()
+            child_id, user_id = donation.child_id, donation.user_id
+
+            print("\n1. Rebuild...")
+            written = Donations.rebuild_child_aggregates()
+            print(f"   - {written} aggregate rows")
+            assert stored_donors(child_id) == live_donors(child_id)
+            assert round(Donations.get_child_totals([child_id])[child_id], 2) == live_total(child_id)
+            print("   ✓ Matches the donations")
+
+            print("\n2. New donation...")
+            created = Donations.create_donation(
+                donation_type="Standard", user_id=user_id, child_id=child_id, amount=1234.56
+            )
+            assert stored_donors(child_id) == live_donors(child_id)
+            assert round(Donations.get_child_totals([child_id])[child_id], 2) == live_total(child_id)
+
+            # The dataset may already hold a larger gift, so find the donor's row
+            top_single = {
+                d["user_id"]: d
+                for d in Donations.get_top_single_child_donors(child_id, limit=1000)
+            }[user_id]
+            recent = Donations.get_recent_child_donors(child_id, limit=1)[0]
+            assert top_single["max_amount"] == live_donors(child_id)[user_id][2] >= 1234.56
+            assert recent["user_id"] == user_id and recent["amount"] == 1234.56
+            print("   ✓ Recorded without a rebuild")
+
+            print("\n3. Recent donors are unique...")
+            recent = Donations.get_recent_child_donors(child_id, limit=100)
+            assert len({d["user_id"] for d in recent}) == len(recent)
+            print(f"   ✓ {len(recent)} distinct donors")
+        finally:
+            if created:
+                Donation.delete().where(Donation.id == created["id"]).execute()
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_child_aggregates()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script to verify retried donation requests with the same idempotency
+key return the original donation instead of creating another one
+"""
+
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps.webui.internal import idempotency
+from apps.webui.internal.idempotency import IdempotencyKey
+from apps.webui.internal.startup import run_startup
+from apps.webui.models.donations import Donations, Donation
+
+
+def test_donation_idempotency():
+    print("Testing Donation Idempotency Keys...")
+    print("=" * 50)
+
+    run_startup()
+    key = f"test-idempotency-{uuid.uuid4().hex}"
+    request = {"amount": 12.5, "currency": "HKD", "transaction_id": key}
+    created = []
+
+    def create():
+        donation = Donations.create_donation(
+            donation_type="Quick", amount=12.5, transaction_id=key
+        )
+        created.append(donation["id"])
+        return donation
+
+    try:
+        print("\n1. First request...")
+        first = idempotency.run_once("donations.quick", key, request, create)
+        print(f"   - Created donation {first['id']}")
+
+        print("\n2. Retried request with the same key...")
+        second = idempotency.run_once("donations.quick", key, request, create)
+        assert second["id"] == first["id"], "Retry returned a different donation"
+        assert len(created) == 1, f"Retry ran the write again ({len(created)} writes)"
+        assert Donation.select().where(Donation.transaction_id == key).count() == 1
+        print("   ✓ Original donation returned, nothing written")
+
+        print("\n3. Same key, different request...")
+        try:
+            idempotency.run_once("donations.quick", key, {**request, "amount": 99}, create)
+            assert False, "Reused key with a different request was accepted"
+        except idempotency.IdempotencyConflict:
+            print("   ✓ Rejected")
+
+        print("\n4. Same key on another endpoint...")
+        other = idempotency.run_once("donations.anonymous", key, request, lambda: {"id": "other"})
+        assert other["id"] == "other", "Keys are not scoped per endpoint"
+        print("   ✓ Scoped per endpoint")
+    finally:
+        Donation.delete().where(Donation.transaction_id == key).execute()
+        IdempotencyKey.delete().where(IdempotencyKey.key.endswith(f":{key}")).execute()
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_donation_idempotency()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the donation analytics queries are served by indexes
+instead of full scans of the donation table (SQLite query plans)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from peewee import SqliteDatabase
+
+from apps.webui.internal.db import DB
+from apps.webui.models.donations import Donations, Donation
+from apps.webui.models.leaderboard import Leaderboard
+from apps.webui.routers import donations as donation_routes
+from test_donation_queries import record_queries, seeded_dataset
+
+PREFIX = "test-indexes"
+
+
+def donation_selects(queries: list) -> list:
+    """The SELECTs on the donation table among the recorded queries"""
+    return [
+        (sql, params) for sql, params in filter(lambda query: isinstance(query, tuple), queries)
+        if sql.startswith("SELECT") and 'FROM "donation"' in sql
+    ]
+
+
+def full_scans(sql, params) -> list:
+    """Query plan steps that read the whole donation table"""
+    plan = DB.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    steps = [row[-1] for row in plan]
+    return [
+        step for step in steps
+        if step.startswith(("SCAN donation", "SCAN TABLE donation")) and "INDEX" not in step
+    ]
+
+
+def test_donation_indexes():
+    print("Testing Donation Query Plans...")
+    print("=" * 50)
+
+    if not isinstance(DB, SqliteDatabase):
+        print("Skipping: query plans are only checked on SQLite")
+        return
+
+    with seeded_dataset(PREFIX, users=50, children=10, donations=2_000):
+        donation = Donation.select().where(
+            Donation.id.startswith(f"{PREFIX}-") & Donation.child.is_null(False)
+        ).first()
+        child_id, region_id = donation.child_id, donation.region_id
+
+        cases = [
+            ("top_donors_total", lambda: donation_routes.top_donors_total(k=10)),
+            ("get_donation_stats", lambda: Donations.get_donation_stats()),
+            ("get_donation_stats (child)", lambda: Donations.get_donation_stats(child_id=child_id)),
+            ("get_donation_stats (region, child)", lambda: Donations.get_donation_stats(region_id, child_id)),
+            ("leaderboard rebuild", lambda: Leaderboard.rebuild_leaderboards()),
+            ("child aggregates rebuild", lambda: Donations.rebuild_child_aggregates()),
+        ]
+
+        failures = []
+        for name, func in cases:
+            queries, _ = record_queries(func)
+            queries = donation_selects(queries)
+            assert queries, f"{name} ran no donation queries"
+
+            scans = [scan for sql, params in queries for scan in full_scans(sql, params)]
+            status = "✗ full scan" if scans else "✓ indexed"
+            print(f"   {status}: {name} ({len(queries)} queries)")
+            if scans:
+                failures.append((name, scans))
+
+        assert not failures, f"Full scans of donation: {failures}"
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_donation_indexes()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script to verify donation list methods run a constant number of queries,
+however many donations they return
+"""
+
+import sys
+import os
+import logging
+from contextlib import contextmanager
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps.webui.internal.seeding import generate_dataset, delete_dataset
+from apps.webui.internal.startup import run_startup
+from apps.webui.models.donations import Donations, Donation
+from apps.webui.routers import donations as donation_routes
+
+PREFIX = "test-queries"
+
+
+class QueryCounter(logging.Handler):
+    """Records the queries peewee logs while the block runs"""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.queries = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def emit(self, record):
+        # Pool messages come from the "peewee.pool" child logger
+        if record.name == "peewee":
+            self.queries.append(record.msg)
+
+    def __enter__(self):
+        self.logger = logging.getLogger("peewee")
+        self.previous_level = self.logger.level
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.logger.removeHandler(self)
+        self.logger.setLevel(self.previous_level)
+
+
+def record_queries(func, *args, **kwargs):
+    """The (sql, params) of each query `func` ran, and its result"""
+    with QueryCounter() as counter:
+        result = func(*args, **kwargs)
+    return counter.queries, result
+
+
+def count_queries(func, *args, **kwargs):
+    queries, result = record_queries(func, *args, **kwargs)
+    return len(queries), result
+
+
+@contextmanager
+def seeded_dataset(prefix: str, users: int, children: int, donations: int):
+    """
+    Migrate and seed the database unless it is already up to date, then load
+    a dataset under `prefix` that is deleted again on exit
+    """
+    run_startup()
+    delete_dataset(prefix)
+    generate_dataset(
+        users=users, children=children, donations=donations,
+        followers=0, posts=0, referrals=0, prefix=prefix,
+    )
+    try:
+        yield
+    finally:
+        delete_dataset(prefix)
+
+
+def test_donation_queries():
+    print("Testing Donation Query Counts...")
+    print("=" * 50)
+
+    with seeded_dataset(PREFIX, users=20, children=5, donations=300):
+        donation = Donation.select().where(Donation.id.startswith(f"{PREFIX}-")).first()
+        cases = [
+            ("get_recent_donations", Donations.get_recent_donations, ()),
+            ("get_donations_by_child", Donations.get_donations_by_child, (donation.child_id,)),
+            ("get_donations_by_region", Donations.get_donations_by_region, (donation.region_id,)),
+        ]
+        if donation.user_id:
+            cases.append(("get_donations_by_user", Donations.get_donations_by_user, (donation.user_id,)))
+
+        print("\n1. Recent donations at different limits...")
+        counts = {}
+        for limit in (1, 10, 300):
+            queries, rows = count_queries(Donations.get_recent_donations, limit)
+            counts[limit] = queries
+            print(f"   - limit={limit}: {len(rows)} rows, {queries} queries")
+        assert len(set(counts.values())) == 1, f"Query count grows with result size: {counts}"
+
+        print("\n2. Donation list methods...")
+        for name, func, args in cases:
+            queries, rows = count_queries(func, *args)
+            if isinstance(rows, dict):
+                rows = rows["donations"]
+            print(f"   - {name}: {len(rows)} rows, {queries} queries")
+            assert queries == 1, f"{name} ran {queries} queries for {len(rows)} rows"
+            assert all(row["child_name"] for row in rows if row["child_id"])
+
+        print("\n3. Top donors...")
+        # Past the response cache, which would hide the queries
+        queries, rows = count_queries(donation_routes.top_donors_total.__wrapped__, k=100)
+        print(f"   - top_donors_total: {len(rows)} rows, {queries} queries")
+        assert queries == 1, f"top_donors_total ran {queries} queries for {len(rows)} rows"
+        assert all(row.user_name for row in rows)
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+def test_donation_pagination():
+    print("Testing Donation Pagination...")
+    print("=" * 50)
+
+    with seeded_dataset(PREFIX, users=20, children=2, donations=300):
+        child_id = Donation.select().where(Donation.id.startswith(f"{PREFIX}-")).first().child_id
+        expected = Donation.select().where(Donation.child == child_id).count()
+
+        print(f"\n1. Walking {expected} donations of {child_id} in pages of 25...")
+        seen, cursor, pages = [], None, 0
+        while True:
+            queries, page = count_queries(Donations.get_donations_by_child, child_id, 25, cursor)
+            assert queries == 1, f"Page {pages} ran {queries} queries"
+            assert len(page["donations"]) <= 25
+            seen.extend(d["id"] for d in page["donations"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        print(f"   - {pages} pages, {len(seen)} donations")
+        assert len(seen) == expected, f"Expected {expected} donations, got {len(seen)}"
+        assert len(set(seen)) == len(seen), "A donation was returned on two pages"
+
+        print("\n2. Invalid cursor...")
+        try:
+            Donations.get_donations_by_child(child_id, 25, "not-a-cursor")
+            assert False, "Invalid cursor was accepted"
+        except ValueError:
+            print("   ✓ Rejected")
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_donation_queries()
+    test_donation_pagination()
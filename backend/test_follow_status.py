@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script to verify follow lookups match ids written with stray whitespace
+or case, and that a feed page's follow status comes from the user's cached
+follow set
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps.webui.internal.scheduler import ScheduledJob, run_job
+from apps.webui.internal.startup import run_startup
+from apps.webui.models.children import Children, Child
+from apps.webui.models.followers import Followers, Follower
+from apps.webui.models.users import User
+from test_donation_queries import count_queries
+
+
+def test_follow_status():
+    print("Testing Follow Status Lookups...")
+    print("=" * 50)
+
+    run_startup()
+    user = User.select().first()
+    followed = Follower.select(Follower.child_id).where(Follower.user == user.id)
+    children = [child.id for child in Child.select(Child.id).where(Child.id.not_in(followed)).limit(5)]
+    assert user and len(children) >= 2, "Not enough users or children"
+
+    try:
+        print("\n1. Follow with a messy user id...")
+        count = Child.get_by_id(children[0]).follower_count
+        assert Followers.create_follower(f" {user.id.upper()}\u200b\r\n", children[0])
+        row = Follower.get((Follower.user == user.id) & (Follower.child == children[0]))
+        assert (row.user_id, row.child_id) == (user.id, children[0]), "Ids stored as given"
+        assert not Followers.create_follower(user.id, f"{children[0]} "), "Followed twice"
+        assert Child.get_by_id(children[0]).follower_count == count + 1, "Follower count not updated once"
+        try:
+            Followers.follow_child(user.id, "no-such-child")
+            assert False, "Followed a missing child"
+        except Child.DoesNotExist:
+            pass
+        print("   ✓ Stored normalized, counted once")
+
+        print("\n2. Single lookup...")
+        assert Followers.is_following(user.id, children[0])
+        assert Followers.is_following(f" {user.id} ", children[0].upper())
+        assert not Followers.is_following(user.id, children[1])
+        print("   ✓ Matches the normalized ids")
+
+        print("\n3. Feed page...")
+        Followers.follow_sets.clear()
+        queries, status = count_queries(lambda: Followers.follow_status_for(user.id, children))
+        assert queries == 1, f"Loading the follow set ran {queries} queries"
+        assert status == {child: child == children[0] for child in children}, status
+        queries, _ = count_queries(lambda: Followers.follow_status_for(user.id, children))
+        assert queries == 0, f"Cached follow status ran {queries} queries"
+        print(f"   ✓ {len(children)} children in 1 query, then from the cache")
+
+        print("\n4. Follows update the cached set...")
+        Followers.create_follower(user.id, children[1])
+        Followers.delete_follower(user.id, children[0])
+        queries, status = count_queries(lambda: Followers.follow_status_for(user.id, children[:2]))
+        assert queries == 0 and status == {children[0]: False, children[1]: True}, status
+        print("   ✓ Updated without a reload")
+
+        print("\n5. Follower count reconciliation...")
+        Children.sync_all_follower_counts()
+        Child.update(follower_count=Child.follower_count + 7).where(Child.id == children[1]).execute()
+        queries, stats = count_queries(Children.sync_all_follower_counts)
+        print(f"   - {stats} in {queries} queries")
+        assert stats == {'drifted_children': 1, 'total_drift': 7, 'max_drift': 7}, stats
+        assert queries <= 4, f"Reconciliation ran {queries} queries"
+        assert Child.get_by_id(children[1]).follower_count == Follower.select().where(
+            Follower.child == children[1]
+        ).count()
+        print("   ✓ Drift repaired")
+
+        print("\n6. Scheduled reconciliation job...")
+        Child.update(follower_count=Child.follower_count + 3).where(Child.id == children[1]).execute()
+        ScheduledJob.delete().where(ScheduledJob.name == "follower_counts").execute()
+        assert run_job("follower_counts"), "Job was not claimed"
+        job = ScheduledJob.get_by_id("follower_counts")
+        assert job.last_status == "success", job.last_error
+        assert Child.get_by_id(children[1]).follower_count == Follower.select().where(
+            Follower.child == children[1]
+        ).count()
+        print(f"   ✓ {job.last_result}")
+
+        print("\n7. Top children by followers...")
+        queries, top = count_queries(lambda: Followers.get_top_k_children_by_followers(3, seed=1))
+        assert queries == 1, f"Top children ran {queries} queries"
+        counts = [child["follower_count"] for child in top]
+        assert counts == sorted(counts, reverse=True), counts
+        assert top == Followers.get_top_k_children_by_followers(3, seed=1), "Same seed, different order"
+        assert [c["id"] for c in Children.get_popular_children(3, seed=1)] == [c["child_id"] for c in top]
+        print(f"   ✓ {counts} in 1 query")
+    finally:
+        for child in children[:2]:
+            Followers.delete_follower(user.id, child)
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_follow_status()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script to verify a donation is counted once on the leaderboards when a
+rebuild runs between its commit and its outbox event
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from peewee import fn
+
+from apps.webui.internal.outbox import drain as drain_outbox
+from apps.webui.models.donations import Donations, Donation
+from apps.webui.models.leaderboard import Leaderboard
+from test_donation_queries import seeded_dataset
+
+PREFIX = "test-leaderboard"
+
+
+def live_total(user_id: str) -> float:
+    total = Donation.select(fn.SUM(Donation.amount)).where(
+        (Donation.status == "completed") & (Donation.user == user_id)
+    ).scalar()
+    return round(float(total or 0), 2)
+
+
+def ranked_total(user_id: str) -> float:
+    return round(Leaderboard.get_user_ranking(user_id)["total_amount"], 2)
+
+
+def test_leaderboard():
+    print("Testing Leaderboard Rebuilds and the Outbox...")
+    print("=" * 50)
+
+    created = None
+    with seeded_dataset(PREFIX, users=20, children=3, donations=200):
+        try:
+            drain_outbox()
+            Leaderboard.rebuild_leaderboards()
+            donation = Donation.select().where(
+                Donation.id.startswith(f"{PREFIX}-")
+                & Donation.user.is_null(False)
+                & Donation.child.is_null(False)
+            ).first()
+            user_id = donation.user_id
+            assert ranked_total(user_id) == live_total(user_id)
+
+            print("\n1. Rebuild while the donation's event is pending...")
+            created = Donations.create_donation(
+                donation_type="Standard", user_id=user_id, child_id=donation.child_id, amount=321.5
+            )
+            Leaderboard.rebuild_leaderboards()
+            assert ranked_total(user_id) == round(live_total(user_id) - 321.5, 2), "Counted by the rebuild"
+
+            print("\n2. Drain the outbox...")
+            drain_outbox()
+            assert ranked_total(user_id) == live_total(user_id), "Counted twice or not at all"
+            print("   ✓ Counted once")
+        finally:
+            if created:
+                Donation.delete().where(Donation.id == created["id"]).execute()
+    Leaderboard.rebuild_leaderboards()
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_leaderboard()
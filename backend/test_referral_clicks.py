@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script to verify referral clicks are buffered and written in batches,
+without a query per click
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from peewee import fn
+
+from apps.webui.internal.startup import run_startup
+from apps.webui.models.referrals import (
+    Referrals, ReferralTracking, ReferralReward, ReferralClickBuffer
+)
+from apps.webui.models.users import User
+from test_donation_queries import count_queries
+
+
+def total_clicks(referral_code: str) -> int:
+    return ReferralTracking.select(fn.COALESCE(fn.SUM(ReferralTracking.click_count), 0)).where(
+        ReferralTracking.referral_code == referral_code
+    ).scalar()
+
+
+def test_referral_clicks():
+    print("Testing Referral Click Buffering...")
+    print("=" * 50)
+
+    run_startup()
+    codes = [
+        code for (code,) in User.select(User.referral_code)
+        .where(User.referral_code.is_null(False) & (User.referral_code != ""))
+        .limit(3)
+        .tuples()
+    ]
+    assert codes, "No users with referral codes"
+
+    before = {code: total_clicks(code) for code in codes}
+    existing = {id for (id,) in ReferralTracking.select(ReferralTracking.id).tuples()}
+    rewards = {id for (id,) in ReferralReward.select(ReferralReward.id).tuples()}
+    claimed = None
+    default_buffer = Referrals.clicks
+    Referrals.clicks = ReferralClickBuffer(interval=3600, max_pending=10_000)
+
+    try:
+        print(f"\n1. 300 clicks on {len(codes)} referral codes...")
+        queries, _ = count_queries(
+            lambda: [Referrals.track_referral_click(codes[i % len(codes)], "test") for i in range(300)]
+        )
+        # Only the first lookup of each code reaches the database
+        print(f"   - {queries} queries")
+        assert queries <= len(codes), f"Clicks ran {queries} queries"
+        assert all(total_clicks(code) == before[code] for code in codes), "Clicks written before a flush"
+
+        print("\n2. Flush...")
+        queries, written = count_queries(Referrals.clicks.flush)
+        print(f"   - {written} clicks in {queries} queries")
+        assert written == 300
+        assert queries <= 5, f"Flush ran {queries} queries"
+        for i, code in enumerate(codes):
+            expected = len(range(i, 300, len(codes)))
+            assert total_clicks(code) == before[code] + expected, f"{code}: clicks lost"
+        print("   ✓ All clicks written")
+
+        print("\n3. Buffer limit...")
+        Referrals.clicks = ReferralClickBuffer(interval=3600, max_pending=10)
+        for _ in range(10):
+            Referrals.track_referral_click(codes[0], "test")
+        expected = len(range(0, 300, len(codes))) + 10
+        assert total_clicks(codes[0]) == before[codes[0]] + expected, "Full buffer was not flushed"
+        print("   ✓ Flushed once full")
+
+        print("\n4. Registration before a flush...")
+        code = codes[-1]
+        referred = User.select().where(User.referral_code != code).first()
+        claimed = ReferralTracking.select().where(
+            (ReferralTracking.referral_code == code) & ReferralTracking.referred_user.is_null()
+        ).order_by(ReferralTracking.id).first()
+        clicks = claimed.click_count if claimed else 0
+        for _ in range(3):
+            Referrals.track_referral_click(code, "test")
+        result = Referrals.complete_referral_registration(code, referred.id)
+        tracking = ReferralTracking.get_by_id(result['tracking_id'])
+        assert tracking.referred_user_id == referred.id
+        assert tracking.click_count == clicks + 3, "Buffered clicks not on the registered row"
+        assert Referrals.clicks.flush() == 0, "Clicks left in the buffer"
+        assert not ReferralTracking.select().where(
+            (ReferralTracking.referral_code == code)
+            & ReferralTracking.referred_user.is_null()
+            & ReferralTracking.id.not_in(existing)
+        ).exists(), "Open row left behind"
+        print("   ✓ Clicks folded into the registration")
+    finally:
+        Referrals.clicks = default_buffer
+        ReferralReward.delete().where(ReferralReward.id.not_in(rewards)).execute()
+        if claimed:
+            # Reopen the row the registration took over, with the clicks it had
+            claimed.click_count = ReferralTracking.get_by_id(claimed.id).click_count
+            claimed.save()
+        # Undo the clicks on rows that existed, drop the rows the test created
+        ReferralTracking.delete().where(
+            ReferralTracking.referral_code.in_(codes) & ReferralTracking.id.not_in(existing)
+        ).execute()
+        for code in codes:
+            extra = total_clicks(code) - before[code]
+            if extra:
+                row = ReferralTracking.select().where(
+                    (ReferralTracking.referral_code == code) & ReferralTracking.referred_user.is_null()
+                ).order_by(ReferralTracking.id).first()
+                ReferralTracking.update(click_count=ReferralTracking.click_count - extra).where(
+                    ReferralTracking.id == row.id
+                ).execute()
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_referral_clicks()
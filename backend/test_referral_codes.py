@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script to verify referral codes are generated in batches without a
+query per candidate, and resolved from the user cache
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps.webui.models.users import Users, User
+from test_donation_queries import count_queries, seeded_dataset
+
+PREFIX = "test-codes"
+
+
+def test_referral_codes():
+    print("Testing Referral Code Generation and Resolution...")
+    print("=" * 50)
+
+    with seeded_dataset(PREFIX, users=2_000, children=1, donations=0):
+        print("\n1. Backfill 2000 users without codes...")
+        User.update(referral_code=None).where(User.id.startswith(f"{PREFIX}-")).execute()
+        start = time.time()
+        queries, written = count_queries(Users.ensure_referral_codes)
+        print(f"   - {written} codes in {queries} queries, {time.time() - start:.2f}s")
+        assert written >= 2_000
+        assert queries < 50, f"Backfill ran {queries} queries"
+
+        codes = [
+            code for (code,) in User.select(User.referral_code)
+            .where(User.id.startswith(f"{PREFIX}-"))
+            .tuples()
+        ]
+        assert all(codes), "Users left without a code"
+        assert len(set(codes)) == len(codes), "Duplicate codes"
+        print("   ✓ Every user has a unique code")
+
+        print("\n2. Resolution from the cache...")
+        user = User.select().where(User.id.startswith(f"{PREFIX}-")).first()
+        assert Users.get_cached_user_by_referral_code(user.referral_code).id == user.id
+        queries, referrer = count_queries(
+            lambda: Users.get_cached_user_by_referral_code(user.referral_code)
+        )
+        assert referrer.id == user.id and queries == 0, f"Cached lookup ran {queries} queries"
+        print("   ✓ Served without a query")
+
+        print("\n3. Regenerated code...")
+        old_code = user.referral_code
+        new_code = Users.regenerate_referral_code(user.id)
+        assert new_code and new_code != old_code
+        assert Users.get_cached_user_by_referral_code(old_code) is None, "Old code still resolves"
+        assert Users.get_cached_user_by_referral_code(new_code).id == user.id
+        print("   ✓ Old code no longer resolves")
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_referral_codes()
@@ -11,11 +11,17 @@ from apps.webui.models.users import Users
 from apps.webui.models.donations import Donations
 from apps.webui.models.referrals import Referrals, ReferralTracking
 from apps.webui.internal.db import DB
+from apps.webui.internal.startup import run_startup
+from apps.webui.internal.outbox import drain as drain_outbox
+from test_donation_queries import count_queries
 import uuid
 
 def test_referral_flow():
     print("Testing Referral Flow...")
     print("=" * 50)
+
+    # Migrate and seed the database unless it is already up to date
+    run_startup()
     
     # Step 1: Get or create test users
     print("\n1. Setting up test users...")
@@ -68,6 +74,8 @@ def test_referral_flow():
     
     # Step 5: Check if referral tracking was created
     print("\n5. Checking referral tracking...")
+    # Referral tracking runs from the outbox once the donation committed
+    drain_outbox()
     new_count = ReferralTracking.select().count()
     print(f"   Total records now: {new_count}")
     
@@ -94,18 +102,29 @@ def test_referral_flow():
             print(f"   ✓ Leaderboard has {len(leaderboard)} entries")
             for idx, entry in enumerate(leaderboard[:3], 1):
                 print(f"   #{idx}: {entry['user']['name']} - {entry['total_donations']} HKD ({entry['referral_count']} referrals)")
+            # Ranks looked up one user at a time agree with the leaderboard order
+            for entry in leaderboard:
+                rank = Referrals.get_referrer_rank(entry['user']['id'], period="all_time")
+                assert rank == entry['rank'], f"{entry['user']['id']}: rank {rank}, leaderboard {entry['rank']}"
+            print(f"   ✓ Ranks match the leaderboard")
         else:
             print("   - Leaderboard is empty")
+    except AssertionError:
+        raise
     except Exception as e:
         print(f"   ✗ Error fetching leaderboard: {e}")
     
     # Step 7: Check user's referral stats
     print(f"\n7. Checking {referrer.name}'s referral stats...")
     try:
-        stats = Referrals.get_user_referral_stats(referrer.id)
+        queries, stats = count_queries(Referrals.get_user_referral_stats, referrer.id)
         print(f"   - Total referral donations: {stats['as_referrer']['total_referral_donations']}")
         print(f"   - Registered referrals: {stats['as_referrer']['registered_count']}")
         print(f"   - Donated referrals: {stats['as_referrer']['donated_count']}")
+        print(f"   - {queries} queries")
+        assert queries == 5, f"get_user_referral_stats ran {queries} queries"
+    except AssertionError:
+        raise
     except Exception as e:
         print(f"   ✗ Error fetching stats: {e}")
     
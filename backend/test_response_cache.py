@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script to verify cached responses are served until one of their tags is
+invalidated, in-process and through a shared backend
+"""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps.webui.internal.response_cache import LocalBackend, ResponseCache, SharedBackend
+
+
+class FakeRedis:
+    """The subset of the Redis client the shared backend uses, in memory"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value), None)
+        return value
+
+
+class BrokenBackend(LocalBackend):
+    def get(self, key):
+        raise ConnectionError("cache is down")
+
+
+def test_response_cache():
+    print("Testing Response Cache...")
+    print("=" * 50)
+
+    calls = []
+
+    def children(cache):
+        @cache.cached("children.list", ("child", "region"))
+        def get_children(region: str = None):
+            calls.append(region)
+            return [{"id": "c1", "region": region, "version": len(calls)}]
+        return get_children
+
+    print("\n1. In-process cache...")
+    cache = ResponseCache(LocalBackend(ttl=60, maxsize=100), ttl=60)
+    get_children = children(cache)
+    first = get_children(region="central")
+    assert get_children(region="central") == first
+    get_children(region="eastern")
+    assert len(calls) == 2, f"Expected 2 computations, got {len(calls)}"
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2), stats
+    print(f"   ✓ {stats['hits']} hit, {stats['misses']} misses")
+
+    print("\n2. Invalidation by tag...")
+    cache.invalidate("post")
+    get_children(region="central")
+    assert len(calls) == 2, "An unrelated tag invalidated the entry"
+    cache.invalidate("region")
+    assert get_children(region="central") != first
+    assert len(calls) == 3
+    print("   ✓ Only tagged entries are invalidated")
+
+    print("\n3. Shared backend across workers...")
+    calls.clear()
+    redis = FakeRedis()
+    worker_a = ResponseCache(SharedBackend(redis), ttl=60)
+    worker_b = ResponseCache(SharedBackend(redis), ttl=60)
+    get_a, get_b = children(worker_a), children(worker_b)
+    get_a(region="central")
+    get_b(region="central")
+    assert len(calls) == 1, "Worker B did not see worker A's entry"
+    worker_b.invalidate("child")
+    get_a(region="central")
+    assert len(calls) == 2, "Worker A did not see worker B's invalidation"
+    print("   ✓ Entries and invalidations are shared")
+
+    print("\n4. Async routes...")
+    async_calls = []
+
+    @cache.cached("posts.page", ("post",))
+    async def get_posts(page: int = 1):
+        async_calls.append(page)
+        return [{"page": page}]
+
+    asyncio.run(get_posts(page=1))
+    assert asyncio.run(get_posts(page=1)) == [{"page": 1}]
+    assert async_calls == [1]
+    print("   ✓ Cached")
+
+    print("\n5. Backend errors...")
+    broken = ResponseCache(BrokenBackend(ttl=60, maxsize=100), ttl=60)
+    calls.clear()
+    get_broken = children(broken)
+    assert get_broken(region="central")[0]["region"] == "central"
+    assert broken.get_stats()["errors"] == 1
+    print("   ✓ Served from the database")
+
+    print("\n" + "=" * 50)
+    print("Test complete!")
+
+
+if __name__ == "__main__":
+    test_response_cache()
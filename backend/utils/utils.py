@@ -96,14 +96,14 @@ def get_current_user(
     # auth by jwt token
     data = decode_token(token)
     if data != None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = Users.get_cached_user_by_id(data["id"])
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ERROR_MESSAGES.INVALID_TOKEN,
             )
         else:
-            Users.update_user_last_active_by_id(user.id)
+            Users.touch_user_last_active_by_id(user.id)
         return user
     else:
         raise HTTPException(
@@ -113,7 +113,7 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = Users.get_cached_user_by_api_key(api_key)
 
     if user is None:
         raise HTTPException(
@@ -121,7 +121,7 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        Users.touch_user_last_active_by_id(user.id)
 
     return user
 
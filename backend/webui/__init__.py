@@ -56,5 +56,55 @@ def dev(
     )
 
 
+@app.command()
+def seed(
+    force: bool = typer.Option(
+        True, help="Run even if the database fingerprint is up to date."
+    ),
+):
+    """Run migrations, create tables and seed the demo dataset."""
+    from apps.webui.internal.startup import run_startup
+
+    if run_startup(force=force):
+        typer.echo("Database migrated and seeded.")
+    else:
+        typer.echo("Database is already up to date.")
+
+
+@app.command()
+def generate(
+    users: int = 1_000,
+    children: int = 100,
+    donations: int = 10_000,
+    followers: int = 5_000,
+    posts: int = 500,
+    referrals: int = 500,
+    seed: int = 42,
+    prefix: str = "load",
+    reset: bool = typer.Option(
+        False, help="Delete a previously generated dataset with this prefix first."
+    ),
+):
+    """Bulk load a generated demo / load-test dataset."""
+    from apps.webui.internal.seeding import delete_dataset, generate_dataset
+    from apps.webui.internal.startup import run_startup
+
+    run_startup()
+    if reset:
+        typer.echo(f"Deleted: {delete_dataset(prefix)}")
+
+    result = generate_dataset(
+        users=users,
+        children=children,
+        donations=donations,
+        followers=followers,
+        posts=posts,
+        referrals=referrals,
+        seed=seed,
+        prefix=prefix,
+    )
+    typer.echo(f"Generated: {result}")
+
+
 if __name__ == "__main__":
     app()
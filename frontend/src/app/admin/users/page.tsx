@@ -16,13 +16,20 @@ export default function UserManagementPage() {
  const [newPassword, setNewPassword] = useState('');
  const [confirmPassword, setConfirmPassword] = useState('');
  const [searchTerm, setSearchTerm] = useState('');
+ const [nextCursor, setNextCursor] = useState<string | null>(null);
+ const [loadingMore, setLoadingMore] = useState(false);
  const [currentUser, setCurrentUser] = useState<User | null>(null);
 
  useEffect(() => {
- loadUsers();
  loadCurrentUser();
  }, []);
 
+ // Search on the server, once typing pauses
+ useEffect(() => {
+ const timeout = setTimeout(loadUsers, 300);
+ return () => clearTimeout(timeout);
+ }, [searchTerm]);
+
  const loadCurrentUser = async () => {
  try {
  const userData = localStorage.getItem('user');
@@ -36,9 +43,9 @@ export default function UserManagementPage() {
 
  const loadUsers = async () => {
  try {
- setLoading(true);
- const data = await userService.getAllUsers();
- setUsers(data);
+ const page = await userService.getUsers({ search: searchTerm || undefined });
+ setUsers(page.users);
+ setNextCursor(page.next_cursor);
  } catch (error) {
  console.error('Failed to load users:', error);
  toast.error('Failed to load users');
@@ -47,6 +54,21 @@ export default function UserManagementPage() {
  }
  };
 
+ const loadMoreUsers = async () => {
+ if (!nextCursor) return;
+ try {
+ setLoadingMore(true);
+ const page = await userService.getUsers({ cursor: nextCursor, search: searchTerm || undefined });
+ setUsers((current) => [...current, ...page.users]);
+ setNextCursor(page.next_cursor);
+ } catch (error) {
+ console.error('Failed to load users:', error);
+ toast.error('Failed to load users');
+ } finally {
+ setLoadingMore(false);
+ }
+ };
+
  const handleRoleUpdate = async (userId: string, newRole: 'admin' | 'user' | 'pending' | 'serve_user') => {
  try {
  const roleUpdate: UserRoleUpdateForm = {
@@ -104,11 +126,6 @@ export default function UserManagementPage() {
  }
  };
 
- const filteredUsers = users.filter(user => 
- user.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
- user.email.toLowerCase().includes(searchTerm.toLowerCase())
- );
-
  if (loading) {
  return (
  <div className="flex items-center justify-center min-h-screen">
@@ -163,7 +180,7 @@ export default function UserManagementPage() {
  </tr>
  </thead>
  <tbody className="bg-white divide-y divide-gray-200 ">
- {filteredUsers.map((user) => (
+ {users.map((user) => (
  <tr key={user.id} className="hover:bg-gray-50 ">
  <td className="px-6 py-4 whitespace-nowrap">
  <div className="flex items-center">
@@ -230,6 +247,17 @@ export default function UserManagementPage() {
  </tbody>
  </table>
  </div>
+ {nextCursor && (
+ <div className="px-6 py-4 border-t border-gray-200 text-center">
+ <button
+ onClick={loadMoreUsers}
+ disabled={loadingMore}
+ className="px-4 py-2 text-sm font-medium text-blue-600 hover:text-blue-800 disabled:opacity-50"
+ >
+ {loadingMore ? 'Loading...' : 'Load more'}
+ </button>
+ </div>
+ )}
  </div>
 
  {/* Password Reset Modal */}
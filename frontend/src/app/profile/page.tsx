@@ -13,6 +13,11 @@ export default function ProfilePage() {
   const [imageError, setImageError] = useState(false);
   const [copied, setCopied] = useState(false);
   const [donations, setDonations] = useState<DonationResponse[]>([]);
+  const [donationStats, setDonationStats] = useState({
+    total_amount: 0,
+    total_donations: 0,
+    children_supported: 0,
+  });
   const [donationsLoading, setDonationsLoading] = useState(false);
   const [referralStats, setReferralStats] = useState<ReferralStats | null>(null);
   const [referralStatsLoading, setReferralStatsLoading] = useState(false);
@@ -37,9 +42,14 @@ export default function ProfilePage() {
     // Fetch user's donations when user is loaded
     if (user?.id) {
       setDonationsLoading(true);
-      donationService.getDonationsByUser(user.id)
-        .then(data => {
+      // The history is paginated, so totals come from the stats endpoint
+      Promise.all([
+        donationService.getDonationsByUser(user.id),
+        donationService.getUserDonationStats(user.id),
+      ])
+        .then(([data, stats]) => {
           setDonations(data);
+          setDonationStats(stats);
         })
         .catch(error => {
           console.error('Error fetching donations:', error);
@@ -554,7 +564,7 @@ export default function ProfilePage() {
                       <div>
                         <p className="text-sm text-gray-600">Total Donated</p>
                         <p className="text-2xl font-bold text-indigo-600">
-                          HK${donations.reduce((sum, d) => sum + d.amount, 0).toFixed(2)}
+                          HK${donationStats.total_amount.toFixed(2)}
                         </p>
                       </div>
                       <DollarSign className="h-8 w-8 text-indigo-400" />
@@ -564,7 +574,7 @@ export default function ProfilePage() {
                     <div className="flex items-center justify-between">
                       <div>
                         <p className="text-sm text-gray-600">Total Donations</p>
-                        <p className="text-2xl font-bold text-green-600">{donations.length}</p>
+                        <p className="text-2xl font-bold text-green-600">{donationStats.total_donations}</p>
                       </div>
                       <Heart className="h-8 w-8 text-green-400" />
                     </div>
@@ -574,7 +584,7 @@ export default function ProfilePage() {
                       <div>
                         <p className="text-sm text-gray-600">Children Helped</p>
                         <p className="text-2xl font-bold text-purple-600">
-                          {new Set(donations.filter(d => d.child_id).map(d => d.child_id)).size}
+                          {donationStats.children_supported}
                         </p>
                       </div>
                       <Gift className="h-8 w-8 text-purple-400" />
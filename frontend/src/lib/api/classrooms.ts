@@ -80,7 +80,7 @@ export const classroomsApi = {
 
   getUserDonations: async (userId: string): Promise<DonationImpact[]> => {
     const { data } = await apiClient.get(`/donations/user/${userId}`);
-    return data;
+    return data.donations;
   },
 
   trackClassroomVisit: async (
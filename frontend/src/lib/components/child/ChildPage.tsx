@@ -109,21 +109,25 @@ const FanClub = () => {
   const [donations, setDonations] = useState<any[]>([]);
   const [donationsLoading, setDonationsLoading] = useState(false);
   const [totalAmount, setTotalAmount] = useState<number>(0);
+  const [donationCount, setDonationCount] = useState<number>(0);
+  const [supporterCount, setSupporterCount] = useState<number>(0);
 
   const getDonations = async () => {
     if (!child) return;
     
     setDonationsLoading(true);
     try {
-      const response = await fetch(`http://localhost:8080/api/v1/donations/child/${child.id}`, {
-        method: "GET"
-      });
+      // Latest donations; the history is paginated, so totals come from the stats endpoint
+      const [response, statsResponse] = await Promise.all([
+        fetch(`http://localhost:8080/api/v1/donations/child/${child.id}`, { method: "GET" }),
+        fetch(`http://localhost:8080/api/v1/donations/stats?child_id=${child.id}`, { method: "GET" })
+      ]);
       const result = await response.json();
-      setDonations(result);
-      
-      // Calculate total amount from donations
-      const total = result.reduce((sum: number, d: any) => sum + (d.amount || 0), 0);
-      setTotalAmount(total);
+      const stats = await statsResponse.json();
+      setDonations(result.donations);
+      setTotalAmount(stats.total_amount || 0);
+      setDonationCount(stats.total_donations || 0);
+      setSupporterCount(stats.unique_donors || 0);
     } catch (error) {
       console.error('Error fetching donations:', error);
     } finally {
@@ -195,12 +199,12 @@ const FanClub = () => {
                 <p className="text-sm text-gray-500">Total Raised</p>
               </div>
               <div className="p-4 text-center">
-                <p className="text-2xl font-bold text-green-600">{donations.length}</p>
+                <p className="text-2xl font-bold text-green-600">{donationCount}</p>
                 <p className="text-sm text-gray-500">Total Donations</p>
               </div>
               <div className="p-4 text-center">
                 <p className="text-2xl font-bold text-purple-600">
-                  {new Set(donations.filter(d => d.user_id && d.user_id !== '0000').map(d => d.user_id)).size}
+                  {supporterCount}
                 </p>
                 <p className="text-sm text-gray-500">Supporters</p>
               </div>
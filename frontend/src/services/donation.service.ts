@@ -64,12 +64,12 @@ class DonationService {
 
   async getDonationsByUser(userId: string): Promise<DonationResponse[]> {
     const response = await apiClient.get(`/donations/user/${userId}`);
-    return response.data;
+    return response.data.donations;
   }
 
   async getDonationsByChild(childId: string): Promise<DonationResponse[]> {
     const response = await apiClient.get(`/donations/child/${childId}`);
-    return response.data;
+    return response.data.donations;
   }
 
   async getTopDonors(limit: number = 10): Promise<any[]> {
@@ -99,7 +99,7 @@ class DonationService {
 
   async getDonationsByRegion(regionId: string): Promise<DonationResponse[]> {
     const response = await apiClient.get(`/donations/region/${regionId}`);
-    return response.data;
+    return response.data.donations;
   }
 
   async getDonationStats(regionId?: string, childId?: string): Promise<{
@@ -115,6 +115,15 @@ class DonationService {
     return response.data;
   }
 
+  async getUserDonationStats(userId: string): Promise<{
+    total_amount: number;
+    total_donations: number;
+    children_supported: number;
+  }> {
+    const response = await apiClient.get(`/donations/user/${userId}/stats`);
+    return response.data;
+  }
+
   async getRecentDonations(limit: number = 50): Promise<DonationResponse[]> {
     const response = await apiClient.get(`/donations/recent?limit=${limit}`);
     return response.data;
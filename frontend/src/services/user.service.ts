@@ -18,11 +18,16 @@ export interface PasswordResetForm {
   new_password: string;
 }
 
+export interface UserPage {
+  users: User[];
+  next_cursor: string | null;
+}
+
 export const userService = {
-  async getAllUsers(skip: number = 0, limit: number = 50): Promise<User[]> {
-    const response = await apiClient.get<User[]>('/users/', {
-      params: { skip, limit }
-    });
+  async getUsers(
+    params: { limit?: number; cursor?: string; role?: string; search?: string } = {}
+  ): Promise<UserPage> {
+    const response = await apiClient.get<UserPage>('/users/', { params });
     return response.data;
   },
 